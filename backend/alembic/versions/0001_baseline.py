@@ -0,0 +1,203 @@
+"""baseline: the schema created by Base.metadata.create_all before migrations
+
+Databases created that way are adopted: missing tables are created and the columns and
+indexes added since (formerly applied on startup) are patched in.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 02:52:57.103993
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    existing = set() if context.is_offline_mode() else set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'bot_user_summaries' not in existing:
+        op.create_table('bot_user_summaries',
+        sa.Column('telegram_id', sa.BigInteger(), nullable=False),
+        sa.Column('bot_user_id', sa.Integer(), nullable=False),
+        sa.Column('username', sa.String(), nullable=True),
+        sa.Column('first_name', sa.String(), nullable=True),
+        sa.Column('last_name', sa.String(), nullable=True),
+        sa.Column('language_code', sa.String(), nullable=True),
+        sa.Column('is_blocked', sa.Boolean(), nullable=False),
+        sa.Column('first_seen_at', sa.DateTime(), nullable=False),
+        sa.Column('last_seen_at', sa.DateTime(), nullable=False),
+        sa.Column('source_bot_ids', postgresql.ARRAY(sa.Integer()), nullable=False),
+        sa.PrimaryKeyConstraint('telegram_id')
+        )
+        op.create_index(op.f('ix_bot_user_summaries_bot_user_id'), 'bot_user_summaries', ['bot_user_id'], unique=False)
+        op.create_index('ix_bot_user_summaries_seen', 'bot_user_summaries', ['last_seen_at', 'telegram_id'], unique=False)
+        op.create_index('ix_bot_user_summaries_sources', 'bot_user_summaries', ['source_bot_ids'], unique=False, postgresql_using='gin')
+    if 'bots' not in existing:
+        op.create_table('bots',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('token', sa.String(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('bot_username', sa.String(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('display_order', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('token')
+        )
+        op.create_index(op.f('ix_bots_id'), 'bots', ['id'], unique=False)
+    if 'broadcasts' not in existing:
+        op.create_table('broadcasts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('text', sa.Text(), nullable=True),
+        sa.Column('media_type', sa.String(), nullable=True),
+        sa.Column('media_file_id', sa.String(), nullable=True),
+        sa.Column('media_hash', sa.String(length=64), nullable=True),
+        sa.Column('buttons', sa.JSON(), nullable=True),
+        sa.Column('target_bots', sa.JSON(), nullable=False),
+        sa.Column('dedupe_recipients', sa.Boolean(), server_default='false', nullable=False),
+        sa.Column('dedupe_policy', sa.String(), server_default='last_seen', nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('total_users', sa.Integer(), nullable=False),
+        sa.Column('sent_count', sa.Integer(), nullable=False),
+        sa.Column('failed_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_broadcasts_id'), 'broadcasts', ['id'], unique=False)
+    if 'daily_users' not in existing:
+        op.create_table('daily_users',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('new_users', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('day')
+        )
+    if 'media_files' not in existing:
+        op.create_table('media_files',
+        sa.Column('hash', sa.String(length=64), nullable=False),
+        sa.Column('filename', sa.String(), nullable=False),
+        sa.Column('content_type', sa.String(), nullable=True),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('hash')
+        )
+    if 'users' not in existing:
+        op.create_table('users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('username', sa.String(), nullable=False),
+        sa.Column('password_hash', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+        op.create_index(op.f('ix_users_username'), 'users', ['username'], unique=True)
+    if 'bot_media_files' not in existing:
+        op.create_table('bot_media_files',
+        sa.Column('media_hash', sa.String(length=64), nullable=False),
+        sa.Column('bot_id', sa.Integer(), nullable=False),
+        sa.Column('file_id', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['bot_id'], ['bots.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['media_hash'], ['media_files.hash'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('media_hash', 'bot_id')
+        )
+    if 'bot_users' not in existing:
+        op.create_table('bot_users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('telegram_id', sa.BigInteger(), nullable=False),
+        sa.Column('username', sa.String(), nullable=True),
+        sa.Column('first_name', sa.String(), nullable=True),
+        sa.Column('last_name', sa.String(), nullable=True),
+        sa.Column('language_code', sa.String(), nullable=True),
+        sa.Column('source_bot_id', sa.Integer(), nullable=False),
+        sa.Column('is_blocked', sa.Boolean(), nullable=False),
+        sa.Column('first_seen_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('last_seen_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['source_bot_id'], ['bots.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('telegram_id', 'source_bot_id', name='uq_bot_user_telegram_source')
+        )
+        op.create_index(op.f('ix_bot_users_id'), 'bot_users', ['id'], unique=False)
+        op.create_index(op.f('ix_bot_users_telegram_id'), 'bot_users', ['telegram_id'], unique=False)
+    if 'broadcast_checkpoints' not in existing:
+        op.create_table('broadcast_checkpoints',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('broadcast_id', sa.Integer(), nullable=False),
+        sa.Column('bot_id', sa.Integer(), nullable=False),
+        sa.Column('last_user_id', sa.Integer(), nullable=False),
+        sa.Column('sent_count', sa.Integer(), nullable=False),
+        sa.Column('failed_count', sa.Integer(), nullable=False),
+        sa.Column('is_done', sa.Boolean(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['bot_id'], ['bots.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['broadcast_id'], ['broadcasts.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('broadcast_id', 'bot_id', name='uq_broadcast_checkpoint_bot')
+        )
+        op.create_index(op.f('ix_broadcast_checkpoints_id'), 'broadcast_checkpoints', ['id'], unique=False)
+    if 'daily_bot_users' not in existing:
+        op.create_table('daily_bot_users',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('bot_id', sa.Integer(), nullable=False),
+        sa.Column('new_users', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['bot_id'], ['bots.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('day', 'bot_id')
+        )
+    if 'message_templates' not in existing:
+        op.create_table('message_templates',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('bot_id', sa.Integer(), nullable=False),
+        sa.Column('language_code', sa.String(), nullable=False),
+        sa.Column('text', sa.Text(), nullable=False),
+        sa.Column('buttons', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['bot_id'], ['bots.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_message_templates_id'), 'message_templates', ['id'], unique=False)
+    if 'broadcast_recipients' not in existing:
+        op.create_table('broadcast_recipients',
+        sa.Column('broadcast_id', sa.Integer(), nullable=False),
+        sa.Column('bot_user_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['bot_user_id'], ['bot_users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['broadcast_id'], ['broadcasts.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('broadcast_id', 'bot_user_id')
+        )
+
+    # Added to existing tables after their first release
+    op.execute("ALTER TABLE broadcasts ADD COLUMN IF NOT EXISTS dedupe_recipients BOOLEAN NOT NULL DEFAULT false")
+    op.execute("ALTER TABLE broadcasts ADD COLUMN IF NOT EXISTS dedupe_policy VARCHAR NOT NULL DEFAULT 'last_seen'")
+    op.execute("ALTER TABLE broadcasts ADD COLUMN IF NOT EXISTS media_hash VARCHAR(64)")
+    for column in ("username", "first_name", "last_name"):
+        op.create_index(
+            f"ix_bot_user_summaries_{column}_trgm", "bot_user_summaries", [column],
+            postgresql_using="gin", postgresql_ops={column: "gin_trgm_ops"}, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('broadcast_recipients')
+    op.drop_table('message_templates')
+    op.drop_table('daily_bot_users')
+    op.drop_table('broadcast_checkpoints')
+    op.drop_table('bot_users')
+    op.drop_table('bot_media_files')
+    op.drop_table('users')
+    op.drop_table('media_files')
+    op.drop_table('daily_users')
+    op.drop_table('broadcasts')
+    op.drop_table('bots')
+    op.drop_table('bot_user_summaries')
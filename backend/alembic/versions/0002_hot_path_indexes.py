@@ -0,0 +1,91 @@
+"""hot path indexes: broadcast recipient scans, one template per language
+
+Templates whose language differs from an older one only by case are renamed (and logged)
+before the unique index is built, never deleted.
+
+Indexes are built and dropped CONCURRENTLY (outside a transaction), so the tables stay
+writable while they are built. A build interrupted midway leaves an INVALID index behind;
+it is dropped and rebuilt on the next run.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 03:10:00.000000
+
+"""
+import logging
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+
+def _drop_invalid(name: str) -> None:
+    if context.is_offline_mode():
+        return
+    invalid = op.get_bind().scalar(sa.text(
+        "SELECT NOT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE c.relname = :name AND pg_catalog.pg_table_is_visible(c.oid)"
+    ), {"name": name})
+    if invalid:
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+# Templates shadowed by an older one of the same language in another case (never served: the
+# lowest id wins); they would break the unique index
+_DUPLICATE_TEMPLATES = (
+    "FROM message_templates t WHERE EXISTS (SELECT 1 FROM message_templates o "
+    "WHERE o.bot_id = t.bot_id AND lower(o.language_code) = lower(t.language_code) AND o.id < t.id)"
+)
+
+
+def _rename_duplicate_templates() -> None:
+    """Keep shadowed templates (admins can review and delete them) under a unique language code."""
+    if not context.is_offline_mode():
+        for template_id, bot_id, language_code in op.get_bind().execute(
+            sa.text(f"SELECT t.id, t.bot_id, t.language_code {_DUPLICATE_TEMPLATES} ORDER BY t.id")
+        ):
+            logger.warning(
+                f"Template {template_id} of bot {bot_id} duplicates language '{language_code}' in another case: "
+                f"renamed to '{language_code}-duplicate-{template_id}'"
+            )
+    op.execute(
+        "UPDATE message_templates SET language_code = language_code || '-duplicate-' || id "
+        f"WHERE id IN (SELECT t.id {_DUPLICATE_TEMPLATES})"
+    )
+
+
+def upgrade() -> None:
+    _rename_duplicate_templates()
+
+    with op.get_context().autocommit_block():
+        _drop_invalid("ix_bot_users_recipients")
+        op.create_index(
+            'ix_bot_users_recipients', 'bot_users', ['source_bot_id', 'is_blocked', 'id'],
+            postgresql_include=['telegram_id'], postgresql_concurrently=True, if_not_exists=True,
+        )
+        _drop_invalid("uq_message_templates_bot_language")
+        op.create_index(
+            'uq_message_templates_bot_language', 'message_templates', ['bot_id', sa.text('lower(language_code)')],
+            unique=True, postgresql_concurrently=True, if_not_exists=True,
+        )
+        # Covered by the primary keys and by uq_bot_user_telegram_source; only slowed down writes
+        op.drop_index('ix_bot_users_id', table_name='bot_users', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_bot_users_telegram_id', table_name='bot_users', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_message_templates_id', table_name='message_templates', postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_message_templates_id', 'message_templates', ['id'], postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_bot_users_telegram_id', 'bot_users', ['telegram_id'], postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_bot_users_id', 'bot_users', ['id'], postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('uq_message_templates_bot_language', table_name='message_templates', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_bot_users_recipients', table_name='bot_users', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,28 @@
+"""broadcast lease: the process running a broadcast claims it
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 14:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('broadcasts', sa.Column('owner', sa.String(), nullable=True))
+    op.add_column('broadcasts', sa.Column('lease_until', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('broadcasts', 'lease_until')
+    op.drop_column('broadcasts', 'owner')
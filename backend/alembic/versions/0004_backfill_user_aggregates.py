@@ -0,0 +1,56 @@
+"""backfill user aggregates: summaries and daily rollups rebuilt from bot_users
+
+Formerly built on every startup when the tables were empty. They are rebuilt here from scratch,
+so databases where the startup backfill was skipped or ran while the tables were half filled
+end up consistent too; the tracking flush maintains them from then on. The tables are locked
+against writes (of a backend still running) for the duration.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 15:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "LOCK TABLE bot_users, bot_user_summaries, daily_users, daily_bot_users IN SHARE ROW EXCLUSIVE MODE"
+    )
+
+    # bot_users folded per telegram_id, the newest row wins (as app/services/user_summary.py does)
+    op.execute("DELETE FROM bot_user_summaries")
+    op.execute(
+        "INSERT INTO bot_user_summaries (telegram_id, bot_user_id, username, first_name, last_name, "
+        "language_code, is_blocked, first_seen_at, last_seen_at, source_bot_ids) "
+        "SELECT DISTINCT ON (telegram_id) telegram_id, id, username, first_name, last_name, "
+        "language_code, is_blocked, min(first_seen_at) OVER w, max(last_seen_at) OVER w, "
+        "array_agg(source_bot_id) OVER (w ORDER BY source_bot_id ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING) "
+        "FROM bot_users WINDOW w AS (PARTITION BY telegram_id) "
+        "ORDER BY telegram_id, last_seen_at DESC, id DESC"
+    )
+
+    op.execute("DELETE FROM daily_users")
+    op.execute(
+        "INSERT INTO daily_users (day, new_users) "
+        "SELECT first_seen_at::date, count(*) FROM bot_user_summaries GROUP BY 1"
+    )
+    op.execute("DELETE FROM daily_bot_users")
+    op.execute(
+        "INSERT INTO daily_bot_users (day, bot_id, new_users) "
+        "SELECT first_seen_at::date, source_bot_id, count(*) FROM bot_users GROUP BY 1, 2"
+    )
+
+
+def downgrade() -> None:
+    # Data only; the aggregates stay valid under the older revisions
+    pass
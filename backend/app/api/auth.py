@@ -1,17 +1,24 @@
 # backend/app/api/auth.py
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from ipaddress import ip_address, ip_network
 from datetime import datetime, timedelta, timezone
 from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
-from app.database import get_db
+from app.database import get_db, AsyncSessionLocal
 from app.config import settings
 from app.models.user import User
-from app.schemas.auth import Token, TokenData
+from app.schemas.auth import Token, TokenData, Principal
+from app.services.api_cache import api_cache
+from app.services.rate_limiter import AttemptLimiter
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -19,11 +26,57 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+# API cache namespace of authenticated users; invalidate after changing users
+PRINCIPALS = "principals"
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+# bcrypt burns 100-300 ms of CPU per call; it runs on a few dedicated threads (the bcrypt
+# package releases the GIL) so bots and other requests are not stalled by logins
+password_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+
+# Checked before any password is hashed: per client IP and per (username, client IP), so a
+# flood of wrong passwords from one address cannot lock the user out everywhere else
+login_limiter = AttemptLimiter("login", settings.LOGIN_ATTEMPT_WINDOW)
+
+async def verify_password(plain_password, hashed_password):
+    return await asyncio.get_running_loop().run_in_executor(password_executor, pwd_context.verify, plain_password, hashed_password)
+
+async def get_password_hash(password):
+    return await asyncio.get_running_loop().run_in_executor(password_executor, pwd_context.hash, password)
+
+@lru_cache
+def _trusted_networks(trusted_proxies: str) -> tuple:
+    return tuple(ip_network(proxy.strip(), strict=False) for proxy in trusted_proxies.split(",") if proxy.strip())
+
+def client_ip(request: Request) -> str:
+    # X-Real-IP as set by nginx, but only when the request comes from TRUSTED_PROXIES:
+    # anyone else could send any address and dodge the per-IP limit
+    peer = request.client.host if request.client else None
+    forwarded = request.headers.get("x-real-ip")
+    if peer and forwarded:
+        try:
+            if any(ip_address(peer) in network for network in _trusted_networks(settings.TRUSTED_PROXIES)):
+                return forwarded.strip()
+        except ValueError:
+            pass
+    return peer or "unknown"
+
+def username_attempts_key(username: str, ip: str) -> str:
+    return f"user:{username.lower()}:{ip}"
+
+async def check_login_attempts(request: Request, username: str):
+    ip = client_ip(request)
+    limits = (
+        (f"ip:{ip}", settings.LOGIN_MAX_ATTEMPTS_PER_IP),
+        (username_attempts_key(username, ip), settings.LOGIN_MAX_ATTEMPTS_PER_USERNAME),
+    )
+    for key, limit in limits:
+        attempts, retry_after = await login_limiter.hit(key)
+        if attempts > limit:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many login attempts, try again later",
+                headers={"Retry-After": str(retry_after)},
+            )
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
@@ -35,7 +88,13 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db: AsyncSession = Depends(get_db)):
+async def _load_principal(username: str) -> Principal | None:
+    # Own short session: cache hits never take a pooled connection
+    async with AsyncSessionLocal() as db:
+        user = await db.scalar(select(User).where(User.username == username))
+    return Principal(id=user.id, username=user.username) if user else None
+
+async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]) -> Principal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -49,16 +108,28 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db: As
         token_data = TokenData(username=username)
     except JWTError:
         raise credentials_exception
-    
-    result = await db.execute(select(User).where(User.username == token_data.username))
-    user = result.scalar_one_or_none()
-    if user is None:
+
+    expires_in = int(payload.get("exp", 0) - time.time())
+    ttl = min(settings.PRINCIPAL_CACHE_TTL, expires_in)
+    # PRINCIPAL_CACHE_TTL is the switch; with API_CACHE=off the entries stay in process memory
+    if ttl <= 0:
+        principal = await _load_principal(token_data.username)
+    else:
+        async def load() -> str:
+            loaded = await _load_principal(token_data.username)
+            return loaded.model_dump_json() if loaded else "null"
+
+        # Keyed by subject and expiry: a token never outlives its cache entry
+        _, body = await api_cache.get_or_compute(PRINCIPALS, f"{token_data.username}:{payload.get('exp')}", ttl, load)
+        principal = Principal.model_validate_json(body) if body != "null" else None
+    if principal is None:
         raise credentials_exception
-    return user
+    return principal
 
 @router.post("/login", response_model=Token)
-async def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()], db: AsyncSession = Depends(get_db)):
+async def login(request: Request, form_data: Annotated[OAuth2PasswordRequestForm, Depends()], db: AsyncSession = Depends(get_db)):
     try:
+        await check_login_attempts(request, form_data.username)
         result = await db.execute(select(User).where(User.username == form_data.username))
         user = result.scalar_one_or_none()
         
@@ -66,11 +137,12 @@ async def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()], db:
              # Auto-create admin from env vars on first login
             if form_data.username == settings.ADMIN_USERNAME and form_data.password == settings.ADMIN_PASSWORD:
                 try:
-                    hashed = get_password_hash(settings.ADMIN_PASSWORD)
+                    hashed = await get_password_hash(settings.ADMIN_PASSWORD)
                     new_admin = User(username=settings.ADMIN_USERNAME, password_hash=hashed)
                     db.add(new_admin)
                     await db.commit()
                     await db.refresh(new_admin)
+                    await api_cache.invalidate(PRINCIPALS)
                     user = new_admin
                 except Exception as e:
                     import traceback
@@ -84,13 +156,14 @@ async def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()], db:
                     headers={"WWW-Authenticate": "Bearer"},
                 )
         else:
-            if not verify_password(form_data.password, user.password_hash):
+            if not await verify_password(form_data.password, user.password_hash):
                  raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Incorrect username or password",
                     headers={"WWW-Authenticate": "Bearer"},
                 )
 
+        await login_limiter.reset(username_attempts_key(form_data.username, client_ip(request)))
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
             data={"sub": user.username}, expires_delta=access_token_expires
@@ -106,5 +179,5 @@ async def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()], db:
         raise HTTPException(status_code=500, detail=f"Login Error: {str(e)}")
 
 @router.get("/me", response_model=TokenData)
-async def read_users_me(current_user: Annotated[User, Depends(get_current_user)]):
+async def read_users_me(current_user: Annotated[Principal, Depends(get_current_user)]):
     return TokenData(username=current_user.username)
@@ -1,93 +1,132 @@
 # backend/app/api/bot_users.py
-from fastapi import APIRouter, Depends, HTTPException
+import base64
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from typing import Optional
+from sqlalchemy import select, func, text, tuple_
+from typing import Optional, Tuple
+from app.config import settings
 from app.database import get_db
 from app.models.bot_user import BotUser
+from app.models.bot_user_summary import BotUserSummary
 from app.models.bot import Bot as BotModel
 from app.schemas.bot_user import PaginatedUsers, GroupedBotUserResponse
 from app.api.auth import get_current_user
+from app.services.api_cache import api_cache, cached
+from app.services.user_summary import forget_user
 
 router = APIRouter(prefix="/users", tags=["users"])
 
+def encode_cursor(last_seen_at: datetime, telegram_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{last_seen_at.isoformat()}|{telegram_id}".encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        last_seen_at, telegram_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        last_seen_at, telegram_id = datetime.fromisoformat(last_seen_at), int(telegram_id)
+        # Values the query can't bind (naive timestamp, bigint) would fail in the database
+        if last_seen_at.tzinfo is not None or not 0 <= telegram_id < 2**63:
+            raise ValueError(cursor)
+        return last_seen_at, telegram_id
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def search_condition(term: str):
+    """A telegram_id looks the user up by primary key; anything else is a substring match (pg_trgm indexes)."""
+    if term.isascii() and term.isdigit() and int(term) < 2**63:
+        return BotUserSummary.telegram_id == int(term)
+    term = term.removeprefix("@")
+    pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    return (
+        BotUserSummary.username.ilike(pattern, escape="\\") |
+        BotUserSummary.first_name.ilike(pattern, escape="\\") |
+        BotUserSummary.last_name.ilike(pattern, escape="\\")
+    )
+
+async def count_users(db: AsyncSession, conditions: list) -> Tuple[int, bool]:
+    """Number of matching users and whether it is an estimate."""
+    if not conditions:
+        # Maintained by ANALYZE/autovacuum; exact counting isn't worth a full scan of a large table
+        estimate = await db.scalar(text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'bot_user_summaries'::regclass"))
+        if estimate is not None and estimate >= settings.USERS_EXACT_COUNT_LIMIT:
+            return estimate, True
+    return await db.scalar(select(func.count()).select_from(BotUserSummary).where(*conditions)), False
+
+def first_page(request: Request) -> bool:
+    """The listing as the dashboard opens it; searches and deeper pages aren't cached."""
+    params = request.query_params
+    return not params.get("search") and not params.get("cursor") and params.get("page", "1") == "1"
+
 @router.get("/", response_model=PaginatedUsers)
+@cached("users", ttl=settings.API_CACHE_USERS_TTL, when=first_page)
 async def get_users(
     page: int = 1,
     limit: int = 20,
     bot_id: Optional[int] = None,
     search: Optional[str] = None,
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    distinct_query = (
-        select(BotUser.telegram_id, func.max(BotUser.last_seen_at).label("max_seen"))
-        .join(BotUser.source_bot)
-    )
-    
+    """
+    Users (one entry per telegram_id) by last visit, newest first. Pass next_cursor of the
+    previous page as `cursor` to page through; `page` is kept for jumping to arbitrary pages.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    conditions = []
     if bot_id:
-        distinct_query = distinct_query.where(BotUser.source_bot_id == bot_id)
-        
-    if search:
-         distinct_query = distinct_query.where(
-            (BotUser.username.ilike(f"%{search}%")) | 
-            (BotUser.first_name.ilike(f"%{search}%"))
-        )
-        
-    distinct_query = distinct_query.group_by(BotUser.telegram_id)
-    
-    # Count total unique users
-    total_query = select(func.count()).select_from(distinct_query.subquery())
-    total = (await db.execute(total_query)).scalar_one()
+        conditions.append(BotUserSummary.source_bot_ids.contains([bot_id]))
+    if search and search.strip():
+        conditions.append(search_condition(search.strip()))
 
-    # Pagination on unique users
-    distinct_query = distinct_query.order_by(func.max(BotUser.last_seen_at).desc())
-    distinct_query = distinct_query.offset((page - 1) * limit).limit(limit)
-    
-    result = await db.execute(distinct_query)
-    rows = result.all()
-    target_ids = [r[0] for r in rows]
-    
-    if not target_ids:
-        return {"users": [], "total": 0}
+    total, estimated = await count_users(db, conditions)
 
-    # Fetch details for these IDs and aggregate sources
-    details_query = (
-        select(BotUser, BotModel.name.label("bot_name"))
-        .join(BotModel, BotUser.source_bot_id == BotModel.id)
-        .where(BotUser.telegram_id.in_(target_ids))
-        .order_by(BotUser.last_seen_at.desc())
+    query = (
+        select(BotUserSummary)
+        .where(*conditions)
+        .order_by(BotUserSummary.last_seen_at.desc(), BotUserSummary.telegram_id.desc())
+        .limit(limit)
     )
-    
-    details_result = await db.execute(details_query)
-    details = details_result.all()
-    
-    grouped = {}
-    for user, bot_name in details:
-        tid = user.telegram_id
-        if tid not in grouped:
-            grouped[tid] = {
-                "id": user.id,
-                "telegram_id": tid,
-                "username": user.username,
-                "first_name": user.first_name,
-                "last_name": user.last_name,
-                "language_code": user.language_code,
-                "first_seen_at": user.first_seen_at,
-                "last_seen_at": user.last_seen_at,
-                "is_blocked": user.is_blocked,
-                "sources": []
-            }
-        
-        if bot_name and bot_name not in grouped[tid]["sources"]:
-            grouped[tid]["sources"].append(bot_name)
-        
-    final_users = []
-    for tid in target_ids:
-        if tid in grouped:
-            final_users.append(grouped[tid])
+    if after:
+        query = query.where(tuple_(BotUserSummary.last_seen_at, BotUserSummary.telegram_id) < after)
+    elif page > 1:
+        query = query.offset((page - 1) * limit)
+    summaries = (await db.scalars(query)).all()
+
+    if not summaries:
+        return {"users": [], "total": total, "total_estimated": estimated}
+
+    # Source bot names, in the bots' display order
+    bot_ids = {source_id for summary in summaries for source_id in summary.source_bot_ids}
+    bots = (await db.execute(
+        select(BotModel.id, BotModel.name)
+        .where(BotModel.id.in_(bot_ids))
+        .order_by(BotModel.display_order, BotModel.id)
+    )).all()
+
+    users = []
+    for summary in summaries:
+        sources = set(summary.source_bot_ids)
+        users.append({
+            "id": summary.bot_user_id,
+            "telegram_id": summary.telegram_id,
+            "username": summary.username,
+            "first_name": summary.first_name,
+            "last_name": summary.last_name,
+            "language_code": summary.language_code,
+            "first_seen_at": summary.first_seen_at,
+            "last_seen_at": summary.last_seen_at,
+            "is_blocked": summary.is_blocked,
+            "sources": [name for source_id, name in bots if source_id in sources],
+        })
 
-    return {"users": final_users, "total": total}
+    last = summaries[-1]
+    return {
+        "users": users,
+        "total": total,
+        "total_estimated": estimated,
+        "next_cursor": encode_cursor(last.last_seen_at, last.telegram_id) if len(summaries) == limit else None,
+    }
 
 @router.delete("/{user_id}")
 async def delete_user(
@@ -100,5 +139,8 @@ async def delete_user(
         raise HTTPException(status_code=404, detail="User not found")
     
     await db.delete(user)
+    await db.flush()
+    await forget_user(db, user)
     await db.commit()
+    await api_cache.invalidate("users", "stats")
     return {"message": "User deleted"}
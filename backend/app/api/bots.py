@@ -1,27 +1,30 @@
 # backend/app/api/bots.py
-import time
 import logging
 from typing import List
-from io import BytesIO
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
 from app.database import get_db
 from app.models.bot import Bot
 from app.schemas.bot import BotCreate, BotUpdate, BotResponse
 from app.api.auth import get_current_user
+from app.bot.factory import create_bot as create_aiogram_bot
+from app.bot.tracking import tracking_buffer
+from app.config import settings
+from app.services.api_cache import api_cache, cached, etag_matches
+from app.services.avatar_cache import avatar_cache, AvatarUnavailable, BotNotFound
 from app.services.bot_manager import bot_manager
+from app.services.user_summary import forget_bot
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/bots", tags=["bots"])
 
-# Simple in-memory avatar cache: {bot_id: (bytes, timestamp)}
-_avatar_cache: dict[int, tuple[bytes, float]] = {}
-_AVATAR_CACHE_TTL = 600  # 10 minutes
+# Cached dashboard responses that show bots: the list, per-bot stats and user sources
+BOT_CACHE_NAMESPACES = ("bots", "stats", "users")
 
 @router.get("/", response_model=List[BotResponse])
+@cached("bots", ttl=settings.API_CACHE_BOTS_TTL)
 async def get_bots(
     db: AsyncSession = Depends(get_db),
     current_user = Depends(get_current_user)
@@ -42,12 +45,10 @@ async def create_bot(
 
     # Validate token with Telegram API
     try:
-        from aiogram import Bot as AiogramBot
         # Verify and get bot info
-        temp_bot = AiogramBot(token=bot_in.token)
+        temp_bot = create_aiogram_bot(bot_in.token)
         bot_info = await temp_bot.get_me()
         bot_username = bot_info.username
-        await temp_bot.session.close()
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Invalid token or Telegram API error: {e}")
 
@@ -59,6 +60,7 @@ async def create_bot(
     db.add(new_bot)
     await db.commit()
     await db.refresh(new_bot)
+    await api_cache.invalidate(*BOT_CACHE_NAMESPACES)
     return new_bot
 
 @router.get("/{id}", response_model=BotResponse)
@@ -92,6 +94,8 @@ async def update_bot(
 
     await db.commit()
     await db.refresh(bot)
+    await bot_manager.invalidate_bot(id)
+    await api_cache.invalidate(*BOT_CACHE_NAMESPACES)
     return bot
 
 @router.delete("/{id}")
@@ -105,11 +109,18 @@ async def delete_bot(
     if not bot:
         raise HTTPException(status_code=404, detail="Bot not found")
 
-    # Stop bot if running
+    # Stop bot if running; its tracked users must not be flushed after the row is gone
     await bot_manager.stop_bot(id)
+    await bot_manager.wait_updates(id)
+    await tracking_buffer.forget_bot(id)
 
     await db.delete(bot)
+    await db.flush()
+    await forget_bot(db, id)
     await db.commit()
+    await bot_manager.invalidate_bot(id)
+    await api_cache.invalidate(*BOT_CACHE_NAMESPACES)
+    await avatar_cache.forget(id)
     return {"ok": True}
 
 @router.post("/{id}/start")
@@ -126,6 +137,8 @@ async def start_bot_endpoint(
     bot.is_active = True
     await db.commit()
     await bot_manager.start_bot(id)
+    await bot_manager.invalidate_bot(id)
+    await api_cache.invalidate(*BOT_CACHE_NAMESPACES)
     return {"status": "started"}
 
 @router.post("/{id}/stop")
@@ -142,6 +155,8 @@ async def stop_bot_endpoint(
     bot.is_active = False
     await db.commit()
     await bot_manager.stop_bot(id)
+    await bot_manager.invalidate_bot(id)
+    await api_cache.invalidate(*BOT_CACHE_NAMESPACES)
     return {"status": "stopped"}
 
 @router.post("/reorder")
@@ -159,54 +174,26 @@ async def reorder_bots(
                  update(Bot).where(Bot.id == bot_id).values(display_order=order)
              )
     await db.commit()
+    await api_cache.invalidate(*BOT_CACHE_NAMESPACES)
     return {"status": "ok"}
 
 @router.get("/{id}/avatar")
-async def get_bot_avatar(
-    id: int,
-    db: AsyncSession = Depends(get_db),
-):
-    """Proxy bot avatar from Telegram. Cached for 10 minutes."""
-    # Check cache
-    cached = _avatar_cache.get(id)
-    if cached and time.time() - cached[1] < _AVATAR_CACHE_TTL:
-        return StreamingResponse(BytesIO(cached[0]), media_type="image/jpeg")
-
-    result = await db.execute(select(Bot).where(Bot.id == id))
-    bot = result.scalar_one_or_none()
-    if not bot:
-        raise HTTPException(status_code=404, detail="Bot not found")
-
+async def get_bot_avatar(id: int, request: Request):
+    """Proxy bot avatar from Telegram (see app/services/avatar_cache.py)."""
     try:
-        from aiogram import Bot as AiogramBot
-        import httpx
-
-        temp_bot = AiogramBot(token=bot.token)
-        bot_info = await temp_bot.get_me()
-        photos = await temp_bot.get_user_profile_photos(bot_info.id, limit=1)
-
-        if photos.total_count == 0:
-            await temp_bot.session.close()
-            raise HTTPException(status_code=404, detail="Bot has no avatar")
-
-        # Get the largest size of the first photo
-        file_id = photos.photos[0][-1].file_id
-        file = await temp_bot.get_file(file_id)
-        file_url = f"https://api.telegram.org/file/bot{bot.token}/{file.file_path}"
-        await temp_bot.session.close()
-
-        # Download
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(file_url, timeout=10)
-            resp.raise_for_status()
-            avatar_bytes = resp.content
-
-        # Cache
-        _avatar_cache[id] = (avatar_bytes, time.time())
-
-        return StreamingResponse(BytesIO(avatar_bytes), media_type="image/jpeg")
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Failed to fetch avatar for bot {id}: {e}")
+        avatar = await avatar_cache.get(id)
+    except BotNotFound:
+        raise HTTPException(status_code=404, detail="Bot not found")
+    except AvatarUnavailable:
         raise HTTPException(status_code=404, detail="Could not fetch avatar")
+
+    # Browsers and proxies reuse it for AVATAR_TTL, then may serve it stale while revalidating
+    headers = {
+        "ETag": avatar.etag,
+        "Cache-Control": f"public, max-age={settings.AVATAR_TTL}, stale-while-revalidate={settings.AVATAR_TTL * 6}",
+    }
+    if not avatar.body:
+        raise HTTPException(status_code=404, detail="Bot has no avatar", headers=headers)
+    if etag_matches(request.headers.get("if-none-match"), avatar.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(avatar.body, media_type="image/jpeg", headers=headers)
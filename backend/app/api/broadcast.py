@@ -1,13 +1,15 @@
 # backend/app/api/broadcast.py
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.database import get_db
 from app.models.broadcast import Broadcast
-from app.schemas.broadcast import BroadcastCreate, BroadcastResponse
+from app.models.media_file import MediaFile
+from app.schemas.broadcast import BroadcastCreate, BroadcastResponse, MediaUploadResponse
 from app.api.auth import get_current_user
-from app.services.broadcast_service import broadcast_service
+from app.services.broadcast_service import broadcast_service, MEDIA_METHODS
+from app.services.media_service import save_upload, guess_media_type, MediaTooLarge
 
 router = APIRouter(prefix="/broadcasts", tags=["broadcasts"])
 
@@ -19,19 +21,46 @@ async def get_broadcasts(
     result = await db.execute(select(Broadcast).order_by(Broadcast.created_at.desc()))
     return result.scalars().all()
 
+@router.post("/media", response_model=MediaUploadResponse)
+async def upload_media(
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """Upload broadcast media once; each bot uploads it to Telegram on its first send."""
+    try:
+        media = await save_upload(db, file)
+    except MediaTooLarge:
+        raise HTTPException(status_code=413, detail="File is too large")
+    return MediaUploadResponse(
+        media_hash=media.hash,
+        media_type=guess_media_type(media.content_type),
+        filename=media.filename,
+        size=media.size,
+    )
+
 @router.post("/", response_model=BroadcastResponse)
 async def create_broadcast(
     bc_in: BroadcastCreate,
     db: AsyncSession = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
+    if bc_in.media_hash:
+        if bc_in.media_type not in MEDIA_METHODS:
+            raise HTTPException(status_code=400, detail="media_type is required for uploaded media")
+        if not await db.get(MediaFile, bc_in.media_hash):
+            raise HTTPException(status_code=400, detail="Media not found")
+
     new_bc = Broadcast(
         title=bc_in.title,
         text=bc_in.text,
         media_type=bc_in.media_type,
         media_file_id=bc_in.media_file_id,
+        media_hash=bc_in.media_hash,
         buttons=bc_in.buttons,
         target_bots=bc_in.target_bots,
+        dedupe_recipients=bc_in.dedupe_recipients,
+        dedupe_policy=bc_in.dedupe_policy,
         status="draft"
     )
     db.add(new_bc)
@@ -90,4 +119,6 @@ async def cancel_broadcast(
 
     bc.status = "cancelled"
     await db.commit()
+
+    await broadcast_service.cancel(id)
     return {"status": "cancelled"}
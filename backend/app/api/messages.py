@@ -2,16 +2,20 @@
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, func
 from app.database import get_db
 from app.models.message_template import MessageTemplate
 from app.models.bot import Bot
 from app.schemas.message_template import MessageTemplateCreate, MessageTemplateUpdate, MessageTemplateResponse
 from app.api.auth import get_current_user
+from app.bot.responses import response_cache
+from app.config import settings
+from app.services.api_cache import api_cache, cached
 
 router = APIRouter(prefix="/bots/{bot_id}/messages", tags=["messages"])
 
 @router.get("/", response_model=List[MessageTemplateResponse])
+@cached("templates", ttl=settings.API_CACHE_TEMPLATES_TTL)
 async def get_bot_messages(
     bot_id: int,
     db: AsyncSession = Depends(get_db),
@@ -36,7 +40,7 @@ async def create_bot_message(
     existing = await db.execute(
         select(MessageTemplate)
         .where(MessageTemplate.bot_id == bot_id)
-        .where(MessageTemplate.language_code == msg_in.language_code)
+        .where(func.lower(MessageTemplate.language_code) == msg_in.language_code.lower())
     )
     if existing.scalar_one_or_none():
         raise HTTPException(status_code=400, detail=f"Template for language '{msg_in.language_code}' already exists")
@@ -50,6 +54,8 @@ async def create_bot_message(
     db.add(new_msg)
     await db.commit()
     await db.refresh(new_msg)
+    response_cache.invalidate(bot_id)
+    await api_cache.invalidate("templates")
     return new_msg
 
 @router.patch("/{msg_id}", response_model=MessageTemplateResponse)
@@ -76,6 +82,8 @@ async def update_bot_message(
 
     await db.commit()
     await db.refresh(msg)
+    response_cache.invalidate(bot_id)
+    await api_cache.invalidate("templates")
     return msg
 
 @router.delete("/{msg_id}")
@@ -96,4 +104,6 @@ async def delete_bot_message(
 
     await db.delete(msg)
     await db.commit()
+    response_cache.invalidate(bot_id)
+    await api_cache.invalidate("templates")
     return {"ok": True}
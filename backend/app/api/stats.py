@@ -1,71 +1,90 @@
 # backend/app/api/stats.py
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, text
+from sqlalchemy import select, func
 from datetime import datetime, timedelta, timezone
+from typing import Optional
+from app.config import settings
 from app.database import get_db
-from app.models.bot_user import BotUser
 from app.models.bot import Bot
-from app.schemas.stats import StatsOverview, DailyStat
+from app.models.daily_users import DailyUsers
+from app.models.daily_bot_users import DailyBotUsers
+from app.schemas.stats import StatsOverview, DailyStat, BotStat
 from app.api.auth import get_current_user
+from app.bot.tracking import tracking_buffer
+from app.services.api_cache import cached
 
 router = APIRouter(prefix="/stats", tags=["stats"])
 
+def rollup_totals(rollup):
+    """Users in total, first seen today and within the last 7 days (today included), from a daily rollup."""
+    today = datetime.now(timezone.utc).date()
+    return (
+        func.coalesce(func.sum(rollup.new_users), 0),
+        func.coalesce(func.sum(rollup.new_users).filter(rollup.day == today), 0),
+        func.coalesce(func.sum(rollup.new_users).filter(rollup.day > today - timedelta(days=7)), 0),
+    )
+
 @router.get("/overview", response_model=StatsOverview)
+@cached("stats", ttl=settings.API_CACHE_STATS_TTL)
 async def get_stats_overview(
     db: AsyncSession = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    now = datetime.now(timezone.utc).replace(tzinfo=None)
-    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    week_start = now - timedelta(days=7)
+    # Sums over the daily rollups: O(days) rather than O(bot_users)
+    total_users, new_today, new_week = (await db.execute(select(*rollup_totals(DailyUsers)))).one()
 
-    # Total users
-    total_users = await db.scalar(select(func.count(func.distinct(BotUser.telegram_id))))
-    
-    # New today
-    new_today = await db.scalar(
-        select(func.count(func.distinct(BotUser.telegram_id))).where(BotUser.first_seen_at >= today_start)
-    )
-    
-    # New this week
-    new_week = await db.scalar(
-        select(func.count(func.distinct(BotUser.telegram_id))).where(BotUser.first_seen_at >= week_start)
+    # Per-bot breakdown: users who started each bot
+    bots = await db.execute(
+        select(Bot.id, Bot.name, *rollup_totals(DailyBotUsers))
+        .outerjoin(DailyBotUsers, DailyBotUsers.bot_id == Bot.id)
+        .group_by(Bot.id)
+        .order_by(Bot.display_order, Bot.id)
     )
-    
+
     # Active bots
     active_bots = await db.scalar(
         select(func.count(Bot.id)).where(Bot.is_active == True)
     )
 
     return StatsOverview(
-        total_users=total_users or 0,
-        new_today=new_today or 0,
-        new_week=new_week or 0,
-        active_bots=active_bots or 0
+        total_users=total_users,
+        new_today=new_today,
+        new_week=new_week,
+        active_bots=active_bots or 0,
+        bots=[
+            BotStat(bot_id=bot_id, name=name, total_users=total, new_today=today, new_week=week)
+            for bot_id, name, total, today, week in bots
+        ]
     )
 
 @router.get("/daily")
+@cached("stats", ttl=settings.API_CACHE_STATS_TTL)
 async def get_daily_stats(
     days: int = 30,
+    bot_id: Optional[int] = None,
     db: AsyncSession = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    # Retrieve daily signups for the last N days
-    # PostgreSQL specific date_trunc
-    start_date = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=days)
-    
+    # New users per day over the last N days (UTC), of all bots or of one bot
+    start_date = datetime.now(timezone.utc).date() - timedelta(days=days)
+    rollup = DailyBotUsers if bot_id else DailyUsers
+
     stmt = (
-        select(
-            func.to_char(BotUser.first_seen_at, 'YYYY-MM-DD').label('date'),
-            func.count(func.distinct(BotUser.telegram_id)).label('count')
-        )
-        .where(BotUser.first_seen_at >= start_date)
-        .group_by(text('date')) # group by the formatted date string
-        .order_by('date')
+        select(rollup.day, rollup.new_users)
+        .where(rollup.day >= start_date, rollup.new_users > 0)
+        .order_by(rollup.day)
     )
-    
+    if bot_id:
+        stmt = stmt.where(DailyBotUsers.bot_id == bot_id)
+
     result = await db.execute(stmt)
-    rows = result.all()
-    
-    return [DailyStat(date=row.date, count=row.count) for row in rows]
+    return [DailyStat(date=day.isoformat(), count=count) for day, count in result]
+
+
+@router.get("/tracking")
+async def get_tracking_stats(
+    current_user = Depends(get_current_user)
+):
+    # Write-behind buffer metrics (flush latency, batch sizes) for tuning
+    return tracking_buffer.stats()
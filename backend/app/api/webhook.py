@@ -0,0 +1,30 @@
+# backend/app/api/webhook.py
+import hmac
+from typing import Annotated
+from fastapi import APIRouter, Header, HTTPException, Request
+from pydantic import ValidationError
+from app.services.bot_manager import bot_manager
+
+router = APIRouter(prefix="/webhook", tags=["webhook"])
+
+@router.post("/{bot_id}/{secret}")
+async def telegram_webhook(
+    bot_id: int,
+    secret: str,
+    request: Request,
+    x_telegram_bot_api_secret_token: Annotated[str | None, Header()] = None,
+):
+    # Telegram echoes the secret_token passed to setWebhook in this header (compared as bytes:
+    # compare_digest rejects non-ASCII str)
+    if x_telegram_bot_api_secret_token is not None and not hmac.compare_digest(
+        x_telegram_bot_api_secret_token.encode(), secret.encode()
+    ):
+        raise HTTPException(status_code=403, detail="Invalid secret token")
+
+    try:
+        fed = bot_manager.feed_webhook_update(bot_id, secret, await request.json())
+    except (ValueError, ValidationError):
+        raise HTTPException(status_code=400, detail="Invalid update")
+    if not fed:
+        raise HTTPException(status_code=404, detail="Bot not found")
+    return {"ok": True}
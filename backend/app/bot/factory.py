@@ -4,9 +4,11 @@ from aiogram.enums import ParseMode
 from aiogram.client.default import DefaultBotProperties
 from app.bot.handlers import create_main_router
 from app.bot.middlewares import TrackingMiddleware
+from app.bot.session import telegram_http
 
-def create_bot(token: str) -> Bot:
-    return Bot(token=token, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+def create_bot(token: str, parse_mode: str | None = ParseMode.HTML) -> Bot:
+    # All bots share the pooled Telegram HTTP session; never close bot.session directly
+    return Bot(token=token, session=telegram_http.session, default=DefaultBotProperties(parse_mode=parse_mode))
 
 def create_dispatcher() -> Dispatcher:
     dp = Dispatcher()
@@ -1,56 +1,24 @@
 # backend/app/bot/handlers.py
 from aiogram import Router, F
 from aiogram.filters import CommandStart
-from aiogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton
-from sqlalchemy import select, func
-from app.database import AsyncSessionLocal
-from app.models.bot import Bot as BotModel
-from app.models.message_template import MessageTemplate
+from aiogram.types import Message
+from app.bot.responses import response_cache
 
 
-async def cmd_start(message: Message):
-    bot_token = message.bot.token
-    language_code = (message.from_user.language_code or "").lower()
-    
-    async with AsyncSessionLocal() as db:
-        # Find bot by token
-        bot = await db.scalar(select(BotModel).where(BotModel.token == bot_token))
-        if not bot:
-            return
+async def cmd_start(message: Message, bot_id: int | None = None):
+    # bot_id is injected by the dispatcher (see BotManager / TrackingMiddleware)
+    if bot_id is None:
+        return
 
-        # Find template: exact language match → fallback "ru" → any available
-        template = await db.scalar(
-            select(MessageTemplate)
-            .where(MessageTemplate.bot_id == bot.id)
-            .where(func.lower(MessageTemplate.language_code) == language_code)
-        )
-        
-        if not template:
-            template = await db.scalar(
-                select(MessageTemplate)
-                .where(MessageTemplate.bot_id == bot.id)
-                .where(func.lower(MessageTemplate.language_code) == "ru")
-            )
-            
-        if not template:
-            template = await db.scalar(
-                select(MessageTemplate)
-                .where(MessageTemplate.bot_id == bot.id)
-                .limit(1)
-            )
+    language_code = (message.from_user.language_code or "").lower()
 
-        if not template:
-            await message.answer("Welcome!")
-            return
+    # Template: exact language match → fallback "ru" → any available (precompiled)
+    response = await response_cache.get(bot_id, language_code)
+    if not response:
+        await message.answer("Welcome!")
+        return
 
-        # Prepare inline keyboard
-        markup = None
-        if template.buttons:
-            markup = InlineKeyboardMarkup(inline_keyboard=[
-                [InlineKeyboardButton(text=b['text'], url=b['url'])] for b in template.buttons
-            ])
-            
-        await message.answer(template.text, reply_markup=markup)
+    await message.answer(response.text, reply_markup=response.reply_markup)
 
 def create_main_router() -> Router:
     router = Router()
@@ -3,12 +3,8 @@ from typing import Callable, Dict, Any, Awaitable
 import logging
 from aiogram import BaseMiddleware
 from aiogram.types import TelegramObject, Message, CallbackQuery
-from sqlalchemy import select
-from sqlalchemy.dialects.postgresql import insert
-from app.database import AsyncSessionLocal
-from app.models.bot import Bot as BotModel
-from app.models.bot_user import BotUser
-from datetime import datetime, timezone
+from app.bot.registry import bot_registry
+from app.bot.tracking import tracking_buffer
 
 logger = logging.getLogger(__name__)
 
@@ -34,43 +30,21 @@ class TrackingMiddleware(BaseMiddleware):
             logger.warning("TrackingMiddleware: No bot instance found in data")
             return await handler(event, data)
 
-        async with AsyncSessionLocal() as db:
-            bot_model = await db.scalar(select(BotModel).where(BotModel.token == bot.token))
+        # Resolved from dispatcher workflow data, or the in-memory registry as a fallback
+        bot_id = data.get("bot_id")
+        if bot_id is None:
+            bot_model = bot_registry.get_by_token(bot.token)
             if not bot_model:
                 logger.warning("TrackingMiddleware: Unknown bot")
                 return await handler(event, data)
+            bot_id = bot_model.id
+            data["bot_id"] = bot_id
 
-            logger.info(f"TrackingMiddleware: Bot ID {bot_model.id}, user {user.id}, language_code={user.language_code}")
+        logger.info(f"TrackingMiddleware: Bot ID {bot_id}, user {user.id}, language_code={user.language_code}")
 
-            # Upsert BotUser
-            try:
-                now = datetime.now(timezone.utc).replace(tzinfo=None)
-                stmt = insert(BotUser).values(
-                    telegram_id=user.id,
-                    username=user.username,
-                    first_name=user.first_name,
-                    last_name=user.last_name,
-                    language_code=user.language_code,
-                    source_bot_id=bot_model.id,
-                    first_seen_at=now,
-                    last_seen_at=now
-                ).on_conflict_do_update(
-                    constraint='uq_bot_user_telegram_source', 
-                    set_=dict(
-                        username=user.username,
-                        first_name=user.first_name,
-                        last_name=user.last_name,
-                        language_code=user.language_code,
-                        last_seen_at=now,
-                        is_blocked=False
-                    )
-                )
-                
-                await db.execute(stmt)
-                await db.commit()
-            except Exception as e:
-                logger.error(f"TrackingMiddleware Error: {e}")
-            
-            data["source_bot_id"] = bot_model.id
+        # Upsert BotUser asynchronously (coalesced and flushed in batches)
+        tracking_buffer.add(user, bot_id)
+
+        data["source_bot_id"] = bot_id
 
         return await handler(event, data)
@@ -0,0 +1,36 @@
+# backend/app/bot/registry.py
+from typing import Dict, Optional
+from app.models.bot import Bot as BotModel
+
+
+class BotRegistry:
+    """Process-wide map of running bots (token / id -> Bot row), filled by BotManager."""
+
+    def __init__(self):
+        self._by_id: Dict[int, BotModel] = {}
+        self._by_token: Dict[str, BotModel] = {}
+
+    def register(self, bot: BotModel):
+        self.unregister(bot.id)
+        self._by_id[bot.id] = bot
+        self._by_token[bot.token] = bot
+
+    def unregister(self, bot_id: int):
+        bot = self._by_id.pop(bot_id, None)
+        if bot:
+            self._by_token.pop(bot.token, None)
+
+    def get(self, bot_id: int) -> Optional[BotModel]:
+        return self._by_id.get(bot_id)
+
+    def get_by_token(self, token: str) -> Optional[BotModel]:
+        return self._by_token.get(token)
+
+    def __contains__(self, bot_id: int) -> bool:
+        return bot_id in self._by_id
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+
+bot_registry = BotRegistry()
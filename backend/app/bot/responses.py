@@ -0,0 +1,79 @@
+# backend/app/bot/responses.py
+import logging
+from typing import Dict, NamedTuple, Optional
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+from sqlalchemy import select
+from app.database import AsyncSessionLocal
+from app.models.message_template import MessageTemplate
+
+logger = logging.getLogger(__name__)
+
+FALLBACK_LANGUAGE = "ru"
+
+
+class StartResponse(NamedTuple):
+    text: str
+    reply_markup: Optional[InlineKeyboardMarkup]
+
+
+class BotResponses(NamedTuple):
+    by_language: Dict[str, StartResponse]
+    fallback: Optional[StartResponse]  # "ru" → any available, resolved in advance
+
+    def resolve(self, language_code: str) -> Optional[StartResponse]:
+        return self.by_language.get(language_code, self.fallback)
+
+
+def compile_template(template: MessageTemplate) -> StartResponse:
+    markup = None
+    if template.buttons:
+        markup = InlineKeyboardMarkup(inline_keyboard=[
+            [InlineKeyboardButton(text=b['text'], url=b['url'])] for b in template.buttons
+        ])
+    return StartResponse(template.text, markup)
+
+
+class StartResponseCache:
+    """Per-bot cache of ready-to-send /start responses for every template language."""
+
+    def __init__(self):
+        self._bots: Dict[int, BotResponses] = {}
+        # Bumped on invalidation so a warm-up racing with an edit never stores stale data
+        self._generations: Dict[int, int] = {}
+
+    async def get(self, bot_id: int, language_code: str) -> Optional[StartResponse]:
+        responses = self._bots.get(bot_id)
+        if responses is None:
+            responses = await self.warm(bot_id)
+        return responses.resolve(language_code)
+
+    async def warm(self, bot_id: int) -> BotResponses:
+        generation = self._generations.get(bot_id, 0)
+
+        async with AsyncSessionLocal() as db:
+            templates = (await db.scalars(
+                select(MessageTemplate)
+                .where(MessageTemplate.bot_id == bot_id)
+                .order_by(MessageTemplate.id)
+            )).all()
+
+        by_language: Dict[str, StartResponse] = {}
+        for template in templates:
+            by_language.setdefault((template.language_code or "").lower(), compile_template(template))
+
+        fallback = by_language.get(FALLBACK_LANGUAGE)
+        if fallback is None and templates:
+            fallback = by_language[(templates[0].language_code or "").lower()]
+
+        responses = BotResponses(by_language, fallback)
+        if self._generations.get(bot_id, 0) == generation:
+            self._bots[bot_id] = responses
+        logger.debug(f"StartResponseCache: bot {bot_id} warmed with {len(by_language)} languages")
+        return responses
+
+    def invalidate(self, bot_id: int):
+        self._generations[bot_id] = self._generations.get(bot_id, 0) + 1
+        self._bots.pop(bot_id, None)
+
+
+response_cache = StartResponseCache()
@@ -0,0 +1,71 @@
+# backend/app/bot/session.py
+import logging
+from typing import Optional
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer, PRODUCTION
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PooledAiohttpSession(AiohttpSession):
+    """AiohttpSession meant to be shared by many Bot instances (one connection pool for all tokens)."""
+
+    def __init__(self, limit: int, limit_per_host: int, keepalive_timeout: float, dns_cache_ttl: int, **kwargs):
+        super().__init__(limit=limit, **kwargs)
+        self._connector_init.update(
+            limit_per_host=limit_per_host,
+            keepalive_timeout=keepalive_timeout,
+            ttl_dns_cache=dns_cache_ttl,
+            use_dns_cache=True,
+        )
+
+
+class TelegramHTTP:
+    """
+    Owner of the Telegram HTTP sessions, opened lazily and closed by the app lifespan.
+
+    API calls (sends, getMe, files) share one bounded pool. Long-poll getUpdates
+    requests hold a connection for up to POLLING_TIMEOUT seconds each, so they use a
+    separate pool and can never starve the API pool.
+    """
+
+    def __init__(self):
+        self.api = TelegramAPIServer.from_base(settings.TELEGRAM_API_URL) if settings.TELEGRAM_API_URL else PRODUCTION
+        self._session: Optional[PooledAiohttpSession] = None
+        self._polling_session: Optional[PooledAiohttpSession] = None
+
+    @property
+    def session(self) -> PooledAiohttpSession:
+        if self._session is None:
+            self._session = PooledAiohttpSession(
+                limit=settings.TELEGRAM_CONNECTION_LIMIT,
+                limit_per_host=settings.TELEGRAM_CONNECTION_LIMIT_PER_HOST,
+                keepalive_timeout=settings.TELEGRAM_KEEPALIVE_TIMEOUT,
+                dns_cache_ttl=settings.TELEGRAM_DNS_CACHE_TTL,
+                api=self.api,
+            )
+        return self._session
+
+    @property
+    def polling_session(self) -> PooledAiohttpSession:
+        if self._polling_session is None:
+            self._polling_session = PooledAiohttpSession(
+                limit=0,  # one idle long-poll per bot, bounded by the number of bots
+                limit_per_host=0,
+                keepalive_timeout=settings.TELEGRAM_KEEPALIVE_TIMEOUT,
+                dns_cache_ttl=settings.TELEGRAM_DNS_CACHE_TTL,
+                api=self.api,
+            )
+        return self._polling_session
+
+    async def close(self):
+        for session in (self._session, self._polling_session):
+            if session is not None:
+                await session.close()
+        self._session = None
+        self._polling_session = None
+        logger.info("Telegram HTTP sessions closed")
+
+
+telegram_http = TelegramHTTP()
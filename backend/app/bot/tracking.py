@@ -0,0 +1,296 @@
+# backend/app/bot/tracking.py
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from collections import Counter
+from typing import Dict, Tuple, Any
+from aiogram.types import User
+from sqlalchemy import Boolean, case, func, literal_column, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.bot import Bot
+from app.models.bot_user import BotUser
+from app.models.bot_user_summary import BotUserSummary
+from app.models.daily_users import DailyUsers
+from app.models.daily_bot_users import DailyBotUsers
+
+logger = logging.getLogger(__name__)
+
+# asyncpg allows at most 32767 bind parameters per statement (8 per row here)
+_MAX_ROWS_PER_STATEMENT = 1000
+
+# Profile columns a summary takes from its most recently seen bot_users row
+_SUMMARY_PROFILE = ("bot_user_id", "username", "first_name", "last_name", "language_code", "is_blocked")
+
+# True in RETURNING of an upsert for rows that were inserted rather than updated
+_INSERTED = literal_column("xmax = 0", Boolean)
+
+
+def summary_rows(rows: list, ids: Dict[Tuple[int, int], int]) -> list:
+    """Fold upserted bot_users rows into one bot_user_summaries row per telegram_id."""
+    summaries: Dict[int, Dict[str, Any]] = {}
+    for row in rows:
+        bot_user_id = ids[(row["telegram_id"], row["source_bot_id"])]
+        summary = summaries.get(row["telegram_id"])
+        if summary is None:
+            summaries[row["telegram_id"]] = dict(
+                telegram_id=row["telegram_id"],
+                bot_user_id=bot_user_id,
+                username=row["username"],
+                first_name=row["first_name"],
+                last_name=row["last_name"],
+                language_code=row["language_code"],
+                is_blocked=False,
+                first_seen_at=row["first_seen_at"],
+                last_seen_at=row["last_seen_at"],
+                source_bot_ids=[row["source_bot_id"]],
+            )
+            continue
+        summary["source_bot_ids"].append(row["source_bot_id"])
+        summary["first_seen_at"] = min(summary["first_seen_at"], row["first_seen_at"])
+        if row["last_seen_at"] > summary["last_seen_at"]:
+            summary.update(
+                bot_user_id=bot_user_id, username=row["username"], first_name=row["first_name"],
+                last_name=row["last_name"], language_code=row["language_code"], last_seen_at=row["last_seen_at"],
+            )
+    # Rows are locked in key order, so concurrent flushes can't deadlock
+    return [summaries[telegram_id] for telegram_id in sorted(summaries)]
+
+
+def upsert_summaries(rows: list):
+    stmt = insert(BotUserSummary).values(rows)
+    newer = stmt.excluded.last_seen_at >= BotUserSummary.last_seen_at
+    return stmt.on_conflict_do_update(
+        index_elements=[BotUserSummary.telegram_id],
+        set_=dict(
+            **{column: case((newer, stmt.excluded[column]), else_=BotUserSummary.__table__.c[column]) for column in _SUMMARY_PROFILE},
+            first_seen_at=func.least(BotUserSummary.first_seen_at, stmt.excluded.first_seen_at),
+            last_seen_at=func.greatest(BotUserSummary.last_seen_at, stmt.excluded.last_seen_at),
+            source_bot_ids=literal_column(
+                "ARRAY(SELECT DISTINCT unnest(bot_user_summaries.source_bot_ids || excluded.source_bot_ids) ORDER BY 1)"
+            ),
+        )
+    )
+
+
+async def add_new_users(db, users: Counter, bot_users: Counter):
+    """
+    Add to the daily rollups: users[day] telegram_ids first seen by any bot, bot_users[(day, bot_id)]
+    users who started a bot. Negative counts take deleted users out.
+    """
+    rows = [dict(day=day, new_users=count) for day, count in sorted(users.items()) if count]
+    if rows:
+        stmt = insert(DailyUsers).values(rows)
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=[DailyUsers.day], set_=dict(new_users=DailyUsers.new_users + stmt.excluded.new_users)
+        ))
+    rows = [dict(day=day, bot_id=bot_id, new_users=count) for (day, bot_id), count in sorted(bot_users.items()) if count]
+    if rows:
+        stmt = insert(DailyBotUsers).values(rows)
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=[DailyBotUsers.day, DailyBotUsers.bot_id],
+            set_=dict(new_users=DailyBotUsers.new_users + stmt.excluded.new_users)
+        ))
+
+
+class TrackingBuffer:
+    """
+    Write-behind buffer that coalesces bot_users upserts and flushes them in batches. While
+    flushes fail (e.g. the database is down) at most `max_pending` rows are kept; rows of users
+    not pending yet are dropped beyond that and counted, they are tracked again on their next update.
+    """
+
+    def __init__(self, flush_size: int, flush_interval: float, max_pending: int = 100_000):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: Dict[Tuple[int, int], Dict[str, Any]] = {}
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+        # Tuning metrics
+        self.total_events = 0
+        self.total_rows = 0
+        self.total_flushes = 0
+        self.failed_flushes = 0
+        self.dropped_rows = 0
+        self.last_batch_size = 0
+        self.last_flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+
+    def add(self, user: User, source_bot_id: int):
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        key = (user.id, source_bot_id)
+        existing = self._pending.get(key)
+        self.total_events += 1
+        if existing is None and len(self._pending) >= self.max_pending:
+            self._drop(1)
+            return
+        self._pending[key] = dict(
+            telegram_id=user.id,
+            username=user.username,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            language_code=user.language_code,
+            source_bot_id=source_bot_id,
+            first_seen_at=existing["first_seen_at"] if existing else now,
+            last_seen_at=now,
+        )
+
+        if len(self._pending) >= self.flush_size:
+            self._wakeup.set()
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"TrackingBuffer flush loop error: {e}")
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self._pending:
+                return
+
+            batch, self._pending = self._pending, {}
+            rows = list(batch.values())
+            started = time.perf_counter()
+
+            try:
+                async with AsyncSessionLocal() as db:
+                    ids: Dict[Tuple[int, int], int] = {}
+                    new_bot_users: Counter = Counter()
+                    new_users: Counter = Counter()
+                    for i in range(0, len(rows), _MAX_ROWS_PER_STATEMENT):
+                        stmt = insert(BotUser).values(rows[i:i + _MAX_ROWS_PER_STATEMENT])
+                        stmt = stmt.on_conflict_do_update(
+                            constraint='uq_bot_user_telegram_source',
+                            set_=dict(
+                                username=stmt.excluded.username,
+                                first_name=stmt.excluded.first_name,
+                                last_name=stmt.excluded.last_name,
+                                language_code=stmt.excluded.language_code,
+                                last_seen_at=stmt.excluded.last_seen_at,
+                                is_blocked=False
+                            )
+                        ).returning(BotUser.id, BotUser.telegram_id, BotUser.source_bot_id, BotUser.first_seen_at, _INSERTED)
+                        for bot_user_id, telegram_id, source_bot_id, first_seen_at, inserted in await db.execute(stmt):
+                            ids[(telegram_id, source_bot_id)] = bot_user_id
+                            if inserted:
+                                new_bot_users[(first_seen_at.date(), source_bot_id)] += 1
+
+                    summaries = summary_rows(rows, ids)
+                    for i in range(0, len(summaries), _MAX_ROWS_PER_STATEMENT):
+                        stmt = upsert_summaries(summaries[i:i + _MAX_ROWS_PER_STATEMENT])
+                        for first_seen_at, inserted in await db.execute(stmt.returning(BotUserSummary.first_seen_at, _INSERTED)):
+                            if inserted:
+                                new_users[first_seen_at.date()] += 1
+
+                    await add_new_users(db, new_users, new_bot_users)
+                    await db.commit()
+            except asyncio.CancelledError:
+                # stop() cancelled the loop mid-flush; its final flush() writes the batch
+                self._requeue(batch)
+                raise
+            except IntegrityError as e:
+                # Rows of a deleted bot (bot_users.source_bot_id) would fail every later flush
+                self.failed_flushes += 1
+                logger.error(f"TrackingBuffer: failed to flush {len(rows)} rows: {e}")
+                self._requeue(await self._drop_deleted_bots(batch))
+                return
+            except Exception as e:
+                self.failed_flushes += 1
+                logger.error(f"TrackingBuffer: failed to flush {len(rows)} rows: {e}")
+                self._requeue(batch)
+                return
+
+            elapsed = time.perf_counter() - started
+            self.total_flushes += 1
+            self.total_rows += len(rows)
+            self.last_batch_size = len(rows)
+            self.last_flush_seconds = elapsed
+            self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+            logger.debug(f"TrackingBuffer: flushed {len(rows)} rows in {elapsed * 1000:.1f} ms")
+
+    async def forget_bot(self, bot_id: int):
+        """Drop the pending rows of a deleted bot; call after its in-flight updates are handled."""
+        # Under the flush lock, so no running flush still holds rows of the bot either
+        async with self._flush_lock:
+            self._pending = {key: row for key, row in self._pending.items() if row["source_bot_id"] != bot_id}
+
+    async def _drop_deleted_bots(self, batch: Dict[Tuple[int, int], Dict[str, Any]]) -> Dict[Tuple[int, int], Dict[str, Any]]:
+        bot_ids = {row["source_bot_id"] for row in batch.values()}
+        try:
+            async with AsyncSessionLocal() as db:
+                existing = set(await db.scalars(select(Bot.id).where(Bot.id.in_(bot_ids))))
+        except Exception as e:
+            logger.error(f"TrackingBuffer: could not check bots of a failed flush: {e}")
+            return batch
+        if deleted := bot_ids - existing:
+            logger.warning(f"TrackingBuffer: dropping pending rows of deleted bots {sorted(deleted)}")
+        return {key: row for key, row in batch.items() if row["source_bot_id"] in existing}
+
+    def _requeue(self, batch: Dict[Tuple[int, int], Dict[str, Any]]):
+        # Newer events collected during the failed flush win, but keep the earliest first_seen_at
+        dropped = 0
+        for key, row in batch.items():
+            newer = self._pending.get(key)
+            if newer:
+                newer["first_seen_at"] = min(newer["first_seen_at"], row["first_seen_at"])
+            elif len(self._pending) < self.max_pending:
+                self._pending[key] = row
+            else:
+                dropped += 1
+        if dropped:
+            self._drop(dropped)
+
+    def _drop(self, rows: int):
+        if not self.dropped_rows or self.dropped_rows // 10_000 != (self.dropped_rows + rows) // 10_000:
+            logger.warning(
+                f"TrackingBuffer: {self.max_pending} rows pending, dropping new ones "
+                f"({self.dropped_rows + rows} dropped so far)"
+            )
+        self.dropped_rows += rows
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "flush_size": self.flush_size,
+            "flush_interval": self.flush_interval,
+            "total_events": self.total_events,
+            "total_rows": self.total_rows,
+            "total_flushes": self.total_flushes,
+            "failed_flushes": self.failed_flushes,
+            "max_pending": self.max_pending,
+            "dropped_rows": self.dropped_rows,
+            "last_batch_size": self.last_batch_size,
+            "last_flush_ms": round(self.last_flush_seconds * 1000, 2),
+            "max_flush_ms": round(self.max_flush_seconds * 1000, 2),
+            "avg_batch_size": round(self.total_rows / self.total_flushes, 2) if self.total_flushes else 0,
+        }
+
+
+tracking_buffer = TrackingBuffer(settings.TRACKING_FLUSH_SIZE, settings.TRACKING_FLUSH_INTERVAL, settings.TRACKING_MAX_PENDING)
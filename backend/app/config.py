@@ -1,6 +1,7 @@
 # backend/app/config.py
 from pydantic_settings import BaseSettings
 from pydantic import ConfigDict
+from typing import Literal
 
 class Settings(BaseSettings):
     # Database
@@ -20,11 +21,76 @@ class Settings(BaseSettings):
     JWT_SECRET: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 # 24 hours
+    # Seconds an authenticated user is cached; 0 = off. Stored like API_CACHE responses, but not
+    # turned off by API_CACHE=off (then it is kept in process memory)
+    PRINCIPAL_CACHE_TTL: int = 60
+    PASSWORD_HASH_WORKERS: int = 2  # threads running bcrypt, off the event loop
+    LOGIN_ATTEMPT_WINDOW: int = 300  # seconds
+    LOGIN_MAX_ATTEMPTS_PER_IP: int = 30  # per window
+    LOGIN_MAX_ATTEMPTS_PER_USERNAME: int = 10  # per username from one client IP
+    # Peers (IPs or networks, comma separated) whose X-Real-IP header is trusted; by default
+    # loopback and the private networks docker compose puts nginx on
+    TRUSTED_PROXIES: str = "127.0.0.0/8,::1,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16"
 
     # Admin
     ADMIN_USERNAME: str
     ADMIN_PASSWORD: str
 
+    # Bots: "polling" (long-poll task per bot) or "webhook" (updates via /api/webhook/...)
+    BOT_MODE: Literal["polling", "webhook"] = "polling"
+    WEBHOOK_BASE_URL: str | None = None  # defaults to https://{DOMAIN}
+    WEBHOOK_SECRET: str | None = None  # defaults to JWT_SECRET
+    BOT_STARTUP_CONCURRENCY: int = 20  # bots started / stopped in parallel
+    BOT_STARTUP_TIMEOUT: float = 15.0  # seconds per bot
+    BOT_SHUTDOWN_TIMEOUT: float = 10.0  # seconds per bot
+
+    # Telegram HTTP connection pool (shared by all bots and services)
+    TELEGRAM_API_URL: str | None = None  # e.g. a local Bot API or benchmarks/fake_telegram.py server
+    TELEGRAM_CONNECTION_LIMIT: int = 200
+    TELEGRAM_CONNECTION_LIMIT_PER_HOST: int = 0  # 0 = no per-host limit
+    TELEGRAM_KEEPALIVE_TIMEOUT: float = 60.0  # seconds
+    TELEGRAM_DNS_CACHE_TTL: int = 300  # seconds
+
+    # Broadcasts: every target bot sends in parallel with its own limits
+    BROADCAST_BOT_RATE: float = 25.0  # messages/sec per bot (Telegram allows ~30)
+    BROADCAST_BOT_CONCURRENCY: int = 10  # in-flight requests per bot
+    BROADCAST_BATCH_SIZE: int = 200  # recipients per keyset batch / checkpoint / stream chunk
+    BROADCAST_PROGRESS_INTERVAL: float = 1.0  # seconds between sent/failed counter writes
+    BROADCAST_LEASE_TTL: int = 30  # seconds a dead process keeps a broadcast before another resumes it
+    # "local": sent by the API process; "redis": chunks go to a Redis stream for broadcast workers
+    BROADCAST_MODE: Literal["local", "redis"] = "local"
+    BROADCAST_STREAM: str = "broadcast:chunks"
+    BROADCAST_CONSUMER_GROUP: str = "broadcast-workers"
+    BROADCAST_WORKER_CONCURRENCY: int = 4  # chunks processed in parallel per worker process
+    BROADCAST_CLAIM_IDLE: int = 60  # seconds before a chunk of a dead worker is reclaimed
+
+    # Uploaded broadcast media (shared by the API and broadcast workers)
+    MEDIA_DIR: str = "/app/media"
+    MEDIA_MAX_SIZE: int = 50 * 1024 * 1024  # Bot API upload limit
+
+    # User tracking (write-behind buffer for bot_users upserts)
+    TRACKING_FLUSH_SIZE: int = 500
+    TRACKING_FLUSH_INTERVAL: float = 1.0  # seconds
+    # Rows (distinct bot/user pairs) kept while flushes fail; users seen beyond it are dropped
+    TRACKING_MAX_PENDING: int = 100_000
+
+    # Users listing: above this many users the unfiltered total is the planner's estimate
+    USERS_EXACT_COUNT_LIMIT: int = 100_000
+
+    # Dashboard response cache (Redis, falling back to process memory when Redis is unreachable)
+    API_CACHE: Literal["redis", "memory", "off"] = "redis"  # "off" leaves PRINCIPAL_CACHE_TTL on
+    API_CACHE_STATS_TTL: int = 60  # seconds
+    API_CACHE_BOTS_TTL: int = 30
+    API_CACHE_USERS_TTL: int = 15
+    API_CACHE_TEMPLATES_TTL: int = 300
+    API_CACHE_LOCK_TIMEOUT: float = 5.0  # seconds other processes wait for one computing a response
+    API_CACHE_MEMORY_ENTRIES: int = 1024
+
+    # Bot avatars proxied from Telegram (memory LRU in front of a disk cache)
+    AVATAR_TTL: int = 600  # seconds before an avatar is refreshed in the background
+    AVATAR_CACHE_DIR: str = "/app/media/avatars"
+    AVATAR_CACHE_MEMORY_BYTES: int = 32 * 1024 * 1024
+
     model_config = ConfigDict(env_file=".env", extra="ignore")
 
 settings = Settings()
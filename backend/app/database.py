@@ -1,8 +1,14 @@
 # backend/app/database.py
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
+from pathlib import Path
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
 from app.config import settings
 
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
 engine = create_async_engine(settings.DATABASE_URL, echo=False)
 
 AsyncSessionLocal = async_sessionmaker(
@@ -15,6 +21,25 @@ AsyncSessionLocal = async_sessionmaker(
 class Base(DeclarativeBase):
     pass
 
+class SchemaOutdatedError(RuntimeError):
+    pass
+
+def head_revision() -> str:
+    """Latest revision of the Alembic migrations (backend/alembic)."""
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "alembic"))
+    return ScriptDirectory.from_config(config).get_current_head()
+
+async def check_schema():
+    """Raise SchemaOutdatedError unless the database is migrated to the latest revision."""
+    async with engine.connect() as conn:
+        current = await conn.run_sync(lambda sync_conn: MigrationContext.configure(sync_conn).get_current_revision())
+    head = head_revision()
+    if current != head:
+        raise SchemaOutdatedError(
+            f"Database schema is at revision {current or 'none'}, expected {head}: run 'alembic upgrade head' in backend/"
+        )
+
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
@@ -1,30 +1,52 @@
 from contextlib import asynccontextmanager
 import asyncio
+import time
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.api import auth, bots, bot_users, messages, broadcast, stats
+from app.api import auth, bots, bot_users, messages, broadcast, stats, webhook
 from app.config import settings
-from app.database import engine, Base
+from app.database import SchemaOutdatedError, check_schema
 from app import models
 from app.services.bot_manager import bot_manager
+from app.services.broadcast_service import broadcast_service
+from app.bot.tracking import tracking_buffer
+from app.bot.session import telegram_http
+from app.redis_client import close_redis
 
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def log_phase(phase: str, started_at: float):
+    logger.info(f"Lifespan phase '{phase}' took {time.perf_counter() - started_at:.3f}s")
+
+async def start_bots():
+    phase_started = time.perf_counter()
+    try:
+        logger.info("Starting active bots...")
+        await bot_manager.start_all_active_bots()
+    except Exception as e:
+        logger.error(f"Error starting bots: {e}")
+        bot_manager.ready.set()
+    log_phase("bots startup", phase_started)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     MAX_RETRIES = 5
     RETRY_DELAY = 5
     
+    phase_started = time.perf_counter()
     for attempt in range(MAX_RETRIES):
         try:
             logger.info(f"Connecting to database (Attempt {attempt + 1}/{MAX_RETRIES})...")
-            async with engine.begin() as conn:
-                await conn.run_sync(Base.metadata.create_all)
-            logger.info("Database tables created.")
+            # The schema is managed by Alembic migrations (the migrate service in docker-compose)
+            await check_schema()
+            logger.info("Database schema is up to date.")
             break
+        except SchemaOutdatedError:
+            raise
         except Exception as e:
             logger.error(f"Database connection failed: {e}")
             if attempt < MAX_RETRIES - 1:
@@ -32,19 +54,36 @@ async def lifespan(app: FastAPI):
                 await asyncio.sleep(RETRY_DELAY)
             else:
                 logger.error("Could not connect to database after multiple attempts.")
-    
-    try:
-        logger.info("Starting active bots...")
-        await bot_manager.start_all_active_bots()
-        logger.info("Active bots started.")
-    except Exception as e:
-         logger.error(f"Error starting bots: {e}")
+    log_phase("database", phase_started)
+
+    await tracking_buffer.start()
+
+    # Bots start in parallel in the background; /api/health reports readiness
+    startup_task = asyncio.create_task(start_bots())
+
+    # Broadcasts interrupted by a restart (here or in another process) continue from their checkpoints
+    await broadcast_service.start()
 
-    
     yield
+
     # Shutdown: stop all bots gracefully
-    for bot_id in list(bot_manager.active_bots.keys()):
-        await bot_manager.stop_bot(bot_id)
+    phase_started = time.perf_counter()
+    if not startup_task.done():
+        startup_task.cancel()
+        try:
+            await startup_task
+        except asyncio.CancelledError:
+            pass
+    await bot_manager.stop_all_bots()
+    await broadcast_service.shutdown()
+    log_phase("bots shutdown", phase_started)
+
+    # Flush buffered user tracking after bots stop producing updates
+    phase_started = time.perf_counter()
+    await tracking_buffer.stop()
+    await telegram_http.close()
+    await close_redis()
+    log_phase("flush and cleanup", phase_started)
 
 app = FastAPI(lifespan=lifespan, title="BotForge API")
 
@@ -71,3 +110,17 @@ app.include_router(bot_users.router, prefix="/api")
 app.include_router(messages.router, prefix="/api")
 app.include_router(broadcast.router, prefix="/api")
 app.include_router(stats.router, prefix="/api")
+app.include_router(webhook.router, prefix="/api")
+
+@app.get("/api/health")
+async def health():
+    # Ready once every active bot is running or has failed to start
+    ready = bot_manager.ready.is_set()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "ready": ready,
+            "active_bots": len(bot_manager.active_bots),
+            "startup": bot_manager.startup_report,
+        },
+    )
@@ -4,3 +4,10 @@ from app.models.bot import Bot
 from app.models.bot_user import BotUser
 from app.models.message_template import MessageTemplate
 from app.models.broadcast import Broadcast
+from app.models.broadcast_checkpoint import BroadcastCheckpoint
+from app.models.broadcast_recipient import BroadcastRecipient
+from app.models.media_file import MediaFile
+from app.models.bot_media_file import BotMediaFile
+from app.models.bot_user_summary import BotUserSummary
+from app.models.daily_users import DailyUsers
+from app.models.daily_bot_users import DailyBotUsers
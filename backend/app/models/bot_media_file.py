@@ -0,0 +1,14 @@
+# backend/app/models/bot_media_file.py
+from sqlalchemy import String, Integer, DateTime, ForeignKey, func
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from app.database import Base
+
+class BotMediaFile(Base):
+    """Telegram file_id of an uploaded media file for one bot (file_ids are bot-scoped)."""
+    __tablename__ = "bot_media_files"
+
+    media_hash: Mapped[str] = mapped_column(String(64), ForeignKey("media_files.hash", ondelete="CASCADE"), primary_key=True)
+    bot_id: Mapped[int] = mapped_column(Integer, ForeignKey("bots.id", ondelete="CASCADE"), primary_key=True)
+    file_id: Mapped[str] = mapped_column(String, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
@@ -1,5 +1,5 @@
 # backend/app/models/bot_user.py
-from sqlalchemy import String, Integer, Boolean, DateTime, BigInteger, ForeignKey, UniqueConstraint, func
+from sqlalchemy import String, Integer, Boolean, DateTime, BigInteger, ForeignKey, UniqueConstraint, Index, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
 from app.database import Base
@@ -8,10 +8,12 @@ class BotUser(Base):
     __tablename__ = "bot_users"
     __table_args__ = (
         UniqueConstraint('telegram_id', 'source_bot_id', name='uq_bot_user_telegram_source'),
+        # Broadcast recipient scans (per bot, not blocked, in id order) without visiting the heap
+        Index('ix_bot_users_recipients', 'source_bot_id', 'is_blocked', 'id', postgresql_include=['telegram_id']),
     )
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    telegram_id: Mapped[int] = mapped_column(BigInteger, index=True, nullable=False)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    telegram_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
     username: Mapped[str] = mapped_column(String, nullable=True)
     first_name: Mapped[str] = mapped_column(String, nullable=True)
     last_name: Mapped[str] = mapped_column(String, nullable=True)
@@ -0,0 +1,36 @@
+# backend/app/models/bot_user_summary.py
+from sqlalchemy import String, Integer, Boolean, DateTime, BigInteger, Index
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from app.database import Base
+
+SEARCH_COLUMNS = ("username", "first_name", "last_name")
+
+class BotUserSummary(Base):
+    """
+    One row per telegram_id, aggregated over its bot_users rows: the profile of the most recently
+    seen row, first/last seen and the bots the user started. Maintained by the tracking flush.
+    """
+    __tablename__ = "bot_user_summaries"
+    __table_args__ = (
+        # Keyset pagination of the users listing
+        Index("ix_bot_user_summaries_seen", "last_seen_at", "telegram_id"),
+        Index("ix_bot_user_summaries_sources", "source_bot_ids", postgresql_using="gin"),
+        # Substring search (ILIKE '%term%') of the users listing
+        *(
+            Index(f"ix_bot_user_summaries_{column}_trgm", column, postgresql_using="gin", postgresql_ops={column: "gin_trgm_ops"})
+            for column in SEARCH_COLUMNS
+        ),
+    )
+
+    telegram_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    bot_user_id: Mapped[int] = mapped_column(Integer, index=True, nullable=False)  # most recently seen bot_users row
+    username: Mapped[str] = mapped_column(String, nullable=True)
+    first_name: Mapped[str] = mapped_column(String, nullable=True)
+    last_name: Mapped[str] = mapped_column(String, nullable=True)
+    language_code: Mapped[str] = mapped_column(String, nullable=True)
+    is_blocked: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    first_seen_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    last_seen_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    source_bot_ids: Mapped[list[int]] = mapped_column(ARRAY(Integer), nullable=False)
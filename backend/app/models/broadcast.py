@@ -1,5 +1,5 @@
 # backend/app/models/broadcast.py
-from sqlalchemy import String, Integer, Text, DateTime, JSON, func
+from sqlalchemy import String, Integer, Boolean, Text, DateTime, JSON, func
 from sqlalchemy.orm import Mapped, mapped_column
 from datetime import datetime
 from app.database import Base
@@ -12,8 +12,12 @@ class Broadcast(Base):
     text: Mapped[str] = mapped_column(Text, nullable=True)
     media_type: Mapped[str] = mapped_column(String, nullable=True) # photo, video, document, animation
     media_file_id: Mapped[str] = mapped_column(String, nullable=True)
+    media_hash: Mapped[str] = mapped_column(String(64), nullable=True) # uploaded MediaFile, sent instead of media_file_id
     buttons: Mapped[list] = mapped_column(JSON, nullable=True)
     target_bots: Mapped[list] = mapped_column(JSON, default=list) # list of bot_ids
+    # One message per telegram_id, sent through the bot chosen by dedupe_policy
+    dedupe_recipients: Mapped[bool] = mapped_column(Boolean, default=False, server_default="false", nullable=False)
+    dedupe_policy: Mapped[str] = mapped_column(String, default="last_seen", server_default="last_seen", nullable=False) # last_seen, first_seen, display_order
     
     status: Mapped[str] = mapped_column(String, default="draft") # draft, sending, completed, cancelled
     
@@ -24,3 +28,7 @@ class Broadcast(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
     started_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
     completed_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+
+    # Process sending (or publishing) the broadcast; others may take over after lease_until (UTC)
+    owner: Mapped[str] = mapped_column(String, nullable=True)
+    lease_until: Mapped[datetime] = mapped_column(DateTime, nullable=True)
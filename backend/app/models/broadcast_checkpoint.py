@@ -0,0 +1,23 @@
+# backend/app/models/broadcast_checkpoint.py
+from sqlalchemy import Integer, Boolean, DateTime, ForeignKey, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from app.database import Base
+
+class BroadcastCheckpoint(Base):
+    """Per-bot progress of a broadcast: keyset cursor over bot_users.id and counters."""
+    __tablename__ = "broadcast_checkpoints"
+    __table_args__ = (
+        UniqueConstraint('broadcast_id', 'bot_id', name='uq_broadcast_checkpoint_bot'),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    broadcast_id: Mapped[int] = mapped_column(Integer, ForeignKey("broadcasts.id", ondelete="CASCADE"), nullable=False)
+    bot_id: Mapped[int] = mapped_column(Integer, ForeignKey("bots.id", ondelete="CASCADE"), nullable=False)
+
+    last_user_id: Mapped[int] = mapped_column(Integer, default=0, nullable=False)  # last BotUser.id handled
+    sent_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    failed_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    is_done: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,11 @@
+# backend/app/models/broadcast_recipient.py
+from sqlalchemy import Integer, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+class BroadcastRecipient(Base):
+    """Recipient set of a deduplicated broadcast: one bot_users row per telegram_id."""
+    __tablename__ = "broadcast_recipients"
+
+    broadcast_id: Mapped[int] = mapped_column(Integer, ForeignKey("broadcasts.id", ondelete="CASCADE"), primary_key=True)
+    bot_user_id: Mapped[int] = mapped_column(Integer, ForeignKey("bot_users.id", ondelete="CASCADE"), primary_key=True)
@@ -0,0 +1,13 @@
+# backend/app/models/daily_bot_users.py
+from sqlalchemy import Date, Integer, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import date
+from app.database import Base
+
+class DailyBotUsers(Base):
+    """Daily rollup per bot: users who started the bot that day (UTC). Maintained by the tracking flush."""
+    __tablename__ = "daily_bot_users"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    bot_id: Mapped[int] = mapped_column(Integer, ForeignKey("bots.id", ondelete="CASCADE"), primary_key=True)
+    new_users: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
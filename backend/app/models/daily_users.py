@@ -0,0 +1,12 @@
+# backend/app/models/daily_users.py
+from sqlalchemy import Date, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import date
+from app.database import Base
+
+class DailyUsers(Base):
+    """Daily rollup: users (telegram_ids) first seen by any bot that day (UTC). Maintained by the tracking flush."""
+    __tablename__ = "daily_users"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    new_users: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
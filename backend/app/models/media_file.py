@@ -0,0 +1,15 @@
+# backend/app/models/media_file.py
+from sqlalchemy import String, Integer, DateTime, func
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from app.database import Base
+
+class MediaFile(Base):
+    """Uploaded broadcast media, stored once on disk under MEDIA_DIR/<hash>."""
+    __tablename__ = "media_files"
+
+    hash: Mapped[str] = mapped_column(String(64), primary_key=True)  # sha256 of the content
+    filename: Mapped[str] = mapped_column(String, nullable=False)
+    content_type: Mapped[str] = mapped_column(String, nullable=True)
+    size: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
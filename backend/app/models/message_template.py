@@ -1,13 +1,17 @@
 # backend/app/models/message_template.py
-from sqlalchemy import String, Integer, Text, DateTime, ForeignKey, JSON, func
+from sqlalchemy import String, Integer, Text, DateTime, ForeignKey, JSON, Index, func, text as sql_text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
 from app.database import Base
 
 class MessageTemplate(Base):
     __tablename__ = "message_templates"
+    __table_args__ = (
+        # One template per language; /start resolves languages case-insensitively
+        Index("uq_message_templates_bot_language", "bot_id", sql_text("lower(language_code)"), unique=True),
+    )
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
     bot_id: Mapped[int] = mapped_column(Integer, ForeignKey("bots.id"), nullable=False)
     language_code: Mapped[str] = mapped_column(String, default="ru", nullable=False)
     text: Mapped[str] = mapped_column(Text, nullable=False)
@@ -0,0 +1,18 @@
+# backend/app/redis_client.py
+from redis.asyncio import Redis
+from app.config import settings
+
+_redis: Redis | None = None
+
+def get_redis() -> Redis:
+    """Process-wide Redis client (connection pool is created lazily)."""
+    global _redis
+    if _redis is None:
+        _redis = Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _redis
+
+async def close_redis():
+    global _redis
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
@@ -7,3 +7,8 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     username: str | None = None
+
+class Principal(BaseModel):
+    """The authenticated admin of a request (cached, see get_current_user)."""
+    id: int
+    username: str
@@ -20,3 +20,5 @@ class GroupedBotUserResponse(BaseModel):
 class PaginatedUsers(BaseModel):
     users: list[GroupedBotUserResponse]
     total: int
+    total_estimated: bool = False
+    next_cursor: str | None = None
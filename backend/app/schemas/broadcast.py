@@ -1,19 +1,32 @@
 # backend/app/schemas/broadcast.py
 from pydantic import BaseModel
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Literal, Optional
+
+# Which bot reaches a user who started several of them: the one they used most recently,
+# the one they joined first, or the first bot in the dashboard order
+DedupePolicy = Literal["last_seen", "first_seen", "display_order"]
 
 class BroadcastBase(BaseModel):
     title: str
     text: str | None = None
     media_type: str | None = None
     media_file_id: str | None = None
+    media_hash: str | None = None  # from POST /broadcasts/media; uploaded once per bot
     buttons: list | None = None
     target_bots: List[int] = []
+    dedupe_recipients: bool = False
+    dedupe_policy: DedupePolicy = "last_seen"
 
 class BroadcastCreate(BroadcastBase):
     pass
 
+class MediaUploadResponse(BaseModel):
+    media_hash: str
+    media_type: str
+    filename: str
+    size: int
+
 class BroadcastResponse(BroadcastBase):
     id: int
     status: str
@@ -5,8 +5,16 @@ class DailyStat(BaseModel):
     date: str
     count: int
 
+class BotStat(BaseModel):
+    bot_id: int
+    name: str
+    total_users: int
+    new_today: int
+    new_week: int
+
 class StatsOverview(BaseModel):
     total_users: int
     new_today: int
     new_week: int
     active_bots: int
+    bots: list[BotStat] = []
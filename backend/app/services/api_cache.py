@@ -0,0 +1,241 @@
+# backend/app/services/api_cache.py
+"""
+Response cache for dashboard read endpoints.
+
+Responses are stored in Redis (shared by every API process), or in process memory when
+API_CACHE is "memory" or Redis is unreachable. Keys carry a per-namespace version: invalidate()
+bumps it, so every cached response of the namespace goes stale at once; bumps that could not
+reach Redis are replayed once it is back. Concurrent misses of one key are computed once (per
+process, and across processes through a short Redis lock).
+"""
+import asyncio
+import functools
+import hashlib
+import inspect
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Set, Tuple
+from urllib.parse import urlencode
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+from redis.exceptions import RedisError
+from app.config import settings
+from app.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "apicache"
+REDIS_RETRY_INTERVAL = 30  # seconds on the in-process store after a Redis error
+LOCK_POLL_INTERVAL = 0.05
+
+Entry = Tuple[str, str]  # (etag, JSON body)
+
+
+class _MemoryStore:
+    """Bounded in-process store with per-entry expiry; the least recently used entry is evicted first."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries: OrderedDict[str, Tuple[float, Entry]] = OrderedDict()
+        self.versions: Dict[str, int] = {}
+
+    def get(self, key: str) -> Entry | None:
+        item = self.entries.get(key)
+        if item is None:
+            return None
+        expires_at, entry = item
+        if expires_at < time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: Entry, ttl: int):
+        self.entries[key] = (time.monotonic() + ttl, entry)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+
+class ApiCache:
+    def __init__(self):
+        self.memory = _MemoryStore(settings.API_CACHE_MEMORY_ENTRIES)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._redis_down_until = 0.0
+        self._unsynced: Set[str] = set()  # namespaces invalidated while Redis was unreachable
+        self._sync_task: asyncio.Task | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return settings.API_CACHE != "off"
+
+    def _redis_available(self) -> bool:
+        return settings.API_CACHE == "redis" and time.monotonic() >= self._redis_down_until
+
+    async def _redis(self, command: Awaitable) -> Any:
+        """Run a Redis command; on failure switch to the in-process store for a while and return None."""
+        try:
+            return await command
+        except (RedisError, OSError) as e:
+            logger.warning(f"ApiCache: Redis unavailable, using in-process cache for {REDIS_RETRY_INTERVAL}s: {e}")
+            self._redis_down_until = time.monotonic() + REDIS_RETRY_INTERVAL
+            return None
+
+    async def _version(self, namespace: str) -> str:
+        if self._unsynced and self._redis_available():
+            await self._sync_versions()
+        if self._redis_available():
+            version = await self._redis(get_redis().get(f"{PREFIX}:{namespace}:version"))
+            if self._redis_available():
+                return f"r{version or 0}"
+        return f"m{self.memory.versions.get(namespace, 0)}"
+
+    async def invalidate(self, *namespaces: str):
+        """Drop every cached response of these namespaces; call after the change is committed."""
+        for namespace in namespaces:
+            self.memory.versions[namespace] = self.memory.versions.get(namespace, 0) + 1
+            if settings.API_CACHE != "redis":
+                continue
+            if self._redis_available() and await self._redis(get_redis().incr(f"{PREFIX}:{namespace}:version")) is not None:
+                continue
+            # Redis still holds the old responses: no process may read them once it is back
+            self._unsynced.add(namespace)
+        if self._unsynced and (self._sync_task is None or self._sync_task.done()):
+            self._sync_task = asyncio.create_task(self._sync_later())
+
+    async def _sync_versions(self):
+        """Replay the version bumps that missed Redis; stops at the first failure."""
+        for namespace in list(self._unsynced):
+            if not self._redis_available():
+                return
+            if await self._redis(get_redis().incr(f"{PREFIX}:{namespace}:version")) is not None:
+                self._unsynced.discard(namespace)
+
+    async def _sync_later(self):
+        # Other processes serve the stale Redis entries until the bumps land, even if this one gets no requests
+        while self._unsynced and settings.API_CACHE == "redis":
+            await asyncio.sleep(max(self._redis_down_until - time.monotonic(), 0))
+            await self._sync_versions()
+
+    async def get_or_compute(self, namespace: str, key: str, ttl: int, compute: Callable[[], Awaitable[str]]) -> Entry:
+        """The cached (etag, body) of `key`, computing the body with `compute` on a miss."""
+        full_key = f"{PREFIX}:{namespace}:{await self._version(namespace)}:{key}"
+        while True:
+            task = self._inflight.get(full_key)
+            if task is None:
+                # Computed with the first request's DB session, so it ends with that request
+                task = asyncio.create_task(self._load(full_key, ttl, compute))
+                self._inflight[full_key] = task
+                task.add_done_callback(lambda _: self._inflight.pop(full_key, None))
+                return await task
+            try:
+                return await asyncio.shield(task)
+            except asyncio.CancelledError:
+                # The first request went away mid-computation: take over unless we are cancelled too
+                if task.cancelled() and not asyncio.current_task().cancelling():
+                    if self._inflight.get(full_key) is task:
+                        del self._inflight[full_key]
+                    continue
+                raise
+
+    async def _load(self, key: str, ttl: int, compute: Callable[[], Awaitable[str]]) -> Entry:
+        entry = self.memory.get(key)
+        if entry:
+            return entry
+
+        use_redis = self._redis_available()
+        locked = False
+        if use_redis:
+            redis = get_redis()
+            if cached := await self._redis(redis.get(key)):
+                return _parse(cached)
+            lock = f"{key}:lock"
+            locked = await self._redis(redis.set(lock, 1, nx=True, px=int(settings.API_CACHE_LOCK_TIMEOUT * 1000)))
+            if not locked and self._redis_available():
+                # Another process is computing it; wait for its result, or compute it ourselves if it dies
+                deadline = time.monotonic() + settings.API_CACHE_LOCK_TIMEOUT
+                while time.monotonic() < deadline and self._redis_available():
+                    await asyncio.sleep(LOCK_POLL_INTERVAL)
+                    if cached := await self._redis(redis.get(key)):
+                        return _parse(cached)
+
+        try:
+            body = await compute()
+            entry = (f'"{hashlib.sha1(body.encode()).hexdigest()}"', body)
+            if use_redis and self._redis_available():
+                await self._redis(redis.set(key, f"{entry[0]}\n{body}", ex=ttl))
+            else:
+                self.memory.set(key, entry, ttl)
+            return entry
+        finally:
+            if locked:
+                await self._redis(redis.delete(lock))
+
+
+def _parse(value: str) -> Entry:
+    etag, body = value.split("\n", 1)
+    return etag, body
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    return any(tag.strip().removeprefix("W/") in (etag, "*") for tag in if_none_match.split(","))
+
+
+def cached(namespace: str, ttl: int, when: Callable[[Request], bool] | None = None):
+    """
+    Cache the JSON response of a GET route for `ttl` seconds under `namespace`, keyed by path and
+    query. Responses carry an ETag; a matching If-None-Match gets 304. `when` limits caching to
+    some requests (e.g. the first page). Place below the router decorator.
+    """
+    def decorator(endpoint):
+        signature = inspect.signature(endpoint)
+        request_param = next((p.name for p in signature.parameters.values() if p.annotation is Request), None)
+        route: APIRoute | None = None
+
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            nonlocal route
+            request: Request = kwargs[request_param] if request_param else kwargs.pop("cache_request")
+            if not api_cache.enabled or (when and not when(request)):
+                return await endpoint(*args, **kwargs)
+
+            if route is None:
+                route = next(r for r in request.app.routes if isinstance(r, APIRoute) and r.endpoint is wrapper)
+
+            async def render() -> str:
+                # Serialized like FastAPI would (response_model, exclude_* options)
+                content = await serialize_response(
+                    field=route.response_field,
+                    response_content=await endpoint(*args, **kwargs),
+                    include=route.response_model_include,
+                    exclude=route.response_model_exclude,
+                    by_alias=route.response_model_by_alias,
+                    exclude_unset=route.response_model_exclude_unset,
+                    exclude_defaults=route.response_model_exclude_defaults,
+                    exclude_none=route.response_model_exclude_none,
+                )
+                return JSONResponse(content).body.decode()
+
+            key = f"{request.url.path}?{urlencode(sorted(request.query_params.multi_items()))}"
+            etag, body = await api_cache.get_or_compute(namespace, key, ttl, render)
+            # Browsers store the response but revalidate it with If-None-Match every time
+            headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+            if etag_matches(request.headers.get("if-none-match"), etag):
+                return Response(status_code=304, headers=headers)
+            return Response(body, media_type="application/json", headers=headers)
+
+        if not request_param:
+            wrapper.__signature__ = signature.replace(parameters=[
+                *signature.parameters.values(),
+                inspect.Parameter("cache_request", inspect.Parameter.KEYWORD_ONLY, annotation=Request),
+            ])
+        return wrapper
+
+    return decorator
+
+
+api_cache = ApiCache()
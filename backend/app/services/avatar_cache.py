@@ -0,0 +1,204 @@
+# backend/app/services/avatar_cache.py
+"""
+Bot avatars proxied from Telegram, in two tiers: an LRU in process memory bounded by size, and
+files under AVATAR_CACHE_DIR that survive restarts (and are shared by API processes). Avatars
+older than AVATAR_TTL are still served while a single background fetch refreshes them;
+concurrent misses of one bot share one fetch. Forgetting a bot bumps its generation, so a fetch
+that was already running when the bot was deleted never writes its avatar back.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple
+from sqlalchemy import select
+from app.bot.factory import create_bot
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.bot import Bot
+
+logger = logging.getLogger(__name__)
+
+FETCH_TIMEOUT = 10  # seconds for the whole Telegram call chain
+RETRY_INTERVAL = 60  # seconds before a failed fetch is retried
+
+
+class BotNotFound(Exception):
+    pass
+
+
+class AvatarUnavailable(Exception):
+    pass
+
+
+class Avatar(NamedTuple):
+    body: bytes  # empty: the bot has no profile photo
+    etag: str
+    fetched_at: float
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() - self.fetched_at < settings.AVATAR_TTL
+
+
+def _avatar(body: bytes, fetched_at: float) -> Avatar:
+    return Avatar(body, f'"{hashlib.sha1(body).hexdigest()}"', fetched_at)
+
+
+class AvatarCache:
+    def __init__(self):
+        self._memory: OrderedDict[int, Avatar] = OrderedDict()
+        self._memory_bytes = 0
+        self._inflight: Dict[int, asyncio.Task] = {}
+        self._failed_at: Dict[int, float] = {}
+        self._generations: Dict[int, int] = {}  # bumped by forget()
+
+    async def get(self, bot_id: int) -> Avatar:
+        """
+        The avatar of a bot, possibly stale (a refresh is then started in the background).
+        Raises BotNotFound, or AvatarUnavailable if it was never fetched and Telegram fails.
+        """
+        avatar = self._memory_get(bot_id)
+        if avatar is None:
+            generation = self._generation(bot_id)
+            avatar = await asyncio.to_thread(self._disk_get, bot_id)
+            if self._generation(bot_id) != generation:
+                raise BotNotFound()
+            if avatar is not None:
+                self._memory_set(bot_id, avatar)
+
+        if avatar is None:
+            if self._recently_failed(bot_id):
+                raise AvatarUnavailable()
+            task = self._fetch(bot_id)
+            try:
+                return await asyncio.shield(task)
+            except asyncio.CancelledError:
+                if task.cancelled():  # cancelled by forget(), not by our caller
+                    raise BotNotFound()
+                raise
+        if not avatar.fresh and not self._recently_failed(bot_id):
+            self._fetch(bot_id)
+        return avatar
+
+    async def forget(self, bot_id: int):
+        """Drop a deleted bot's avatar from both tiers and cancel its fetch in flight."""
+        self._generations[bot_id] = self._generation(bot_id) + 1
+        task = self._inflight.pop(bot_id, None)
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+        avatar = self._memory.pop(bot_id, None)
+        if avatar is not None:
+            self._memory_bytes -= len(avatar.body)
+        self._failed_at.pop(bot_id, None)
+        await asyncio.to_thread(self._disk_delete, bot_id)
+
+    def _generation(self, bot_id: int) -> int:
+        return self._generations.get(bot_id, 0)
+
+    def _fetch(self, bot_id: int) -> asyncio.Task:
+        """The running fetch of this bot's avatar, started if there is none (single flight)."""
+        task = self._inflight.get(bot_id)
+        if task is None:
+            task = asyncio.create_task(self._refresh(bot_id))
+            self._inflight[bot_id] = task
+            # forget() may already have replaced it with a newer fetch
+            task.add_done_callback(lambda t: self._inflight.get(bot_id) is t and self._inflight.pop(bot_id))
+            # Background refreshes have nobody awaiting them; failures are logged by _refresh
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return task
+
+    def _recently_failed(self, bot_id: int) -> bool:
+        failed_at = self._failed_at.get(bot_id)
+        return failed_at is not None and time.monotonic() - failed_at < RETRY_INTERVAL
+
+    async def _refresh(self, bot_id: int) -> Avatar:
+        generation = self._generation(bot_id)
+        try:
+            body = await asyncio.wait_for(self._download(bot_id), FETCH_TIMEOUT)
+        except BotNotFound:
+            await self.forget(bot_id)
+            raise
+        except Exception as e:
+            logger.error(f"AvatarCache: failed to fetch avatar of bot {bot_id}: {e}")
+            self._failed_at[bot_id] = time.monotonic()
+            raise AvatarUnavailable() from e
+        if self._generation(bot_id) != generation:
+            raise BotNotFound()  # forgotten while downloading
+        avatar = _avatar(body, time.time())
+        self._failed_at.pop(bot_id, None)
+        self._memory_set(bot_id, avatar)
+        try:
+            await asyncio.to_thread(self._disk_set, bot_id, body, generation)
+        except OSError as e:
+            logger.warning(f"AvatarCache: could not store avatar of bot {bot_id}: {e}")
+        return avatar
+
+    async def _download(self, bot_id: int) -> bytes:
+        async with AsyncSessionLocal() as db:
+            token = await db.scalar(select(Bot.token).where(Bot.id == bot_id))
+        if token is None:
+            raise BotNotFound()
+
+        # The Telegram user id of a bot is the token prefix, so no getMe is needed
+        bot = create_bot(token)
+        photos = await bot.get_user_profile_photos(bot.id, limit=1)
+        if photos.total_count == 0:
+            return b""
+        # The largest size of the current photo
+        file = await bot.get_file(photos.photos[0][-1].file_id)
+        return (await bot.download_file(file.file_path, timeout=FETCH_TIMEOUT)).getvalue()
+
+    def _memory_get(self, bot_id: int) -> Avatar | None:
+        avatar = self._memory.get(bot_id)
+        if avatar is not None:
+            self._memory.move_to_end(bot_id)
+        return avatar
+
+    def _memory_set(self, bot_id: int, avatar: Avatar):
+        previous = self._memory.pop(bot_id, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous.body)
+        self._memory[bot_id] = avatar
+        self._memory_bytes += len(avatar.body)
+        while self._memory_bytes > settings.AVATAR_CACHE_MEMORY_BYTES and len(self._memory) > 1:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted.body)
+
+    def _path(self, bot_id: int) -> str:
+        return os.path.join(settings.AVATAR_CACHE_DIR, str(bot_id))
+
+    def _disk_get(self, bot_id: int) -> Avatar | None:
+        path = self._path(bot_id)
+        try:
+            with open(path, "rb") as f:
+                return _avatar(f.read(), os.fstat(f.fileno()).st_mtime)
+        except FileNotFoundError:
+            return None
+
+    def _disk_set(self, bot_id: int, body: bytes, generation: int):
+        os.makedirs(settings.AVATAR_CACHE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=settings.AVATAR_CACHE_DIR, prefix=".avatar-")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(body)
+            os.replace(tmp_path, self._path(bot_id))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        # forget() bumps the generation before its unlink starts, so either that unlink
+        # removes this file or this check sees the new generation
+        if self._generation(bot_id) != generation:
+            self._disk_delete(bot_id)
+
+    def _disk_delete(self, bot_id: int):
+        try:
+            os.unlink(self._path(bot_id))
+        except FileNotFoundError:
+            pass
+
+
+avatar_cache = AvatarCache()
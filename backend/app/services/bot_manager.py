@@ -1,74 +1,246 @@
 # backend/app/services/bot_manager.py
 import asyncio
+import hashlib
+import hmac
 import logging
-from typing import Dict, Tuple
+import time
+from typing import Any, Dict, Optional, Set, Tuple
 from aiogram import Bot, Dispatcher
+from aiogram.methods import GetUpdates
+from aiogram.types import Update
+from aiogram.utils.backoff import Backoff, BackoffConfig
 from sqlalchemy import select
+from app.config import settings
 from app.database import AsyncSessionLocal
 from app.models.bot import Bot as BotModel
 from app.bot.factory import create_bot, create_dispatcher
+from app.bot.registry import bot_registry
+from app.bot.responses import response_cache
+from app.bot.session import telegram_http
 
 logger = logging.getLogger(__name__)
 
+POLLING_TIMEOUT = 30
+POLLING_BACKOFF = BackoffConfig(min_delay=1.0, max_delay=5.0, factor=1.3, jitter=0.1)
+
 class BotManager:
     _instance = None
-    
+
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(BotManager, cls).__new__(cls)
-            cls._instance.active_bots: Dict[int, Tuple[asyncio.Task, Bot]] = {}
+            # bot_id -> (polling task or None in webhook mode, bot)
+            cls._instance.active_bots: Dict[int, Tuple[Optional[asyncio.Task], Bot]] = {}
+            # One dispatcher (router tree + middlewares) serves every bot
+            cls._instance.dispatcher: Dispatcher = create_dispatcher()
+            cls._instance._update_tasks: Set[asyncio.Task] = set()
+            cls._instance._starting: Set[int] = set()
+            # Set once every active bot has been started (or failed to start)
+            cls._instance.ready = asyncio.Event()
+            cls._instance.startup_report: Dict[str, Any] = {}
+            cls._instance.registry = bot_registry
+            cls._instance.responses = response_cache
         return cls._instance
 
-    async def start_bot(self, bot_id: int):
-        if bot_id in self.active_bots:
+    async def start_bot(self, bot_id: int) -> bool:
+        if bot_id in self.active_bots or bot_id in self._starting:
             logger.warning(f"Bot {bot_id} is already running")
-            return
+            return bot_id in self.active_bots
 
         async with AsyncSessionLocal() as db:
             bot_data = await db.scalar(select(BotModel).where(BotModel.id == bot_id))
-            if not bot_data or not bot_data.token:
-                logger.error(f"Bot {bot_id} not found or has no token")
-                return
+        if not bot_data or not bot_data.token:
+            logger.error(f"Bot {bot_id} not found or has no token")
+            return False
 
-            try:
-                bot_instance = create_bot(bot_data.token)
-                dp = create_dispatcher()
-                
-                bot_info = await bot_instance.get_me()
-                logger.info(f"Bot {bot_id} verified as @{bot_info.username}")
-
-                task = asyncio.create_task(
-                    dp.start_polling(bot_instance, handle_signals=False, polling_timeout=30)
+        return await self._start_bot(bot_data)
+
+    async def _start_bot(self, bot_data: BotModel) -> bool:
+        bot_id = bot_data.id
+        if bot_id in self.active_bots or bot_id in self._starting:
+            logger.warning(f"Bot {bot_id} is already running")
+            return bot_id in self.active_bots
+
+        self._starting.add(bot_id)
+        try:
+            bot_instance = create_bot(bot_data.token)
+
+            bot_info = await bot_instance.get_me()
+            logger.info(f"Bot {bot_id} verified as @{bot_info.username}")
+
+            # Precompile /start responses before the first update arrives
+            await self.responses.warm(bot_id)
+
+            task = None
+            if settings.BOT_MODE == "webhook":
+                await bot_instance.set_webhook(
+                    self.webhook_url(bot_data.id, bot_data.token),
+                    secret_token=self.webhook_secret(bot_data.id, bot_data.token),
+                    allowed_updates=self.dispatcher.resolve_used_update_types(),
                 )
-                
-                self.active_bots[bot_id] = (task, bot_instance)
-                logger.info(f"Bot {bot_id} polling started. Active bots: {list(self.active_bots.keys())}")
-                
-            except Exception as e:
-                logger.error(f"Failed to start bot {bot_id}: {e}")
-                import traceback
-                traceback.print_exc()
+            else:
+                # getUpdates is rejected while a webhook is set (e.g. after switching modes)
+                await bot_instance.delete_webhook()
+                task = asyncio.create_task(self._poll_updates(bot_id, bot_instance))
+
+            self.active_bots[bot_id] = (task, bot_instance)
+            self.registry.register(bot_data)
+            logger.info(f"Bot {bot_id} started ({settings.BOT_MODE}). Active bots: {len(self.active_bots)}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to start bot {bot_id}: {e}")
+            import traceback
+            traceback.print_exc()
+            return False
+        finally:
+            self._starting.discard(bot_id)
 
     async def stop_bot(self, bot_id: int):
         entry = self.active_bots.get(bot_id)
         if entry:
             task, bot_instance = entry
-            task.cancel()
-            try:
-                await task
-            except asyncio.CancelledError:
-                pass
-            # Close aiohttp session to prevent resource leak
-            await bot_instance.session.close()
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+            else:
+                try:
+                    await bot_instance.delete_webhook()
+                except Exception as e:
+                    logger.error(f"Failed to delete webhook for bot {bot_id}: {e}")
             del self.active_bots[bot_id]
+            self.registry.unregister(bot_id)
+            self.responses.invalidate(bot_id)
             logger.info(f"Bot {bot_id} stopped")
         else:
             logger.warning(f"Bot {bot_id} is not running")
 
-    async def start_all_active_bots(self):
+    async def _poll_updates(self, bot_id: int, bot_instance: Bot):
+        """Long-poll one bot and feed its updates into the shared dispatcher."""
+        backoff = Backoff(config=POLLING_BACKOFF)
+        get_updates = GetUpdates(timeout=POLLING_TIMEOUT, allowed_updates=self.dispatcher.resolve_used_update_types())
+        # Long polls go through their own pool so they never hold API connections
+        polling_session = telegram_http.polling_session
+        request_timeout = int(polling_session.timeout + POLLING_TIMEOUT)
+
+        while True:
+            try:
+                updates = await polling_session(bot_instance, get_updates, timeout=request_timeout)
+            except Exception as e:
+                logger.error(f"Bot {bot_id}: failed to fetch updates: {e}. Retrying in {backoff.next_delay:.1f}s")
+                await backoff.asleep()
+                continue
+
+            backoff.reset()
+            for update in updates:
+                get_updates.offset = update.update_id + 1
+                self._schedule_update(bot_id, bot_instance, update)
+
+    def _schedule_update(self, bot_id: int, bot_instance: Bot, update: Update):
+        task = asyncio.create_task(self._process_update(bot_id, bot_instance, update), name=f"update:{bot_id}")
+        self._update_tasks.add(task)
+        task.add_done_callback(self._update_tasks.discard)
+
+    async def wait_updates(self, bot_id: int):
+        """Wait for the in-flight updates of a (stopped) bot to be handled."""
+        tasks = [task for task in self._update_tasks if task.get_name() == f"update:{bot_id}"]
+        if tasks:
+            await asyncio.wait(tasks, timeout=settings.BOT_SHUTDOWN_TIMEOUT)
+
+    async def _process_update(self, bot_id: int, bot_instance: Bot, update: Update):
+        try:
+            await self.dispatcher.feed_update(bot_instance, update, bot_id=bot_id)
+        except Exception as e:
+            logger.error(f"Failed to process update {update.update_id} for bot {bot_id}: {e}")
+
+    @staticmethod
+    def webhook_secret(bot_id: int, token: str) -> str:
+        key = (settings.WEBHOOK_SECRET or settings.JWT_SECRET).encode()
+        return hmac.new(key, f"{bot_id}:{token}".encode(), hashlib.sha256).hexdigest()[:32]
+
+    def webhook_url(self, bot_id: int, token: str) -> str:
+        base_url = (settings.WEBHOOK_BASE_URL or f"https://{settings.DOMAIN}").rstrip("/")
+        return f"{base_url}/api/webhook/{bot_id}/{self.webhook_secret(bot_id, token)}"
+
+    def feed_webhook_update(self, bot_id: int, secret: str, payload: Dict[str, Any]) -> bool:
+        """Validate and schedule an incoming webhook update. Returns False for unknown bots or bad secrets."""
+        entry = self.active_bots.get(bot_id)
+        if not entry:
+            return False
+
+        task, bot_instance = entry
+        if not hmac.compare_digest(secret.encode(), self.webhook_secret(bot_id, bot_instance.token).encode()):
+            return False
+
+        update = Update.model_validate(payload, context={"bot": bot_instance})
+        # Answer Telegram right away; handlers run in the background
+        self._schedule_update(bot_id, bot_instance, update)
+        return True
+
+    async def invalidate_bot(self, bot_id: int):
+        """Refresh the registry entry of a bot after its row was changed or deleted."""
+        if bot_id not in self.active_bots:
+            self.registry.unregister(bot_id)
+            return
+
         async with AsyncSessionLocal() as db:
-            bots = await db.scalars(select(BotModel).where(BotModel.is_active == True))
-            for bot in bots:
-                await self.start_bot(bot.id)
+            bot_data = await db.scalar(select(BotModel).where(BotModel.id == bot_id))
+        if bot_data:
+            self.registry.register(bot_data)
+        else:
+            self.registry.unregister(bot_id)
+
+    async def start_all_active_bots(self) -> Dict[str, Any]:
+        """Start every active bot with bounded parallelism; each bot has its own timeout."""
+        started_at = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            bots = (await db.scalars(select(BotModel).where(BotModel.is_active == True))).all()
+
+        semaphore = asyncio.Semaphore(settings.BOT_STARTUP_CONCURRENCY)
+
+        async def start_one(bot_data: BotModel) -> bool:
+            async with semaphore:
+                try:
+                    return await asyncio.wait_for(self._start_bot(bot_data), timeout=settings.BOT_STARTUP_TIMEOUT)
+                except asyncio.TimeoutError:
+                    logger.error(f"Bot {bot_data.id} did not start within {settings.BOT_STARTUP_TIMEOUT}s")
+                    return False
+
+        results = await asyncio.gather(*(start_one(b) for b in bots), return_exceptions=True)
+        failed = [b.id for b, ok in zip(bots, results) if ok is not True]
+
+        self.startup_report = {
+            "total": len(bots),
+            "started": len(bots) - len(failed),
+            "failed": failed,
+            "seconds": round(time.perf_counter() - started_at, 3),
+        }
+        self.ready.set()
+        logger.info(f"Bots startup finished: {self.startup_report}")
+        return self.startup_report
+
+    async def stop_all_bots(self):
+        semaphore = asyncio.Semaphore(settings.BOT_STARTUP_CONCURRENCY)
+
+        async def stop_one(bot_id: int):
+            async with semaphore:
+                try:
+                    await asyncio.wait_for(self.stop_bot(bot_id), timeout=settings.BOT_SHUTDOWN_TIMEOUT)
+                except asyncio.TimeoutError:
+                    logger.error(f"Bot {bot_id} did not stop within {settings.BOT_SHUTDOWN_TIMEOUT}s")
+                    self.active_bots.pop(bot_id, None)
+                    self.registry.unregister(bot_id)
+                    self.responses.invalidate(bot_id)
+                except Exception as e:
+                    logger.error(f"Failed to stop bot {bot_id}: {e}")
+
+        await asyncio.gather(*(stop_one(bot_id) for bot_id in list(self.active_bots.keys())))
+
+        # Let in-flight handlers finish before the tracking buffer is drained
+        if self._update_tasks:
+            await asyncio.wait(list(self._update_tasks), timeout=settings.BOT_SHUTDOWN_TIMEOUT)
 
 bot_manager = BotManager()
@@ -1,22 +1,362 @@
 # backend/app/services/broadcast_service.py
 import asyncio
 import logging
-from datetime import datetime, timezone
-from sqlalchemy import select, update, func
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Set, Tuple
+from sqlalchemy import select, update, func, any_, bindparam, literal, or_, Integer
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert
 from aiogram import Bot
 from aiogram.exceptions import TelegramRetryAfter, TelegramForbiddenError
-from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+from aiogram.methods import TelegramMethod, SendMessage, SendPhoto, SendVideo, SendDocument, SendAnimation
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, InputFile
 
+from app.bot.factory import create_bot
+from app.config import settings
 from app.database import AsyncSessionLocal
 from app.models.broadcast import Broadcast
+from app.models.broadcast_checkpoint import BroadcastCheckpoint
+from app.models.broadcast_recipient import BroadcastRecipient
 from app.models.bot import Bot as BotModel
 from app.models.bot_user import BotUser
+from app.models.bot_user_summary import BotUserSummary
+from app.redis_client import get_redis
+from app.services.api_cache import api_cache
+from app.services.media_service import input_file, get_file_id, save_file_id, sent_file_id
+from app.services.rate_limiter import TokenBucket, RedisRateLimiter
 
 logger = logging.getLogger(__name__)
 
+def build_markup(buttons: list | None) -> InlineKeyboardMarkup | None:
+    if not buttons:
+        return None
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text=b['text'], url=b['url'])] for b in buttons
+    ])
+
+# media_type -> (method, file field)
+MEDIA_METHODS = {
+    "photo": (SendPhoto, "photo"),
+    "video": (SendVideo, "video"),
+    "document": (SendDocument, "document"),
+    "animation": (SendAnimation, "animation"),
+}
+
+def build_send_method(
+    broadcast: Broadcast, markup: InlineKeyboardMarkup | None, media: str | InputFile | None = None
+) -> TelegramMethod | None:
+    """
+    The broadcast message as one API method, built and validated once; each send only swaps chat_id.
+    The keyboard is serialized to JSON here, so requests don't re-serialize it for every recipient.
+    `media` (a file to upload) replaces broadcast.media_file_id.
+    """
+    media = media or broadcast.media_file_id
+    if broadcast.media_type in MEDIA_METHODS and media:
+        method_cls, file_field = MEDIA_METHODS[broadcast.media_type]
+        method = method_cls(chat_id=0, caption=broadcast.text, **{file_field: media})
+    elif broadcast.text:
+        method = SendMessage(chat_id=0, text=broadcast.text)
+    else:
+        return None
+
+    if markup:
+        # Not validated by model_copy; the session passes strings through as is
+        method = method.model_copy(update={"reply_markup": markup.model_dump_json(exclude_none=True)})
+    return method
+
+class Recipient(NamedTuple):
+    id: int  # BotUser.id
+    telegram_id: int
+
+# ORDER BY that picks the bot reaching a user of several bots (see DedupePolicy)
+DEDUPE_ORDER = {
+    "last_seen": (BotUser.last_seen_at.desc(),),
+    "first_seen": (BotUser.first_seen_at.asc(),),
+    "display_order": (BotModel.display_order.asc(), BotModel.id.asc()),
+}
+
+def recipient_filter(broadcast: Broadcast, bot_id: int) -> list:
+    conditions = [BotUser.source_bot_id == bot_id, BotUser.is_blocked == False]
+    if broadcast.dedupe_recipients:
+        conditions.append(BotUser.id.in_(
+            select(BroadcastRecipient.bot_user_id).where(BroadcastRecipient.broadcast_id == broadcast.id)
+        ))
+    return conditions
+
+def select_recipients(broadcast: Broadcast, bot_id: int):
+    """Recipients of one bot in keyset (BotUser.id) order, as plain rows rather than ORM entities."""
+    return (
+        select(BotUser.id, BotUser.telegram_id)
+        .where(*recipient_filter(broadcast, bot_id))
+        .order_by(BotUser.id)
+    )
+
+async def mark_blocked(db, user_ids: List[int]):
+    """Flag users who blocked the bot with one set-based UPDATE."""
+    if not user_ids:
+        return
+    ids = bindparam("ids", user_ids, type_=ARRAY(Integer))
+    await db.execute(update(BotUser).where(BotUser.id == any_(ids)).values(is_blocked=True))
+    # The users listing shows the status of the most recently seen row
+    await db.execute(update(BotUserSummary).where(BotUserSummary.bot_user_id == any_(ids)).values(is_blocked=True))
+
+class _BroadcastJob:
+    """Shared state of one running broadcast: message content and progress counters."""
+
+    def __init__(
+        self, broadcast: Broadcast, markup: InlineKeyboardMarkup | None,
+        upload: InputFile | None = None, sent: int = 0, failed: int = 0
+    ):
+        self.broadcast_id = broadcast.id
+        self.method = build_send_method(broadcast, markup, upload)
+        self.sent = sent
+        self.failed = failed
+        self._cancel_event = asyncio.Event()
+        # Uploaded media: per-bot senders by Telegram bot id (see _BotMedia)
+        self.media_hash = broadcast.media_hash if upload else None
+        self.file_field = MEDIA_METHODS[broadcast.media_type][1] if upload else None
+        self.bot_media: Dict[int, _BotMedia] = {}
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+MEDIA_UPLOAD_TIMEOUT = 120  # seconds a worker may hold the upload lock of a bot
+
+class _BotMedia:
+    """
+    Broadcast with uploaded media, for one bot. The first send uploads the file and stores the
+    file_id Telegram returns (BotMediaFile); every later send reuses that file_id. If the response
+    carries no file_id, every send uploads the file, in parallel.
+    """
+
+    def __init__(self, job: _BroadcastJob, bot_id: int, file_id: str | None):
+        self.job = job
+        self.bot_id = bot_id
+        self.method = self._with_file_id(file_id) if file_id else None
+        self._upload_lock = asyncio.Lock()
+        self._no_file_id = False
+
+    def _with_file_id(self, file_id: str) -> TelegramMethod:
+        return self.job.method.model_copy(update={self.job.file_field: file_id})
+
+    async def send(self, bot: Bot, chat_id: int):
+        if self.method is None and not self._no_file_id:
+            # Other senders of this bot wait for the upload instead of uploading too
+            async with self._upload_lock:
+                if self.method is None and not self._no_file_id:
+                    if settings.BROADCAST_MODE == "redis":
+                        # ...and so do chunks of this bot on other broadcast workers
+                        lock_name = f"media:{self.job.media_hash}:{self.bot_id}:upload"
+                        async with get_redis().lock(lock_name, timeout=MEDIA_UPLOAD_TIMEOUT):
+                            if await self._reload():
+                                return await bot(self.method.model_copy(update={"chat_id": chat_id}))
+                            return await self._upload(bot, chat_id)
+                    return await self._upload(bot, chat_id)
+        await bot((self.method or self.job.method).model_copy(update={"chat_id": chat_id}))
+
+    async def _upload(self, bot: Bot, chat_id: int):
+        message = await bot(self.job.method.model_copy(update={"chat_id": chat_id}))
+        await self._remember(sent_file_id(message))
+
+    async def _reload(self) -> bool:
+        async with AsyncSessionLocal() as db:
+            file_id = await get_file_id(db, self.job.media_hash, self.bot_id)
+        if file_id:
+            self.method = self._with_file_id(file_id)
+        return file_id is not None
+
+    async def _remember(self, file_id: str | None):
+        if not file_id:
+            logger.warning(
+                f"No file_id in the response to media {self.job.media_hash} of bot {self.bot_id}; "
+                f"it is uploaded to every recipient"
+            )
+            self._no_file_id = True
+            return
+        self.method = self._with_file_id(file_id)
+        try:
+            async with AsyncSessionLocal() as db:
+                await save_file_id(db, self.job.media_hash, self.bot_id, file_id)
+        except Exception as e:
+            logger.error(f"Failed to save file_id of media {self.job.media_hash} for bot {self.bot_id}: {e}")
+
+async def prepare_bot_media(job: _BroadcastJob, bot: Bot, bot_id: int):
+    """Load the cached file_id of the job's uploaded media for a bot (no-op without uploaded media)."""
+    if not job.media_hash or bot.id in job.bot_media:
+        return
+    async with AsyncSessionLocal() as db:
+        file_id = await get_file_id(db, job.media_hash, bot_id)
+    job.bot_media[bot.id] = _BotMedia(job, bot_id, file_id)
+
+CANCEL_CHANNEL = "broadcast:cancel"
+
+def chunks_left_key(broadcast_id: int) -> str:
+    return f"broadcast:{broadcast_id}:chunks_left"
+
+def publishing_key(broadcast_id: int) -> str:
+    return f"broadcast:{broadcast_id}:publishing"
+
+async def complete_if_drained(db, broadcast_id: int):
+    """Complete a stream broadcast once it is fully published and every chunk was processed."""
+    redis = get_redis()
+    left = int(await redis.get(chunks_left_key(broadcast_id)) or 0)
+    if left > 0 or await redis.exists(publishing_key(broadcast_id)):
+        return
+
+    # Both the publisher and the last worker may get here; only one update matches
+    result = await db.execute(
+        update(Broadcast)
+        .where(Broadcast.id == broadcast_id, Broadcast.status == "sending")
+        .values(status="completed", completed_at=datetime.now(timezone.utc).replace(tzinfo=None))
+    )
+    await db.commit()
+    await redis.delete(chunks_left_key(broadcast_id))
+    if result.rowcount:
+        logger.info(f"Broadcast {broadcast_id} completed")
+        # Users who blocked a bot are shown as blocked
+        await api_cache.invalidate("users")
+
+def _db_now():
+    # The database clock in UTC (like the other timestamps), so that hosts agree on lease expiry
+    return func.timezone("utc", func.now())
+
+def _lease_until():
+    return _db_now() + timedelta(seconds=settings.BROADCAST_LEASE_TTL)
+
+def _claimable():
+    return or_(Broadcast.owner.is_(None), Broadcast.lease_until < _db_now())
+
 class BroadcastService:
-    async def start_broadcast(self, broadcast_id: int):
-        asyncio.create_task(self._run_broadcast(broadcast_id))
+    def __init__(self):
+        self._tasks: Set[asyncio.Task] = set()
+        # Broadcasts sent by this process, by id
+        self._jobs: Dict[int, _BroadcastJob] = {}
+        # Broadcasts this process holds the lease of (see start_broadcast), by id
+        self._owned: Dict[int, asyncio.Task] = {}
+        self.owner = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+    async def start(self):
+        """Resume broadcasts left in "sending" now, and those of processes that go away later."""
+        task = asyncio.create_task(self._resume_loop())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def start_broadcast(self, broadcast_id: int) -> bool:
+        """
+        Run a broadcast in "sending" here. It is claimed first (an atomic UPDATE of its lease), so
+        that one process runs it; returns False if another process holds it.
+        """
+        if broadcast_id in self._owned or not await self._claim(broadcast_id):
+            return False
+        if settings.BROADCAST_MODE == "redis":
+            # Chunks are sent by broadcast workers (app/services/broadcast_worker.py)
+            task = asyncio.create_task(self._run_owned(broadcast_id, self._publish_broadcast))
+        else:
+            task = asyncio.create_task(self._run_owned(broadcast_id, self._run_broadcast))
+        self._owned[broadcast_id] = task
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        task.add_done_callback(lambda _: self._owned.pop(broadcast_id, None))
+        return True
+
+    async def resume_broadcasts(self) -> List[int]:
+        """
+        Restart broadcasts left in "sending" that no live process holds (e.g. after a deploy or a
+        crash); they continue from their checkpoints. Returns the ids resumed by this process.
+        """
+        async with AsyncSessionLocal() as db:
+            ids = (await db.scalars(
+                select(Broadcast.id).where(Broadcast.status == "sending", _claimable()).order_by(Broadcast.id)
+            )).all()
+        resumed = []
+        for broadcast_id in ids:
+            if await self.start_broadcast(broadcast_id):
+                logger.info(f"Resuming broadcast {broadcast_id}")
+                resumed.append(broadcast_id)
+        return resumed
+
+    async def _resume_loop(self):
+        while True:
+            try:
+                await self.resume_broadcasts()
+            except Exception as e:
+                logger.error(f"Error resuming broadcasts: {e}")
+            await asyncio.sleep(settings.BROADCAST_LEASE_TTL)
+
+    async def _claim(self, broadcast_id: int) -> bool:
+        async with AsyncSessionLocal() as db:
+            # Concurrent claims of one row are serialized by Postgres; only one matches the WHERE
+            claimed = await db.scalar(
+                update(Broadcast)
+                .where(Broadcast.id == broadcast_id, Broadcast.status == "sending", _claimable())
+                .values(owner=self.owner, lease_until=_lease_until())
+                .returning(Broadcast.id)
+            )
+            await db.commit()
+        return claimed is not None
+
+    async def _run_owned(self, broadcast_id: int, run: Callable[[int], Awaitable[None]]):
+        """Run a claimed broadcast while renewing its lease, and release it when done or stopped."""
+        lease = asyncio.create_task(self._renew_lease(broadcast_id, asyncio.current_task()))
+        try:
+            await run(broadcast_id)
+        finally:
+            lease.cancel()
+            try:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(
+                        update(Broadcast)
+                        .where(Broadcast.id == broadcast_id, Broadcast.owner == self.owner)
+                        .values(owner=None, lease_until=None)
+                    )
+                    await db.commit()
+            except Exception as e:
+                # It expires after BROADCAST_LEASE_TTL instead
+                logger.error(f"Broadcast {broadcast_id}: failed to release lease: {e}")
+
+    async def _renew_lease(self, broadcast_id: int, runner: asyncio.Task):
+        while True:
+            await asyncio.sleep(settings.BROADCAST_LEASE_TTL / 3)
+            try:
+                async with AsyncSessionLocal() as db:
+                    renewed = await db.scalar(
+                        update(Broadcast)
+                        .where(Broadcast.id == broadcast_id, Broadcast.owner == self.owner)
+                        .values(lease_until=_lease_until())
+                        .returning(Broadcast.id)
+                    )
+                    await db.commit()
+            except Exception as e:
+                logger.error(f"Broadcast {broadcast_id}: failed to renew lease: {e}")
+                continue
+            if renewed is None:
+                # Expired while this process was stalled, and another one resumed the broadcast
+                logger.warning(f"Broadcast {broadcast_id}: lease lost to another process, stopping")
+                runner.cancel()
+                return
+
+    async def cancel(self, broadcast_id: int):
+        """Stop a broadcast right away; call after its status was set to "cancelled"."""
+        job = self._jobs.get(broadcast_id)
+        if job:
+            job.cancel()
+        if settings.BROADCAST_MODE == "redis":
+            # Chunks in flight on broadcast workers
+            await get_redis().publish(CANCEL_CHANNEL, broadcast_id)
+
+    async def shutdown(self):
+        # Cancelled broadcasts stay in "sending", their leases are released and another process resumes them
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
 
     async def _run_broadcast(self, broadcast_id: int):
         async with AsyncSessionLocal() as db:
@@ -24,104 +364,283 @@ class BroadcastService:
             if not broadcast:
                 return
 
-            broadcast.started_at = datetime.now(timezone.utc).replace(tzinfo=None)
+            bots, checkpoints = await self._prepare(db, broadcast)
+            upload = await input_file(db, broadcast.media_hash) if broadcast.media_hash else None
+
+        job = _BroadcastJob(
+            broadcast, build_markup(broadcast.buttons), upload,
+            sent=sum(c.sent_count for c in checkpoints.values()),
+            failed=sum(c.failed_count for c in checkpoints.values()),
+        )
+        self._jobs[broadcast_id] = job
+        progress = asyncio.create_task(self._flush_progress_loop(job))
+        try:
+            # Every bot sends in parallel with its own rate limit: total time follows the largest audience
+            pending = [b for b in bots if not checkpoints[b.id].is_done]
+            results = await asyncio.gather(
+                *(self._broadcast_to_bot(job, broadcast, bot_model, checkpoints[bot_model.id].id) for bot_model in pending),
+                return_exceptions=True
+            )
+            for bot_model, result in zip(pending, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Broadcast {broadcast_id}: bot {bot_model.id} failed: {result}")
+        finally:
+            progress.cancel()
+            del self._jobs[broadcast_id]
 
-            target_bots = broadcast.target_bots
-            
-            stmt = select(BotModel)
-            if target_bots:
-                 stmt = stmt.where(BotModel.id.in_(target_bots))
-            
-            bots = (await db.scalars(stmt)).all()
-
-            # Count total users that will receive the broadcast
-            count_query = select(func.count(BotUser.id)).where(BotUser.is_blocked == False)
-            if target_bots:
-                count_query = count_query.where(BotUser.source_bot_id.in_([b.id for b in bots]))
-            broadcast.total_users = (await db.scalar(count_query)) or 0
+        # Final update; a cancelled broadcast keeps its status
+        async with AsyncSessionLocal() as db:
+            await self._flush_progress(db, job)
+            await db.execute(
+                update(Broadcast)
+                .where(Broadcast.id == broadcast_id, Broadcast.status == "sending")
+                .values(status="completed", completed_at=datetime.now(timezone.utc).replace(tzinfo=None))
+            )
             await db.commit()
-            
-            total_sent = 0
-            total_failed = 0
-            
-            # Prepare buttons
-            markup = None
-            if broadcast.buttons:
-                markup = InlineKeyboardMarkup(inline_keyboard=[
-                    [InlineKeyboardButton(text=b['text'], url=b['url'])] for b in broadcast.buttons
-                ])
+        # Users who blocked a bot are shown as blocked
+        await api_cache.invalidate("users")
+
+    async def _publish_broadcast(self, broadcast_id: int):
+        """
+        Split the audience of every target bot into id-range chunks and publish them to the
+        broadcast stream. In this mode the checkpoint cursor marks how far chunks were published.
+        """
+        redis = get_redis()
 
+        async with AsyncSessionLocal() as db:
+            broadcast = await db.scalar(select(Broadcast).where(Broadcast.id == broadcast_id))
+            if not broadcast:
+                return
+
+            bots, checkpoints = await self._prepare(db, broadcast)
+
+            # Workers can't complete the broadcast while chunks are still being published
+            await redis.set(publishing_key(broadcast_id), 1)
             for bot_model in bots:
-                try:
-                    bot = Bot(token=bot_model.token)
-                except Exception as e:
-                    logger.error(f"Invalid token for bot {bot_model.id}: {e}")
+                checkpoint = checkpoints[bot_model.id]
+                if checkpoint.is_done:
                     continue
 
-                users_result = await db.stream(
-                    select(BotUser).where(
-                        BotUser.source_bot_id == bot_model.id,
-                        BotUser.is_blocked == False
-                    )
-                )
-                
-                async for user in users_result.scalars():
-                    if broadcast.status == "cancelled":
-                        break
+                for upto_id in await self._chunk_boundaries(db, broadcast, bot_model.id, checkpoint.last_user_id):
+                    async with redis.pipeline(transaction=True) as pipe:
+                        pipe.incr(chunks_left_key(broadcast_id))
+                        pipe.xadd(settings.BROADCAST_STREAM, {
+                            "broadcast_id": broadcast_id,
+                            "bot_id": bot_model.id,
+                            "after_id": checkpoint.last_user_id,
+                            "upto_id": upto_id,
+                        })
+                        await pipe.execute()
+                    checkpoint.last_user_id = upto_id
+                    await db.commit()
+
+                checkpoint.is_done = True
+                await db.commit()
+
+            await redis.delete(publishing_key(broadcast_id))
+            logger.info(f"Broadcast {broadcast_id} published to {settings.BROADCAST_STREAM}")
+            await complete_if_drained(db, broadcast_id)
+
+    async def _chunk_boundaries(self, db, broadcast: Broadcast, bot_id: int, after_id: int) -> List[int]:
+        """Upper BotUser.id bound of every chunk after `after_id`, computed in a single index scan."""
+        numbered = (
+            select(
+                BotUser.id,
+                func.row_number().over(order_by=BotUser.id).label("rn"),
+                func.count().over().label("total")
+            )
+            .where(*recipient_filter(broadcast, bot_id), BotUser.id > after_id)
+            .subquery()
+        )
+        size = settings.BROADCAST_BATCH_SIZE
+        rows = (await db.execute(
+            select(numbered.c.id)
+            .where((numbered.c.rn % size == 0) | (numbered.c.rn == numbered.c.total))
+            .order_by(numbered.c.id)
+        )).all()
+        return [row.id for row in rows]
+
+    async def _prepare(self, db, broadcast: Broadcast) -> Tuple[List[BotModel], Dict[int, BroadcastCheckpoint]]:
+        """Resolve target bots, count recipients on the first run and load per-bot checkpoints."""
+        target_bots = broadcast.target_bots
 
-                    try:
-                        await self._send_message(bot, user.telegram_id, broadcast, markup)
-                        total_sent += 1
-                    except TelegramForbiddenError:
-                        user.is_blocked = True
-                        db.add(user)
-                        total_failed += 1
-                    except TelegramRetryAfter as e:
-                        logger.warning(f"Flood limit exceeded. Sleep {e.retry_after}")
-                        await asyncio.sleep(e.retry_after)
-                        try:
-                            await self._send_message(bot, user.telegram_id, broadcast, markup)
-                            total_sent += 1
-                        except Exception:
-                            total_failed += 1
-                    except Exception as e:
-                        logger.error(f"Failed to send to {user.telegram_id}: {e}")
-                        total_failed += 1
-                    
-                    # Periodic update every 10 users
-                    if (total_sent + total_failed) % 10 == 0:
-                        broadcast.sent_count = total_sent
-                        broadcast.failed_count = total_failed
+        stmt = select(BotModel)
+        if target_bots:
+            stmt = stmt.where(BotModel.id.in_(target_bots))
+
+        bots = (await db.scalars(stmt)).all()
+
+        if broadcast.started_at is None:
+            broadcast.started_at = datetime.now(timezone.utc).replace(tzinfo=None)
+
+            if broadcast.dedupe_recipients:
+                broadcast.total_users = await self._materialize_recipients(db, broadcast, bots)
+            else:
+                # Count total users that will receive the broadcast
+                count_query = select(func.count(BotUser.id)).where(BotUser.is_blocked == False)
+                if target_bots:
+                    count_query = count_query.where(BotUser.source_bot_id.in_([b.id for b in bots]))
+                broadcast.total_users = (await db.scalar(count_query)) or 0
+
+        # One checkpoint per bot; existing ones (from an interrupted run) are kept as is
+        if bots:
+            await db.execute(
+                insert(BroadcastCheckpoint)
+                .values([dict(broadcast_id=broadcast.id, bot_id=b.id) for b in bots])
+                .on_conflict_do_nothing(constraint='uq_broadcast_checkpoint_bot')
+            )
+        checkpoints: Dict[int, BroadcastCheckpoint] = {
+            c.bot_id: c for c in await db.scalars(
+                select(BroadcastCheckpoint).where(BroadcastCheckpoint.broadcast_id == broadcast.id)
+            )
+        }
+        await db.commit()
+        return bots, checkpoints
+
+    async def _materialize_recipients(self, db, broadcast: Broadcast, bots: List[BotModel]) -> int:
+        """Pick one bot_users row per telegram_id (DISTINCT ON) and store the set; returns its size."""
+        if not bots:
+            return 0
+        order = DEDUPE_ORDER.get(broadcast.dedupe_policy, DEDUPE_ORDER["last_seen"])
+        chosen = (
+            select(BotUser.id)
+            .join(BotModel, BotModel.id == BotUser.source_bot_id)
+            .where(BotUser.source_bot_id.in_([b.id for b in bots]), BotUser.is_blocked == False)
+            .distinct(BotUser.telegram_id)
+            .order_by(BotUser.telegram_id, *order, BotUser.id)
+            .subquery()
+        )
+        result = await db.execute(
+            insert(BroadcastRecipient).from_select(
+                ["broadcast_id", "bot_user_id"],
+                select(literal(broadcast.id), chosen.c.id)
+            )
+        )
+        return result.rowcount
+
+    async def _broadcast_to_bot(self, job: _BroadcastJob, broadcast: Broadcast, bot_model: BotModel, checkpoint_id: int):
+        try:
+            bot = create_bot(bot_model.token, parse_mode=None)
+        except Exception as e:
+            logger.error(f"Invalid token for bot {bot_model.id}: {e}")
+            return
+        await prepare_bot_media(job, bot, bot_model.id)
+
+        bucket = TokenBucket(settings.BROADCAST_BOT_RATE)
+        queue: asyncio.Queue = asyncio.Queue()
+        batch_counts = {"sent": 0, "failed": 0}
+        batch_blocked: List[int] = []
+
+        async def sender():
+            while True:
+                recipient = await queue.get()
+                try:
+                    delivered = await self._send_to_user(job, bot, bucket, recipient, batch_blocked)
+                    if delivered:
+                        job.sent += 1
+                        batch_counts["sent"] += 1
+                    elif delivered is False:
+                        job.failed += 1
+                        batch_counts["failed"] += 1
+                finally:
+                    queue.task_done()
+
+        senders = [asyncio.create_task(sender()) for _ in range(settings.BROADCAST_BOT_CONCURRENCY)]
+        try:
+            while not job.cancelled:
+                async with AsyncSessionLocal() as db:
+                    checkpoint = await db.get(BroadcastCheckpoint, checkpoint_id)
+                    # Keyset batch: recipients after the checkpoint cursor, in id order
+                    recipients = [Recipient(*row) for row in await db.execute(
+                        select_recipients(broadcast, bot_model.id)
+                        .where(BotUser.id > checkpoint.last_user_id)
+                        .limit(settings.BROADCAST_BATCH_SIZE)
+                    )]
+
+                    if not recipients:
+                        checkpoint.is_done = True
                         await db.commit()
-                        await db.refresh(broadcast)
-                        if broadcast.status == "cancelled":
-                            break
-                    
-                    await asyncio.sleep(0.05)  # Rate limiting
-
-                await bot.session.close()
-                if broadcast.status == "cancelled":
-                    break
-            
-            # Final update
-            broadcast.sent_count = total_sent
-            broadcast.failed_count = total_failed
-            if broadcast.status != "cancelled":
-                broadcast.status = "completed"
-                broadcast.completed_at = datetime.now(timezone.utc).replace(tzinfo=None)
-            
-            await db.commit()
+                        break
+
+                    # Release the connection while the batch is being sent
+                    await db.commit()
+
+                    batch_counts["sent"] = batch_counts["failed"] = 0
+                    batch_blocked.clear()
+                    for recipient in recipients:
+                        queue.put_nowait(recipient)
+                    await queue.join()
+
+                    # Persist blocked flags together with the advanced cursor
+                    await mark_blocked(db, batch_blocked)
+                    checkpoint.last_user_id = recipients[-1].id
+                    checkpoint.sent_count += batch_counts["sent"]
+                    checkpoint.failed_count += batch_counts["failed"]
+                    await db.commit()
+        finally:
+            for task in senders:
+                task.cancel()
+            await asyncio.gather(*senders, return_exceptions=True)
+
+    async def _send_to_user(
+        self, job: _BroadcastJob, bot: Bot, bucket: TokenBucket | RedisRateLimiter, recipient: Recipient, blocked: List[int]
+    ) -> bool | None:
+        """
+        Send the broadcast to one user. Returns None if the broadcast was cancelled meanwhile.
+        Users who blocked the bot are appended to `blocked` (see mark_blocked).
+        """
+        retried = False
+        while True:
+            if job.cancelled:
+                return None
+            await bucket.acquire()
+            # A cancel lands within one limiter tick
+            if job.cancelled:
+                return None
+            try:
+                await self._send_message(bot, recipient.telegram_id, job)
+                return True
+            except TelegramForbiddenError:
+                blocked.append(recipient.id)
+                return False
+            except TelegramRetryAfter as e:
+                if retried:
+                    logger.error(f"Failed to send to {recipient.telegram_id}: flood limit exceeded again")
+                    return False
+                logger.warning(f"Flood limit exceeded for bot {bot.id}. Sleep {e.retry_after}")
+                # Pause the whole bot, not just this sender; the retry goes through the same handling
+                await bucket.pause(e.retry_after)
+                retried = True
+            except Exception as e:
+                logger.error(f"Failed to send to {recipient.telegram_id}: {e}")
+                return False
+
+    async def _flush_progress_loop(self, job: _BroadcastJob):
+        while True:
+            await asyncio.sleep(settings.BROADCAST_PROGRESS_INTERVAL)
+            try:
+                async with AsyncSessionLocal() as db:
+                    await self._flush_progress(db, job)
+                    await db.commit()
+            except Exception as e:
+                logger.error(f"Broadcast {job.broadcast_id}: failed to save progress: {e}")
+
+    async def _flush_progress(self, db, job: _BroadcastJob):
+        """Persist in-memory counters; the returned status catches cancels made by other processes."""
+        status = await db.scalar(
+            update(Broadcast)
+            .where(Broadcast.id == job.broadcast_id)
+            .values(sent_count=job.sent, failed_count=job.failed)
+            .returning(Broadcast.status)
+        )
+        if status == "cancelled":
+            job.cancel()
 
-    async def _send_message(self, bot: Bot, chat_id: int, broadcast: Broadcast, markup):
-        if broadcast.media_type == "photo" and broadcast.media_file_id:
-            await bot.send_photo(chat_id, photo=broadcast.media_file_id, caption=broadcast.text, reply_markup=markup)
-        elif broadcast.media_type == "video" and broadcast.media_file_id:
-            await bot.send_video(chat_id, video=broadcast.media_file_id, caption=broadcast.text, reply_markup=markup)
-        elif broadcast.media_type == "document" and broadcast.media_file_id:
-            await bot.send_document(chat_id, document=broadcast.media_file_id, caption=broadcast.text, reply_markup=markup)
-        elif broadcast.media_type == "animation" and broadcast.media_file_id:
-             await bot.send_animation(chat_id, animation=broadcast.media_file_id, caption=broadcast.text, reply_markup=markup)
-        elif broadcast.text:
-            await bot.send_message(chat_id, text=broadcast.text, reply_markup=markup) 
+    async def _send_message(self, bot: Bot, chat_id: int, job: _BroadcastJob):
+        bot_media = job.bot_media.get(bot.id)
+        if bot_media:
+            await bot_media.send(bot, chat_id)
+        elif job.method:
+            await bot(job.method.model_copy(update={"chat_id": chat_id}))
 
 broadcast_service = BroadcastService()
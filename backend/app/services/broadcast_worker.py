@@ -0,0 +1,229 @@
+# backend/app/services/broadcast_worker.py
+"""
+Broadcast worker: consumes id-range chunks published by BroadcastService in redis mode.
+
+Run any number of workers with `python -m app.services.broadcast_worker`. Each chunk is
+delivered to one consumer of the group; chunks of a crashed worker are reclaimed by the
+others after BROADCAST_CLAIM_IDLE seconds, so a chunk may be sent twice but never lost.
+"""
+import asyncio
+import logging
+import os
+import signal
+import socket
+from typing import Dict, List, Set, Tuple
+from redis.exceptions import ResponseError
+from sqlalchemy import select, update
+
+from app.bot.factory import create_bot
+from app.bot.session import telegram_http
+from app.config import settings
+from app.database import AsyncSessionLocal, engine
+from app.models.broadcast import Broadcast
+from app.models.broadcast_checkpoint import BroadcastCheckpoint
+from app.models.bot import Bot as BotModel
+from app.models.bot_user import BotUser
+from app.redis_client import get_redis, close_redis
+from app.services.broadcast_service import (
+    broadcast_service, build_markup, chunks_left_key, complete_if_drained, mark_blocked, prepare_bot_media,
+    select_recipients, Recipient, _BroadcastJob, CANCEL_CHANNEL
+)
+from app.services.media_service import input_file
+from app.services.rate_limiter import RedisRateLimiter
+
+logger = logging.getLogger(__name__)
+
+READ_BLOCK_MS = 5000
+LISTEN_RETRY_MIN = 1  # seconds before resubscribing after the cancel channel dropped, doubled up to
+LISTEN_RETRY_MAX = 30
+
+class BroadcastWorker:
+    def __init__(self):
+        self.redis = get_redis()
+        self.stream = settings.BROADCAST_STREAM
+        self.group = settings.BROADCAST_CONSUMER_GROUP
+        self.name = f"{socket.gethostname()}-{os.getpid()}"
+        self.stopping = asyncio.Event()
+        # Chunks being sent right now
+        self._jobs: Set[_BroadcastJob] = set()
+
+    async def run(self):
+        try:
+            await self.redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+        logger.info(f"Broadcast worker {self.name} consuming {self.stream} ({settings.BROADCAST_WORKER_CONCURRENCY} slots)")
+        listener = asyncio.create_task(self._listen_cancels())
+        try:
+            await asyncio.gather(*(
+                self._consume(f"{self.name}-{n}") for n in range(settings.BROADCAST_WORKER_CONCURRENCY)
+            ))
+        finally:
+            listener.cancel()
+
+    async def _listen_cancels(self):
+        """
+        Stop chunks of a broadcast as soon as it is cancelled (see BroadcastService.cancel). When
+        Redis drops the subscription it is renewed with backoff, and cancels published meanwhile
+        are looked up in the database.
+        """
+        delay = LISTEN_RETRY_MIN
+        reconnecting = False
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(CANCEL_CHANNEL)
+                if reconnecting:
+                    logger.info(f"Broadcast worker {self.name} resubscribed to {CANCEL_CHANNEL}")
+                    await self._cancel_jobs_cancelled_meanwhile()
+                delay = LISTEN_RETRY_MIN
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    self._cancel_jobs(int(message["data"]))
+            except Exception as e:
+                logger.error(f"Broadcast worker {self.name}: cancel listener failed, retrying in {delay}s: {e}")
+            finally:
+                await pubsub.aclose()
+            reconnecting = True
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, LISTEN_RETRY_MAX)
+
+    def _cancel_jobs(self, broadcast_id: int):
+        for job in self._jobs:
+            if job.broadcast_id == broadcast_id:
+                job.cancel()
+
+    async def _cancel_jobs_cancelled_meanwhile(self):
+        broadcast_ids = {job.broadcast_id for job in self._jobs}
+        if not broadcast_ids:
+            return
+        async with AsyncSessionLocal() as db:
+            cancelled = await db.scalars(
+                select(Broadcast.id).where(Broadcast.id.in_(broadcast_ids), Broadcast.status == "cancelled")
+            )
+            for broadcast_id in cancelled:
+                self._cancel_jobs(broadcast_id)
+
+    async def _consume(self, consumer: str):
+        while not self.stopping.is_set():
+            try:
+                message = await self._next_message(consumer)
+                if message:
+                    await self._process_chunk(consumer, *message)
+            except Exception as e:
+                logger.error(f"Consumer {consumer}: {e}")
+                await asyncio.sleep(1)
+
+    async def _next_message(self, consumer: str) -> Tuple[str, Dict[str, str]] | None:
+        # Chunks left pending by a dead consumer come first
+        _, claimed, *_ = await self.redis.xautoclaim(
+            self.stream, self.group, consumer, min_idle_time=settings.BROADCAST_CLAIM_IDLE * 1000, count=1
+        )
+        if claimed:
+            logger.warning(f"Consumer {consumer} reclaimed chunk {claimed[0][0]}")
+            return claimed[0]
+
+        response = await self.redis.xreadgroup(self.group, consumer, {self.stream: ">"}, count=1, block=READ_BLOCK_MS)
+        if not response:
+            return None
+        _, messages = response[0]
+        return messages[0]
+
+    async def _heartbeat(self, consumer: str, message_id: str):
+        """Reset the idle time of a chunk that takes long to send, so it isn't reclaimed."""
+        while True:
+            await asyncio.sleep(settings.BROADCAST_CLAIM_IDLE / 3)
+            await self.redis.xclaim(self.stream, self.group, consumer, 0, [message_id], justid=True)
+
+    async def _process_chunk(self, consumer: str, message_id: str, fields: Dict[str, str]):
+        broadcast_id = int(fields["broadcast_id"])
+        bot_id = int(fields["bot_id"])
+
+        heartbeat = asyncio.create_task(self._heartbeat(consumer, message_id))
+        try:
+            async with AsyncSessionLocal() as db:
+                broadcast = await db.get(Broadcast, broadcast_id)
+                bot_model = await db.get(BotModel, bot_id)
+                # Chunks of cancelled or deleted broadcasts are acknowledged without sending
+                if broadcast and bot_model and broadcast.status == "sending":
+                    sent, failed, blocked = await self._send_chunk(
+                        db, broadcast, bot_model, int(fields["after_id"]), int(fields["upto_id"])
+                    )
+                    await mark_blocked(db, blocked)
+                    await db.execute(
+                        update(BroadcastCheckpoint)
+                        .where(BroadcastCheckpoint.broadcast_id == broadcast_id, BroadcastCheckpoint.bot_id == bot_id)
+                        .values(
+                            sent_count=BroadcastCheckpoint.sent_count + sent,
+                            failed_count=BroadcastCheckpoint.failed_count + failed
+                        )
+                    )
+                    await db.execute(
+                        update(Broadcast)
+                        .where(Broadcast.id == broadcast_id)
+                        .values(sent_count=Broadcast.sent_count + sent, failed_count=Broadcast.failed_count + failed)
+                    )
+                    await db.commit()
+
+                async with self.redis.pipeline(transaction=True) as pipe:
+                    pipe.xack(self.stream, self.group, message_id)
+                    pipe.xdel(self.stream, message_id)
+                    pipe.decr(chunks_left_key(broadcast_id))
+                    await pipe.execute()
+
+                await complete_if_drained(db, broadcast_id)
+        finally:
+            heartbeat.cancel()
+
+    async def _send_chunk(
+        self, db, broadcast: Broadcast, bot_model: BotModel, after_id: int, upto_id: int
+    ) -> Tuple[int, int, List[int]]:
+        """Send one chunk. Returns sent and failed counts and the ids of users who blocked the bot."""
+        recipients = [Recipient(*row) for row in await db.execute(
+            select_recipients(broadcast, bot_model.id).where(BotUser.id > after_id, BotUser.id <= upto_id)
+        )]
+        upload = await input_file(db, broadcast.media_hash) if broadcast.media_hash else None
+        # Release the connection while the chunk is being sent
+        await db.commit()
+
+        bot = create_bot(bot_model.token, parse_mode=None)
+        job = _BroadcastJob(broadcast, build_markup(broadcast.buttons), upload)
+        await prepare_bot_media(job, bot, bot_model.id)
+        self._jobs.add(job)
+        # Shared by every worker sending for this bot
+        limiter = RedisRateLimiter(self.redis, f"ratelimit:bot:{bot_model.id}", settings.BROADCAST_BOT_RATE)
+        semaphore = asyncio.Semaphore(settings.BROADCAST_BOT_CONCURRENCY)
+
+        blocked: List[int] = []
+
+        async def send(recipient: Recipient) -> bool | None:
+            async with semaphore:
+                return await broadcast_service._send_to_user(job, bot, limiter, recipient, blocked)
+
+        try:
+            results = await asyncio.gather(*(send(recipient) for recipient in recipients))
+        finally:
+            self._jobs.discard(job)
+        return results.count(True), results.count(False), blocked
+
+async def main():
+    logging.basicConfig(level=logging.INFO)
+    worker = BroadcastWorker()
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        # Consumers finish their current chunk and exit
+        loop.add_signal_handler(sig, worker.stopping.set)
+
+    try:
+        await worker.run()
+    finally:
+        await telegram_http.close()
+        await close_redis()
+        await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
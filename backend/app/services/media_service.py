@@ -0,0 +1,94 @@
+# backend/app/services/media_service.py
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+from fastapi import UploadFile
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from aiogram.types import FSInputFile, Message
+from app.config import settings
+from app.models.media_file import MediaFile
+from app.models.bot_media_file import BotMediaFile
+
+logger = logging.getLogger(__name__)
+
+READ_CHUNK = 1024 * 1024
+
+class MediaTooLarge(Exception):
+    pass
+
+def media_path(media_hash: str) -> str:
+    return os.path.join(settings.MEDIA_DIR, media_hash)
+
+def guess_media_type(content_type: str | None) -> str:
+    """Broadcast media_type for an uploaded file."""
+    if content_type == "image/gif":
+        return "animation"
+    if content_type and content_type.startswith("image/"):
+        return "photo"
+    if content_type and content_type.startswith("video/"):
+        return "video"
+    return "document"
+
+def _write_chunk(tmp, digest, chunk: bytes):
+    digest.update(chunk)
+    tmp.write(chunk)
+
+async def save_upload(db, upload: UploadFile) -> MediaFile:
+    """Store an uploaded file under its sha256; uploading the same content twice is a no-op."""
+    # Disk writes (up to MEDIA_MAX_SIZE) run in threads, so polling bots and webhooks are not stalled
+    await asyncio.to_thread(os.makedirs, settings.MEDIA_DIR, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+
+    fd, tmp_path = await asyncio.to_thread(tempfile.mkstemp, dir=settings.MEDIA_DIR, prefix=".upload-")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            while chunk := await upload.read(READ_CHUNK):
+                size += len(chunk)
+                if size > settings.MEDIA_MAX_SIZE:
+                    raise MediaTooLarge()
+                await asyncio.to_thread(_write_chunk, tmp, digest, chunk)
+        media_hash = digest.hexdigest()
+        await asyncio.to_thread(os.replace, tmp_path, media_path(media_hash))
+    except BaseException:
+        await asyncio.to_thread(os.unlink, tmp_path)
+        raise
+
+    await db.execute(
+        insert(MediaFile)
+        .values(hash=media_hash, filename=upload.filename or media_hash, content_type=upload.content_type, size=size)
+        .on_conflict_do_nothing(index_elements=[MediaFile.hash])
+    )
+    await db.commit()
+    return await db.get(MediaFile, media_hash)
+
+async def input_file(db, media_hash: str) -> FSInputFile | None:
+    media = await db.get(MediaFile, media_hash)
+    if not media:
+        return None
+    return FSInputFile(media_path(media_hash), filename=media.filename)
+
+async def get_file_id(db, media_hash: str, bot_id: int) -> str | None:
+    return await db.scalar(
+        select(BotMediaFile.file_id).where(BotMediaFile.media_hash == media_hash, BotMediaFile.bot_id == bot_id)
+    )
+
+async def save_file_id(db, media_hash: str, bot_id: int, file_id: str):
+    await db.execute(
+        insert(BotMediaFile)
+        .values(media_hash=media_hash, bot_id=bot_id, file_id=file_id)
+        .on_conflict_do_nothing(index_elements=[BotMediaFile.media_hash, BotMediaFile.bot_id])
+    )
+    await db.commit()
+
+def sent_file_id(message: Message) -> str | None:
+    """file_id Telegram assigned to the media of a sent message."""
+    if message.photo:
+        return message.photo[-1].file_id
+    for media in (message.animation, message.video, message.document):
+        if media:
+            return media.file_id
+    return None
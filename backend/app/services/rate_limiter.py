@@ -0,0 +1,136 @@
+# backend/app/services/rate_limiter.py
+import asyncio
+import logging
+import math
+import time
+from typing import Dict, Tuple
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from app.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, bursts of up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        # Waiters queue on the lock, so tokens are handed out in FIFO order
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    async def pause(self, seconds: float):
+        """Stop handing out tokens for `seconds` (e.g. after a 429 retry_after)."""
+        now = time.monotonic()
+        self._paused_until = max(self._paused_until, now + seconds)
+        self._tokens = 0
+        self._updated = max(now, self._paused_until)
+
+
+# GCRA with a burst of one: returns 0 when a send is allowed, otherwise milliseconds to wait.
+# KEYS[1] - theoretical arrival time, KEYS[2] - pause flag (set after a 429)
+_GCRA_SCRIPT = """
+local paused = redis.call('PTTL', KEYS[2])
+if paused > 0 then
+    return paused
+end
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local interval = tonumber(ARGV[1])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat > now then
+    return tat - now
+end
+redis.call('SET', KEYS[1], now + interval, 'PX', interval + 1000)
+return 0
+"""
+
+
+class RedisRateLimiter:
+    """Same interface as TokenBucket, but the rate is shared by every process using `key`."""
+
+    def __init__(self, redis: Redis, key: str, rate: float):
+        self.redis = redis
+        self.key = key
+        self.interval_ms = max(1, int(1000 / rate))
+        self._script = redis.register_script(_GCRA_SCRIPT)
+
+    async def acquire(self):
+        while True:
+            wait_ms = await self._script(keys=[self.key, f"{self.key}:pause"], args=[self.interval_ms])
+            if not wait_ms:
+                return
+            await asyncio.sleep(int(wait_ms) / 1000)
+
+    async def pause(self, seconds: float):
+        await self.redis.set(f"{self.key}:pause", 1, px=max(1, int(seconds * 1000)))
+
+
+class AttemptLimiter:
+    """
+    Attempts per key in fixed windows of `window` seconds. Counted in Redis (shared by every
+    process), or in process memory for a while after a Redis error.
+    """
+
+    REDIS_RETRY_INTERVAL = 30
+    MEMORY_KEYS = 10_000
+
+    def __init__(self, prefix: str, window: int):
+        self.prefix = prefix
+        self.window = window
+        self._memory: Dict[str, Tuple[int, float]] = {}  # key -> (attempts, window end)
+        self._redis_down_until = 0.0
+
+    async def hit(self, key: str) -> Tuple[int, int]:
+        """Count an attempt; returns the attempts in the current window and seconds until it ends."""
+        if time.monotonic() >= self._redis_down_until:
+            try:
+                async with get_redis().pipeline(transaction=True) as pipe:
+                    name = f"{self.prefix}:{key}"
+                    pipe.set(name, 0, ex=self.window, nx=True)
+                    pipe.incr(name)
+                    pipe.ttl(name)
+                    _, attempts, ttl = await pipe.execute()
+                return attempts, max(ttl, 1)
+            except (RedisError, OSError) as e:
+                logger.warning(f"AttemptLimiter: Redis unavailable, counting in process for {self.REDIS_RETRY_INTERVAL}s: {e}")
+                self._redis_down_until = time.monotonic() + self.REDIS_RETRY_INTERVAL
+
+        now = time.monotonic()
+        if len(self._memory) >= self.MEMORY_KEYS:
+            self._memory = {k: v for k, v in self._memory.items() if v[1] > now}
+        attempts, ends_at = self._memory.get(key, (0, 0.0))
+        if ends_at <= now:
+            attempts, ends_at = 0, now + self.window
+        self._memory[key] = (attempts + 1, ends_at)
+        return attempts + 1, max(math.ceil(ends_at - now), 1)
+
+    async def reset(self, key: str):
+        self._memory.pop(key, None)
+        if time.monotonic() >= self._redis_down_until:
+            try:
+                await get_redis().delete(f"{self.prefix}:{key}")
+            except (RedisError, OSError) as e:
+                logger.warning(f"AttemptLimiter: could not reset {key}: {e}")
@@ -0,0 +1,69 @@
+# backend/app/services/user_summary.py
+"""
+Maintenance of user aggregates (bot_user_summaries and the daily rollups) outside the tracking
+flush: recomputing them after bot_users rows are deleted. The initial backfill is the Alembic
+migration 0004_backfill_user_aggregates.
+"""
+from collections import Counter
+from typing import List
+from sqlalchemy import select, delete, func, any_, bindparam, BigInteger
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from app.bot.tracking import add_new_users
+from app.models.bot_user import BotUser
+from app.models.bot_user_summary import BotUserSummary
+
+def _aggregate(*conditions):
+    """bot_users folded per telegram_id (the newest row wins), in BotUserSummary column order."""
+    by_user = dict(partition_by=BotUser.telegram_id)
+    return (
+        select(
+            BotUser.telegram_id,
+            BotUser.id,
+            BotUser.username,
+            BotUser.first_name,
+            BotUser.last_name,
+            BotUser.language_code,
+            BotUser.is_blocked,
+            func.min(BotUser.first_seen_at).over(**by_user),
+            func.max(BotUser.last_seen_at).over(**by_user),
+            func.array_agg(BotUser.source_bot_id).over(**by_user, order_by=BotUser.source_bot_id, rows=(None, None)),
+        )
+        .where(*conditions)
+        .distinct(BotUser.telegram_id)
+        .order_by(BotUser.telegram_id, BotUser.last_seen_at.desc(), BotUser.id.desc())
+    )
+
+_COLUMNS = [
+    "telegram_id", "bot_user_id", "username", "first_name", "last_name", "language_code",
+    "is_blocked", "first_seen_at", "last_seen_at", "source_bot_ids",
+]
+
+async def refresh_summaries(db, telegram_ids: List[int]):
+    """Recompute the summaries of these users from bot_users (users without rows left are dropped)."""
+    if not telegram_ids:
+        return
+    ids = bindparam("telegram_ids", telegram_ids, type_=ARRAY(BigInteger))
+    removed = await db.scalars(
+        delete(BotUserSummary).where(BotUserSummary.telegram_id == any_(ids)).returning(BotUserSummary.first_seen_at)
+    )
+    added = await db.scalars(
+        insert(BotUserSummary)
+        .from_select(_COLUMNS, _aggregate(BotUser.telegram_id == any_(ids)))
+        .returning(BotUserSummary.first_seen_at)
+    )
+    # Users left without bots drop out of the daily rollup (and a changed first_seen_at moves them)
+    new_users = Counter(first_seen_at.date() for first_seen_at in added)
+    new_users.subtract(first_seen_at.date() for first_seen_at in removed)
+    await add_new_users(db, new_users, Counter())
+
+async def forget_user(db, user: BotUser):
+    """Update the aggregates after deleting one bot_users row."""
+    await add_new_users(db, Counter(), Counter({(user.first_seen_at.date(), user.source_bot_id): -1}))
+    await refresh_summaries(db, [user.telegram_id])
+
+async def forget_bot(db, bot_id: int):
+    """Drop a deleted bot from the summaries; call after its bot_users rows are deleted (its daily rollup rows cascade)."""
+    telegram_ids = (await db.scalars(
+        select(BotUserSummary.telegram_id).where(BotUserSummary.source_bot_ids.contains([bot_id]))
+    )).all()
+    await refresh_summaries(db, list(telegram_ids))
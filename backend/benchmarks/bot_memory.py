@@ -0,0 +1,49 @@
+# backend/benchmarks/bot_memory.py
+"""
+Memory used per added bot: one Dispatcher per bot vs. one shared Dispatcher.
+
+Run from backend/ (settings are read from .env as usual):
+    python -m benchmarks.bot_memory --bots 200
+"""
+import argparse
+import gc
+import json
+import tracemalloc
+from app.bot.factory import create_bot, create_dispatcher
+
+
+def measure(bots: int, shared: bool) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.take_snapshot()
+
+    holder = []
+    dispatcher = create_dispatcher() if shared else None
+    for i in range(bots):
+        bot = create_bot(f"{100000 + i}:AAFakeTokenForMemoryBenchmark{i:06d}")
+        holder.append((bot, dispatcher if shared else create_dispatcher()))
+
+    gc.collect()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    total = sum(stat.size_diff for stat in snapshot.compare_to(baseline, "filename"))
+    return {
+        "mode": "shared_dispatcher" if shared else "dispatcher_per_bot",
+        "bots": bots,
+        "total_kib": round(total / 1024, 1),
+        "per_bot_kib": round(total / bots / 1024, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bots", type=int, default=200)
+    args = parser.parse_args()
+
+    results = [measure(args.bots, shared=False), measure(args.bots, shared=True)]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# backend/benchmarks/broadcast_send.py
+"""
+Broadcast sends/sec with the network stubbed out: building a send_* call per recipient
+(the former BroadcastService._send_message) vs. the prebuilt method of build_send_method.
+
+The stub session still builds the request form, so serialization costs are included.
+
+Run from backend/ (settings are read from .env as usual):
+    python -m benchmarks.broadcast_send --sends 20000 --media photo
+"""
+import argparse
+import asyncio
+import json
+import time
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from app.bot.factory import create_bot
+from app.models.broadcast import Broadcast
+from app.services.broadcast_service import build_markup, build_send_method
+
+FILE_ID = "AgACAgIAAxkBAAIBZ2Zx0benchmarkFileId"
+
+
+class StubSession(AiohttpSession):
+    """Builds the multipart form like the real session, then answers without any I/O."""
+
+    async def make_request(self, bot: Bot, method, timeout=None):
+        self.build_form_data(bot, method)
+        return True
+
+
+async def send_per_recipient(bot: Bot, broadcast: Broadcast, markup, chat_id: int):
+    """The former BroadcastService._send_message: dispatch on media_type and build the call per recipient."""
+    if broadcast.media_type == "photo" and broadcast.media_file_id:
+        await bot.send_photo(chat_id, photo=broadcast.media_file_id, caption=broadcast.text, reply_markup=markup)
+    elif broadcast.media_type == "video" and broadcast.media_file_id:
+        await bot.send_video(chat_id, video=broadcast.media_file_id, caption=broadcast.text, reply_markup=markup)
+    elif broadcast.media_type == "document" and broadcast.media_file_id:
+        await bot.send_document(chat_id, document=broadcast.media_file_id, caption=broadcast.text, reply_markup=markup)
+    elif broadcast.media_type == "animation" and broadcast.media_file_id:
+        await bot.send_animation(chat_id, animation=broadcast.media_file_id, caption=broadcast.text, reply_markup=markup)
+    elif broadcast.text:
+        await bot.send_message(chat_id, text=broadcast.text, reply_markup=markup)
+
+
+async def measure(name: str, sends: int, send) -> dict:
+    started_at = time.perf_counter()
+    for chat_id in range(sends):
+        await send(chat_id)
+    seconds = time.perf_counter() - started_at
+    return {"path": name, "sends": sends, "sends_per_sec": round(sends / seconds), "us_per_send": round(seconds / sends * 1e6, 1)}
+
+
+async def run(sends: int, media: str) -> list:
+    bot = create_bot("123456:AAFakeTokenForSendBenchmark", parse_mode=None)
+    bot.session = StubSession()
+    broadcast = Broadcast(
+        id=1,
+        text="Big <b>news</b> from our bots! " * 10,
+        media_type=media if media != "none" else None,
+        media_file_id=FILE_ID if media != "none" else None,
+        buttons=[{"text": f"Button {i}", "url": f"https://example.com/{i}"} for i in range(3)],
+    )
+
+    # Both paths build the markup once per broadcast
+    markup = build_markup(broadcast.buttons)
+    per_recipient_send = lambda chat_id: send_per_recipient(bot, broadcast, markup, chat_id)
+    prebuilt = build_send_method(broadcast, markup)
+    prebuilt_send = lambda chat_id: bot(prebuilt.model_copy(update={"chat_id": chat_id}))
+
+    await measure("warmup", 1000, per_recipient_send)
+    await measure("warmup", 1000, prebuilt_send)
+    return [
+        await measure("per_recipient", sends, per_recipient_send),
+        await measure("prebuilt", sends, prebuilt_send),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sends", type=int, default=20000)
+    parser.add_argument("--media", choices=["none", "photo", "video", "document", "animation"], default="photo")
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args.sends, args.media)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
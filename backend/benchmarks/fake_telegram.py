@@ -0,0 +1,297 @@
+# backend/benchmarks/fake_telegram.py
+"""
+Fake Telegram Bot API server for offline load and integration tests.
+
+Implements getMe, getUpdates, sendMessage/sendPhoto/sendVideo/sendDocument/sendAnimation,
+setWebhook/deleteWebhook/getWebhookInfo, getUserProfilePhotos, getFile and file downloads.
+Any token is accepted; the bot id is the part before ":".
+
+Point the backend at it with TELEGRAM_API_URL=http://127.0.0.1:8081, then run:
+    python -m benchmarks.fake_telegram --port 8081 --latency 0.03 --blocked-ratio 0.05
+
+Control endpoints:
+    GET  /_fake/stats                   request counters
+    POST /_fake/reset                   reset counters
+    POST /_fake/bot{token}/updates      queue updates for getUpdates:
+                                        {"updates": [...]} or {"count": n} synthetic /start messages
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import time
+from collections import Counter, defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List
+from aiohttp import web
+
+SEND_METHODS = {"sendmessage", "sendphoto", "sendvideo", "senddocument", "sendanimation"}
+
+
+@dataclass
+class FakeConfig:
+    latency: float = 0.0  # seconds added to every API call
+    jitter: float = 0.0  # up to this many extra seconds, uniformly
+    bot_rate: float = 30.0  # sends per second per bot before 429s (0 = unlimited)
+    flood_ratio: float = 0.0  # share of sends answered with an injected 429
+    retry_after: int = 1  # retry_after of injected 429s
+    blocked_ratio: float = 0.0  # share of (bot, chat) pairs where the user blocked the bot
+    update_rate: float = 0.0  # synthetic /start updates per second for every polling bot
+    users: int = 10000  # synthetic user ids are 1..users
+
+
+@dataclass
+class FakeBot:
+    bot_id: int
+    update_id: int = 0
+    updates: Deque[Dict[str, Any]] = field(default_factory=deque)
+    has_updates: asyncio.Event = field(default_factory=asyncio.Event)
+    webhook_url: str = ""
+    sends: Deque[float] = field(default_factory=deque)  # send timestamps within the last second
+
+
+class FakeTelegram:
+    def __init__(self, config: FakeConfig):
+        self.config = config
+        self.bots: Dict[int, FakeBot] = {}
+        self.stats: Counter = Counter()
+        self.started_at = time.monotonic()
+        self._message_id = 0
+
+    def bot(self, token: str) -> FakeBot:
+        bot_id = int(token.split(":", 1)[0])
+        if bot_id not in self.bots:
+            self.bots[bot_id] = FakeBot(bot_id)
+        return self.bots[bot_id]
+
+    # Helpers
+
+    @staticmethod
+    def ok(result: Any) -> web.Response:
+        return web.json_response({"ok": True, "result": result})
+
+    @staticmethod
+    def error(code: int, description: str, **parameters) -> web.Response:
+        payload: Dict[str, Any] = {"ok": False, "error_code": code, "description": description}
+        if parameters:
+            payload["parameters"] = parameters
+        return web.json_response(payload, status=code)
+
+    def is_blocked(self, bot_id: int, chat_id: int) -> bool:
+        if not self.config.blocked_ratio:
+            return False
+        digest = hashlib.blake2b(f"{bot_id}:{chat_id}".encode(), digest_size=4).digest()
+        return int.from_bytes(digest, "big") / 2**32 < self.config.blocked_ratio
+
+    def rate_limited(self, bot: FakeBot) -> bool:
+        if not self.config.bot_rate:
+            return False
+        now = time.monotonic()
+        while bot.sends and now - bot.sends[0] > 1.0:
+            bot.sends.popleft()
+        if len(bot.sends) >= self.config.bot_rate:
+            return True
+        bot.sends.append(now)
+        return False
+
+    def queue_update(self, bot: FakeBot, update: Dict[str, Any]):
+        bot.update_id += 1
+        bot.updates.append({**update, "update_id": bot.update_id})
+        bot.has_updates.set()
+
+    def start_update(self, user_id: int) -> Dict[str, Any]:
+        self._message_id += 1
+        user = {"id": user_id, "is_bot": False, "first_name": f"User {user_id}", "language_code": "en"}
+        return {"message": {
+            "message_id": self._message_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": user,
+            "text": "/start",
+            "entities": [{"type": "bot_command", "offset": 0, "length": 6}],
+        }}
+
+    def message(self, bot: FakeBot, chat_id: int, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        self._message_id += 1
+        message: Dict[str, Any] = {
+            "message_id": self._message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": bot.bot_id, "is_bot": True, "first_name": f"Fake bot {bot.bot_id}"},
+        }
+        if method == "sendmessage":
+            message["text"] = params.get("text", "")
+            return message
+
+        media = method[len("send"):]
+        value = params.get(media)
+        if isinstance(value, str) and value.startswith("attach://"):
+            # aiogram sends files as separate multipart fields referenced by attach://<name>
+            value = params.get(value[len("attach://"):])
+        if isinstance(value, web.FileField):
+            # A fresh upload gets a file_id scoped to this bot, like on Telegram
+            self.stats["uploads"] += 1
+            file_id = f"fake-{bot.bot_id}-{media}-{hashlib.sha1(value.file.read()).hexdigest()[:16]}"
+        else:
+            file_id = str(value)
+        file = {"file_id": file_id, "file_unique_id": file_id[-16:]}
+        if media == "photo":
+            message["photo"] = [{**file, "width": 90, "height": 90}, {**file, "width": 1280, "height": 1280}]
+        elif media == "document":
+            message["document"] = file
+        else:
+            message[media] = {**file, "width": 640, "height": 360, "duration": 5}
+        if params.get("caption"):
+            message["caption"] = params["caption"]
+        return message
+
+    # Handlers
+
+    async def handle_method(self, request: web.Request) -> web.Response:
+        token = request.match_info["token"]
+        method = request.match_info["method"].lower()
+        params: Dict[str, Any] = dict(request.query)
+        if request.content_type == "application/json":
+            params.update(await request.json())
+        elif request.can_read_body:
+            params.update(await request.post())
+
+        self.stats[f"method.{method}"] += 1
+        bot = self.bot(token)
+        if method != "getupdates" and (self.config.latency or self.config.jitter):
+            await asyncio.sleep(self.config.latency + random.uniform(0, self.config.jitter))
+
+        if method == "getme":
+            return self.ok({
+                "id": bot.bot_id, "is_bot": True, "first_name": f"Fake bot {bot.bot_id}",
+                "username": f"fake_bot_{bot.bot_id}", "can_join_groups": True,
+                "can_read_all_group_messages": False, "supports_inline_queries": False,
+            })
+        if method == "getupdates":
+            return self.ok(await self.get_updates(bot, params))
+        if method in SEND_METHODS:
+            return self.send(bot, method, params)
+        if method == "setwebhook":
+            bot.webhook_url = params.get("url", "")
+            return self.ok(True)
+        if method == "deletewebhook":
+            bot.webhook_url = ""
+            return self.ok(True)
+        if method == "getwebhookinfo":
+            return self.ok({"url": bot.webhook_url, "has_custom_certificate": False, "pending_update_count": 0})
+        if method == "getuserprofilephotos":
+            photo = [{"file_id": f"avatar-{bot.bot_id}", "file_unique_id": f"avatar{bot.bot_id}", "width": 160, "height": 160}]
+            return self.ok({"total_count": 1, "photos": [photo]})
+        if method == "getfile":
+            file_id = params.get("file_id", "")
+            return self.ok({"file_id": file_id, "file_unique_id": file_id[-16:], "file_size": 1024, "file_path": f"files/{file_id}.jpg"})
+        return self.error(404, "Not Found: method not found")
+
+    async def get_updates(self, bot: FakeBot, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        offset = int(params.get("offset") or 0)
+        limit = int(params.get("limit") or 100)
+        timeout = float(params.get("timeout") or 0)
+
+        while bot.updates and bot.updates[0]["update_id"] < offset:
+            bot.updates.popleft()
+        if not bot.updates and timeout:
+            bot.has_updates.clear()
+            try:
+                await asyncio.wait_for(bot.has_updates.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return list(bot.updates)[:limit]
+
+    def send(self, bot: FakeBot, method: str, params: Dict[str, Any]) -> web.Response:
+        chat_id = int(params.get("chat_id") or 0)
+        if self.rate_limited(bot):
+            self.stats["rate_limited"] += 1
+            return self.error(429, "Too Many Requests: retry after 1", retry_after=1)
+        if self.config.flood_ratio and random.random() < self.config.flood_ratio:
+            self.stats["flood_injected"] += 1
+            retry_after = self.config.retry_after
+            return self.error(429, f"Too Many Requests: retry after {retry_after}", retry_after=retry_after)
+        if self.is_blocked(bot.bot_id, chat_id):
+            self.stats["blocked"] += 1
+            return self.error(403, "Forbidden: bot was blocked by the user")
+
+        self.stats["sent"] += 1
+        return self.ok(self.message(bot, chat_id, method, params))
+
+    async def handle_file(self, request: web.Request) -> web.Response:
+        self.stats["file_downloads"] += 1
+        # A valid 1x1 JPEG-ish payload is enough for proxies and caches
+        return web.Response(body=b"\xff\xd8\xff\xe0" + request.match_info["path"].encode() + b"\xff\xd9", content_type="image/jpeg")
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        elapsed = time.monotonic() - self.started_at
+        return web.json_response({
+            "elapsed": round(elapsed, 3),
+            "bots": len(self.bots),
+            "sends_per_sec": round(self.stats["sent"] / elapsed, 1) if elapsed else 0,
+            **dict(self.stats),
+        })
+
+    async def handle_reset(self, request: web.Request) -> web.Response:
+        self.stats.clear()
+        self.started_at = time.monotonic()
+        return self.ok(True)
+
+    async def handle_queue_updates(self, request: web.Request) -> web.Response:
+        bot = self.bot(request.match_info["token"])
+        body = await request.json()
+        for update in body.get("updates", []):
+            self.queue_update(bot, update)
+        for _ in range(int(body.get("count", 0))):
+            self.queue_update(bot, self.start_update(random.randint(1, self.config.users)))
+        return self.ok(len(bot.updates))
+
+    async def generate_updates(self, app: web.Application):
+        """Feed synthetic /start messages to every bot that polls, at update_rate per bot."""
+        async def loop():
+            tick = 0.1
+            carry: Dict[int, float] = defaultdict(float)
+            while True:
+                await asyncio.sleep(tick)
+                for bot in list(self.bots.values()):
+                    carry[bot.bot_id] += self.config.update_rate * tick
+                    while carry[bot.bot_id] >= 1:
+                        carry[bot.bot_id] -= 1
+                        self.queue_update(bot, self.start_update(random.randint(1, self.config.users)))
+
+        task = asyncio.create_task(loop()) if self.config.update_rate else None
+        yield
+        if task:
+            task.cancel()
+
+
+def create_app(config: FakeConfig | None = None) -> web.Application:
+    fake = FakeTelegram(config or FakeConfig())
+    app = web.Application(client_max_size=60 * 1024 * 1024)
+    app["fake"] = fake
+    app.router.add_get("/_fake/stats", fake.handle_stats)
+    app.router.add_post("/_fake/reset", fake.handle_reset)
+    app.router.add_post("/_fake/bot{token}/updates", fake.handle_queue_updates)
+    app.router.add_route("*", "/bot{token}/{method}", fake.handle_method)
+    app.router.add_get("/file/bot{token}/{path:.+}", fake.handle_file)
+    app.cleanup_ctx.append(fake.generate_updates)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    defaults = FakeConfig()
+    for name, value in vars(defaults).items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(value), default=value)
+    args = parser.parse_args()
+
+    config = FakeConfig(**{name: getattr(args, name) for name in vars(defaults)})
+    print(json.dumps({"listening": f"http://{args.host}:{args.port}", **vars(config)}))
+    web.run_app(create_app(config), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
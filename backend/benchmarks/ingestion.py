@@ -0,0 +1,245 @@
+# backend/benchmarks/ingestion.py
+"""
+Update ingestion throughput of one backend process: synthetic /start messages and callback
+queries fed through create_dispatcher() (TrackingMiddleware, cmd_start) with feed_update,
+against the configured Postgres. Telegram calls are answered by a stub session in-process,
+or by a Bot API server such as benchmarks/fake_telegram.py with --api-url.
+
+Users follow a Zipf distribution (a few users send most updates), spread over the bots.
+Benchmark bots use ids from --first-bot-id and are deleted afterwards with their users.
+
+Run from backend/ against a migrated database (alembic upgrade head; settings are read from .env as usual):
+    python -m benchmarks.ingestion --bots 20 --users 50000 --updates 50000 --output ingestion.json
+"""
+import argparse
+import asyncio
+import bisect
+import itertools
+import json
+import logging
+import os
+import random
+import resource
+import subprocess
+import time
+from collections import Counter
+from datetime import datetime
+from aiogram import Bot
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.base import BaseSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.types import Update
+from sqlalchemy import delete, event
+from app.bot.factory import create_dispatcher
+from app.bot.responses import response_cache
+from app.bot.tracking import tracking_buffer
+from app.database import AsyncSessionLocal, engine
+from app.models.bot import Bot as BotModel
+from app.models.bot_user import BotUser
+from app.models.message_template import MessageTemplate
+from app.services.user_summary import forget_bot
+
+LANGUAGES = ["ru", "en", "uk", "de", None]
+
+
+class StubSession(BaseSession):
+    """Answers every Bot API call without network I/O."""
+
+    async def make_request(self, bot: Bot, method, timeout=None):
+        return True
+
+    async def stream_content(self, *args, **kwargs):
+        yield b""
+
+    async def close(self):
+        pass
+
+
+class ZipfUsers:
+    """Telegram user ids 1..n drawn with P(k) ~ 1 / k**s."""
+
+    def __init__(self, n: int, s: float, seed: int):
+        weights = [1 / k ** s for k in range(1, n + 1)]
+        self.cumulative = list(itertools.accumulate(weights))
+        self.random = random.Random(seed)
+
+    def draw(self) -> int:
+        return bisect.bisect_left(self.cumulative, self.random.random() * self.cumulative[-1]) + 1
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    def close(self):
+        event.remove(engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+
+def rss_mib() -> float:
+    with open("/proc/self/statm") as statm:
+        return round(int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20, 1)
+
+
+def percentile(sorted_values: list, p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def make_update(update_id: int, user_id: int, bot: Bot, callback: bool) -> Update:
+    user = {
+        "id": user_id, "is_bot": False, "first_name": f"User {user_id}",
+        "username": f"user{user_id}", "language_code": LANGUAGES[user_id % len(LANGUAGES)],
+    }
+    message = {
+        "message_id": update_id, "date": int(time.time()), "chat": {"id": user_id, "type": "private"},
+        "from": user, "text": "/start", "entities": [{"type": "bot_command", "offset": 0, "length": 6}],
+    }
+    if callback:
+        payload = {"update_id": update_id, "callback_query": {
+            "id": str(update_id), "from": user, "chat_instance": str(user_id), "data": "noop", "message": message,
+        }}
+    else:
+        payload = {"update_id": update_id, "message": message}
+    return Update.model_validate(payload, context={"bot": bot})
+
+
+async def setup_bots(args) -> list[int]:
+    bot_ids = list(range(args.first_bot_id, args.first_bot_id + args.bots))
+    await cleanup(bot_ids)
+    async with AsyncSessionLocal() as db:
+        for bot_id in bot_ids:
+            db.add(BotModel(id=bot_id, token=f"{bot_id}:bench-{bot_id}", name=f"Bench {bot_id}", bot_username=f"bench_{bot_id}"))
+        await db.flush()
+        for bot_id in bot_ids:
+            db.add(MessageTemplate(bot_id=bot_id, language_code="ru", text="Привет, <b>{first_name}</b>!", buttons=[{"text": "Open", "url": "https://example.com"}]))
+            db.add(MessageTemplate(bot_id=bot_id, language_code="en", text="Hello!", buttons=[]))
+        await db.commit()
+    return bot_ids
+
+
+async def cleanup(bot_ids: list[int]):
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(BotUser).where(BotUser.source_bot_id.in_(bot_ids)))
+        for bot_id in bot_ids:
+            await forget_bot(db, bot_id)
+        await db.execute(delete(MessageTemplate).where(MessageTemplate.bot_id.in_(bot_ids)))
+        await db.execute(delete(BotModel).where(BotModel.id.in_(bot_ids)))
+        await db.commit()
+
+
+async def run(args) -> dict:
+    bot_ids = await setup_bots(args)
+    if args.api_url:
+        session = AiohttpSession(api=TelegramAPIServer.from_base(args.api_url), limit=args.concurrency)
+    else:
+        session = StubSession()
+    bots = {bot_id: Bot(f"{bot_id}:bench-{bot_id}", session=session, default=DefaultBotProperties(parse_mode="HTML")) for bot_id in bot_ids}
+    dispatcher = create_dispatcher()
+    # Like BotManager._start_bot: responses are compiled before the first update
+    for bot_id in bot_ids:
+        response_cache.invalidate(bot_id)
+        await response_cache.warm(bot_id)
+
+    users = ZipfUsers(args.users, args.zipf, args.seed)
+    rng = random.Random(args.seed)
+    updates = []
+    for update_id in range(1, args.updates + 1):
+        bot_id = bot_ids[rng.randrange(len(bot_ids))]
+        updates.append((bot_id, make_update(update_id, users.draw(), bots[bot_id], rng.random() < args.callback_ratio)))
+    distinct_pairs = len({(b, (u.message or u.callback_query).from_user.id) for b, u in updates})
+
+    await tracking_buffer.start()
+    queries = QueryCounter()
+    rss_before = rss_mib()
+    latencies: list[float] = []
+    errors: Counter = Counter()
+
+    async def feed(bot_id: int, update: Update):
+        started_at = time.perf_counter()
+        try:
+            await dispatcher.feed_update(bots[bot_id], update, bot_id=bot_id)
+        except Exception as e:
+            # Polling logs handler errors and moves on (e.g. a 403 from a user who blocked the bot)
+            errors[type(e).__name__] += 1
+        latencies.append(time.perf_counter() - started_at)
+
+    started_at = time.perf_counter()
+    # Updates arrive in waves (like getUpdates batches), so background work such as
+    # tracking flushes interleaves with handlers instead of running after all of them
+    for i in range(0, len(updates), args.concurrency):
+        await asyncio.gather(*(feed(bot_id, update) for bot_id, update in updates[i:i + args.concurrency]))
+    feed_seconds = time.perf_counter() - started_at
+    # Write-behind tracking is part of the cost of an update
+    await tracking_buffer.stop()
+    total_seconds = time.perf_counter() - started_at
+    queries.close()
+
+    latencies.sort()
+    result = {
+        "revision": git_revision(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "config": vars(args),
+        "updates": args.updates,
+        "distinct_bot_users": distinct_pairs,
+        "feed_seconds": round(feed_seconds, 3),
+        "total_seconds": round(total_seconds, 3),
+        "updates_per_sec": round(args.updates / total_seconds, 1),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50) * 1000, 3),
+            "p99": round(percentile(latencies, 0.99) * 1000, 3),
+            "max": round(latencies[-1] * 1000, 3),
+        },
+        "errors": dict(errors),
+        "db_queries": queries.count,
+        "db_queries_per_update": round(queries.count / args.updates, 4),
+        "tracking": tracking_buffer.stats(),
+        "rss_mib": {"before": rss_before, "after": rss_mib(), "peak": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)},
+    }
+
+    await session.close()
+    if not args.keep:
+        await cleanup(bot_ids)
+    await engine.dispose()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bots", type=int, default=20)
+    parser.add_argument("--users", type=int, default=50000)
+    parser.add_argument("--updates", type=int, default=50000)
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent of the user distribution")
+    parser.add_argument("--callback-ratio", type=float, default=0.1, help="share of callback_query updates")
+    parser.add_argument("--concurrency", type=int, default=200, help="updates fed per wave")
+    parser.add_argument("--first-bot-id", type=int, default=900_000_000)
+    parser.add_argument("--api-url", help="Bot API base URL (e.g. fake_telegram.py) instead of the stub session")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keep", action="store_true", help="keep benchmark bots and users")
+    parser.add_argument("--output", help="write the JSON result to this file")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level)
+    result = asyncio.run(run(args))
+    output = json.dumps(result, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
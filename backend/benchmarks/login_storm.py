@@ -0,0 +1,179 @@
+# backend/benchmarks/login_storm.py
+"""
+Event loop latency of one backend process during a burst of /api/auth/login requests with
+wrong passwords (every attempt runs bcrypt), sent in-process through the auth router.
+
+A probe task sleeps --probe-interval seconds in a loop and records how late it wakes up:
+that is how long every bot's polling task and every other request would have been stalled.
+Phases:
+  inline    bcrypt on the event loop (as before password_executor existed)
+  executor  bcrypt on password_executor (PASSWORD_HASH_WORKERS threads)
+  throttled executor with the configured login limits, all attempts from one client IP
+
+Run from backend/ against a migrated database (settings are read from .env as usual):
+    python -m benchmarks.login_storm --attempts 40 --concurrency 20 --output login_storm.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import time
+from collections import Counter
+from concurrent.futures import Executor, Future
+from datetime import datetime
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import delete
+from app.api import auth
+from app.config import settings
+from app.database import AsyncSessionLocal, engine
+from app.models.user import User
+from app.redis_client import close_redis
+
+
+class InlineExecutor(Executor):
+    """Runs submitted calls right away on the calling (event loop) thread."""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+
+def percentile(sorted_values: list, p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def ms(seconds: float) -> float:
+    return round(seconds * 1000, 2)
+
+
+async def probe(interval: float, lags: list, stop: asyncio.Event):
+    while not stop.is_set():
+        started_at = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - started_at - interval)
+
+
+async def storm(client: httpx.AsyncClient, args, username: str, client_ip: str) -> dict:
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+
+    async def attempt(i: int):
+        async with semaphore:
+            started_at = time.perf_counter()
+            response = await client.post(
+                "/api/auth/login", data={"username": username, "password": f"wrong-{i}"},
+                headers={"X-Real-IP": client_ip},
+            )
+            latencies.append(time.perf_counter() - started_at)
+            statuses[response.status_code] += 1
+
+    lags: list[float] = []
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(args.probe_interval, lags, stop))
+    await asyncio.sleep(args.probe_interval * 5)  # baseline samples
+    started_at = time.perf_counter()
+    await asyncio.gather(*(attempt(i) for i in range(args.attempts)))
+    seconds = time.perf_counter() - started_at
+    stop.set()
+    await probe_task
+
+    latencies.sort()
+    lags.sort()
+    return {
+        "seconds": round(seconds, 3),
+        "attempts_per_sec": round(args.attempts / seconds, 1),
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "login_latency_ms": {"p50": ms(percentile(latencies, 0.50)), "p99": ms(percentile(latencies, 0.99)), "max": ms(latencies[-1])},
+        "loop_lag_ms": {
+            "samples": len(lags),
+            "p50": ms(percentile(lags, 0.50)),
+            "p99": ms(percentile(lags, 0.99)),
+            "max": ms(lags[-1]) if lags else 0.0,
+        },
+    }
+
+
+async def run(args) -> dict:
+    username = f"bench_login_{os.getpid()}"
+    async with AsyncSessionLocal() as db:
+        db.add(User(username=username, password_hash=auth.pwd_context.hash("correct password")))
+        await db.commit()
+
+    app = FastAPI()
+    app.include_router(auth.router, prefix="/api")
+    configured = (settings.LOGIN_MAX_ATTEMPTS_PER_IP, settings.LOGIN_MAX_ATTEMPTS_PER_USERNAME)
+    executor = auth.password_executor
+    # X-Real-IP of each phase (honoured from the in-process client at 127.0.0.1, a trusted proxy by
+    # default); the username limit counts per IP, so phases never share a counter
+    client_ips = {phase: f"bench-{phase}-{os.getpid()}" for phase in ("inline", "executor", "throttled")}
+    phases = {}
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            # Unthrottled: every attempt reaches bcrypt
+            settings.LOGIN_MAX_ATTEMPTS_PER_IP = settings.LOGIN_MAX_ATTEMPTS_PER_USERNAME = args.attempts * 3
+            for phase, phase_executor in (("inline", InlineExecutor()), ("executor", executor)):
+                auth.password_executor = phase_executor
+                phases[phase] = await storm(client, args, username, client_ips[phase])
+
+            auth.password_executor = executor
+            settings.LOGIN_MAX_ATTEMPTS_PER_IP, settings.LOGIN_MAX_ATTEMPTS_PER_USERNAME = configured
+            phases["throttled"] = await storm(client, args, username, client_ips["throttled"])
+    finally:
+        auth.password_executor = executor
+        settings.LOGIN_MAX_ATTEMPTS_PER_IP, settings.LOGIN_MAX_ATTEMPTS_PER_USERNAME = configured
+        for client_ip in client_ips.values():
+            await auth.login_limiter.reset(f"ip:{client_ip}")
+            await auth.login_limiter.reset(auth.username_attempts_key(username, client_ip))
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(User).where(User.username == username))
+            await db.commit()
+        await close_redis()
+        await engine.dispose()
+
+    return {
+        "revision": git_revision(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "config": vars(args),
+        "password_hash_workers": settings.PASSWORD_HASH_WORKERS,
+        "login_limits": {"per_ip": configured[0], "per_username": configured[1], "window": settings.LOGIN_ATTEMPT_WINDOW},
+        "phases": phases,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--attempts", type=int, default=40, help="login attempts per phase")
+    parser.add_argument("--concurrency", type=int, default=20, help="attempts in flight")
+    parser.add_argument("--probe-interval", type=float, default=0.01, help="seconds between loop latency samples")
+    parser.add_argument("--output", help="write the JSON result to this file")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level)
+    result = asyncio.run(run(args))
+    output = json.dumps(result, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
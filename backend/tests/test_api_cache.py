@@ -0,0 +1,154 @@
+# backend/tests/test_api_cache.py
+"""
+Dashboard response cache on the in-process store, and the replay of invalidations that missed
+Redis against the configured Redis (skipped when it is unreachable).
+Run from backend/: python -m pytest -q
+"""
+import asyncio
+import uuid
+import httpx
+import pytest
+from fastapi import FastAPI
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from app.config import settings
+from app.redis_client import close_redis
+from app.services import api_cache as api_cache_module
+from app.services.api_cache import ApiCache, cached, etag_matches
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def cache(monkeypatch) -> ApiCache:
+    monkeypatch.setattr(settings, "API_CACHE", "memory")
+    cache = ApiCache()
+    monkeypatch.setattr(api_cache_module, "api_cache", cache)
+    return cache
+
+
+class Computations:
+    """A compute() for get_or_compute that counts its calls and renders a new body each time."""
+
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return f'{{"n": {self.calls}}}'
+
+
+async def test_hit_until_invalidated(cache):
+    compute = Computations()
+    first = await cache.get_or_compute("bots", "k", 60, compute)
+    assert await cache.get_or_compute("bots", "k", 60, compute) == first
+    assert compute.calls == 1
+
+    await cache.invalidate("users")  # other namespaces are untouched
+    assert await cache.get_or_compute("bots", "k", 60, compute) == first
+
+    await cache.invalidate("bots")
+    second = await cache.get_or_compute("bots", "k", 60, compute)
+    assert compute.calls == 2
+    assert second[1] == '{"n": 2}' and second[0] != first[0]
+
+
+async def test_concurrent_misses_compute_once(cache):
+    compute = Computations(delay=0.05)
+    entries = await asyncio.gather(*(cache.get_or_compute("stats", "k", 60, compute) for _ in range(20)))
+    assert compute.calls == 1
+    assert len(set(entries)) == 1
+
+
+async def test_waiters_take_over_when_the_first_request_is_cancelled(cache):
+    compute = Computations(delay=0.1)
+    first = asyncio.create_task(cache.get_or_compute("stats", "k", 60, compute))
+    await asyncio.sleep(0.01)
+    waiter = asyncio.create_task(cache.get_or_compute("stats", "k", 60, compute))
+    await asyncio.sleep(0.01)
+    first.cancel()
+    assert (await waiter)[1] == '{"n": 2}'
+
+
+def test_etag_matches():
+    assert etag_matches('"a"', '"a"')
+    assert etag_matches('W/"a"', '"a"')
+    assert etag_matches('"b", "a"', '"a"')
+    assert etag_matches("*", '"a"')
+    assert not etag_matches('"b"', '"a"')
+    assert not etag_matches(None, '"a"')
+
+
+@pytest.fixture
+def app(cache) -> FastAPI:
+    app = FastAPI()
+    calls = []
+
+    @app.get("/items")
+    @cached("items", ttl=60)
+    async def items(page: int = 1):
+        calls.append(page)
+        return {"page": page, "items": ["a", "b"]}
+
+    app.state.calls = calls
+    return app
+
+
+async def test_cached_route_answers_304_to_matching_etag(app):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/items")
+        assert response.status_code == 200
+        assert response.json() == {"page": 1, "items": ["a", "b"]}
+        etag = response.headers["etag"]
+        assert response.headers["cache-control"] == "private, no-cache"
+
+        revalidated = await client.get("/items", headers={"If-None-Match": etag})
+        assert revalidated.status_code == 304
+        assert revalidated.content == b""
+        assert revalidated.headers["etag"] == etag
+
+        assert (await client.get("/items", headers={"If-None-Match": '"stale"'})).status_code == 200
+        assert (await client.get("/items", params={"page": 2})).json()["page"] == 2
+        assert app.state.calls == [1, 2]
+
+
+async def test_invalidation_during_redis_outage_is_replayed(monkeypatch):
+    redis = Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    try:
+        await redis.ping()
+    except (RedisError, OSError) as e:
+        pytest.skip(f"Redis unavailable: {e}")
+    finally:
+        await redis.aclose()
+
+    monkeypatch.setattr(settings, "API_CACHE", "redis")
+    monkeypatch.setattr(api_cache_module, "REDIS_RETRY_INTERVAL", 0.1)
+    namespace = f"test-{uuid.uuid4().hex}"
+    this, other = ApiCache(), ApiCache()  # two API processes
+    compute = Computations()
+    try:
+        stale = await this.get_or_compute(namespace, "k", 60, compute)
+        assert await other.get_or_compute(namespace, "k", 60, compute) == stale
+
+        get_redis = api_cache_module.get_redis
+        monkeypatch.setattr(api_cache_module, "get_redis", lambda: Redis(port=1))
+        await this.invalidate(namespace)
+        assert this._unsynced == {namespace}
+        monkeypatch.setattr(api_cache_module, "get_redis", get_redis)
+
+        await asyncio.sleep(0.3)  # Redis is back: the bump is replayed without any request here
+        assert this._unsynced == set()
+        assert (await other.get_or_compute(namespace, "k", 60, compute)) != stale
+    finally:
+        if this._sync_task:
+            this._sync_task.cancel()
+        async for key in api_cache_module.get_redis().scan_iter(f"{api_cache_module.PREFIX}:{namespace}:*"):
+            await api_cache_module.get_redis().delete(key)
+        await close_redis()
@@ -0,0 +1,107 @@
+# backend/tests/test_auth.py
+"""
+Authentication: the principal cache, client IPs and login limits (no database or Redis needed).
+Run from backend/: python -m pytest -q
+"""
+import time
+from datetime import timedelta
+import pytest
+from fastapi import HTTPException, Request
+from app.api import auth
+from app.config import settings
+from app.schemas.auth import Principal
+from app.services.api_cache import ApiCache
+from app.services.rate_limiter import AttemptLimiter
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def loads(monkeypatch) -> list:
+    """Usernames looked up in the database (a fake one holding every user)."""
+    loads = []
+
+    async def load_principal(username: str):
+        loads.append(username)
+        return Principal(id=1, username=username)
+
+    monkeypatch.setattr(auth, "_load_principal", load_principal)
+    monkeypatch.setattr(auth, "api_cache", ApiCache())
+    return loads
+
+
+def token() -> str:
+    return auth.create_access_token({"sub": "admin"}, timedelta(minutes=5))
+
+
+@pytest.mark.parametrize("api_cache", ["memory", "off"])
+async def test_principal_is_cached_whatever_api_cache(monkeypatch, loads, api_cache):
+    monkeypatch.setattr(settings, "API_CACHE", api_cache)
+    monkeypatch.setattr(settings, "PRINCIPAL_CACHE_TTL", 60)
+    access_token = token()
+    assert (await auth.get_current_user(access_token)).username == "admin"
+    assert (await auth.get_current_user(access_token)).username == "admin"
+    assert loads == ["admin"]
+
+    await auth.api_cache.invalidate(auth.PRINCIPALS)
+    await auth.get_current_user(access_token)
+    assert loads == ["admin", "admin"]
+
+
+async def test_zero_ttl_turns_principal_cache_off(monkeypatch, loads):
+    monkeypatch.setattr(settings, "API_CACHE", "memory")
+    monkeypatch.setattr(settings, "PRINCIPAL_CACHE_TTL", 0)
+    access_token = token()
+    await auth.get_current_user(access_token)
+    await auth.get_current_user(access_token)
+    assert loads == ["admin", "admin"]
+
+
+def request(peer: str, real_ip: str | None = None) -> Request:
+    headers = [(b"x-real-ip", real_ip.encode())] if real_ip else []
+    return Request({"type": "http", "method": "POST", "path": "/api/auth/login", "headers": headers, "client": (peer, 50000)})
+
+
+def test_real_ip_is_trusted_only_from_trusted_proxies(monkeypatch):
+    monkeypatch.setattr(settings, "TRUSTED_PROXIES", "127.0.0.1, 172.16.0.0/12")
+    assert auth.client_ip(request("172.18.0.5", "203.0.113.7")) == "203.0.113.7"
+    assert auth.client_ip(request("127.0.0.1", "203.0.113.7")) == "203.0.113.7"
+    assert auth.client_ip(request("198.51.100.1", "203.0.113.7")) == "198.51.100.1"
+    assert auth.client_ip(request("172.18.0.5")) == "172.18.0.5"
+
+    monkeypatch.setattr(settings, "TRUSTED_PROXIES", "")
+    assert auth.client_ip(request("127.0.0.1", "203.0.113.7")) == "127.0.0.1"
+
+
+@pytest.fixture
+def limiter(monkeypatch) -> AttemptLimiter:
+    limiter = AttemptLimiter("test-login", 300)
+    limiter._redis_down_until = time.monotonic() + 3600  # counted in process
+    monkeypatch.setattr(auth, "login_limiter", limiter)
+    monkeypatch.setattr(settings, "TRUSTED_PROXIES", "")
+    monkeypatch.setattr(settings, "LOGIN_MAX_ATTEMPTS_PER_IP", 100)
+    monkeypatch.setattr(settings, "LOGIN_MAX_ATTEMPTS_PER_USERNAME", 3)
+    return limiter
+
+
+async def test_username_limit_counts_per_client_ip(limiter):
+    attacker, user = request("198.51.100.1"), request("203.0.113.7")
+    for _ in range(3):
+        await auth.check_login_attempts(attacker, "Admin")
+    with pytest.raises(HTTPException) as e:
+        await auth.check_login_attempts(attacker, "admin")
+    assert e.value.status_code == 429
+
+    await auth.check_login_attempts(user, "admin")  # the user is not locked out by the attacker
+
+
+async def test_forged_real_ip_does_not_escape_the_limit(limiter):
+    for i in range(3):
+        await auth.check_login_attempts(request("198.51.100.1", f"10.0.0.{i}"), "admin")
+    with pytest.raises(HTTPException):
+        await auth.check_login_attempts(request("198.51.100.1", "10.0.0.99"), "admin")
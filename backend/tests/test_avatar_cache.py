@@ -0,0 +1,108 @@
+# backend/tests/test_avatar_cache.py
+"""
+Avatar cache: the byte-bounded LRU, single flight and forget() racing a fetch, with avatar files
+in a temporary directory (no database or Telegram needed).
+Run from backend/: python -m pytest -q
+"""
+import asyncio
+import os
+import pytest
+from app.config import settings
+from app.services.avatar_cache import AvatarCache, BotNotFound
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+class Telegram:
+    """Stands in for AvatarCache._download: 100 bytes per bot, held back while `gate` is closed."""
+
+    def __init__(self):
+        self.downloads = []
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def __call__(self, bot_id: int) -> bytes:
+        self.downloads.append(bot_id)
+        await self.gate.wait()
+        return bytes([bot_id]) * 100
+
+
+@pytest.fixture
+def telegram(monkeypatch, tmp_path) -> Telegram:
+    monkeypatch.setattr(settings, "AVATAR_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "AVATAR_CACHE_MEMORY_BYTES", 250)
+    return Telegram()
+
+
+@pytest.fixture
+def cache(telegram) -> AvatarCache:
+    cache = AvatarCache()
+    cache._download = telegram
+    return cache
+
+
+async def test_memory_evicts_least_recently_used_by_bytes(cache, telegram):
+    await cache.get(1)
+    await cache.get(2)
+    await cache.get(1)  # 2 is now the least recently used
+    await cache.get(3)
+    assert list(cache._memory) == [1, 3]
+    assert cache._memory_bytes == 200
+
+    # Evicted from memory only: served from disk, not downloaded again
+    assert (await cache.get(2)).body == bytes([2]) * 100
+    assert telegram.downloads == [1, 2, 3]
+    assert list(cache._memory) == [3, 2]
+
+
+async def test_avatar_larger_than_memory_is_still_kept(cache, monkeypatch):
+    monkeypatch.setattr(settings, "AVATAR_CACHE_MEMORY_BYTES", 50)
+    await cache.get(1)
+    await cache.get(2)
+    assert list(cache._memory) == [2]
+    assert cache._memory_bytes == 100
+
+
+async def test_concurrent_misses_download_once(cache, telegram):
+    telegram.gate.clear()
+    waiters = [asyncio.create_task(cache.get(1)) for _ in range(5)]
+    await asyncio.sleep(0.05)
+    telegram.gate.set()
+    avatars = await asyncio.gather(*waiters)
+    assert telegram.downloads == [1]
+    assert len({avatar.etag for avatar in avatars}) == 1
+
+
+async def test_forget_during_fetch_does_not_write_avatar_back(cache, telegram):
+    telegram.gate.clear()
+    waiter = asyncio.create_task(cache.get(1))
+    await asyncio.sleep(0.05)
+    assert telegram.downloads == [1]
+
+    await cache.forget(1)
+    telegram.gate.set()
+    with pytest.raises(BotNotFound):
+        await waiter
+    await asyncio.sleep(0.05)
+    assert 1 not in cache._memory and cache._memory_bytes == 0
+    assert not os.path.exists(cache._path(1))
+
+
+async def test_disk_write_finishing_after_forget_is_undone(cache):
+    generation = cache._generation(1)
+    await cache.forget(1)
+    cache._disk_set(1, b"avatar", generation)  # the write of a fetch started before forget()
+    assert not os.path.exists(cache._path(1))
+
+
+async def test_forget_drops_both_tiers(cache):
+    await cache.get(1)
+    assert os.path.exists(cache._path(1))
+    await cache.forget(1)
+    assert cache._memory_get(1) is None and cache._memory_bytes == 0
+    assert not os.path.exists(cache._path(1))
@@ -0,0 +1,99 @@
+# backend/tests/test_bot_users.py
+"""
+Users listing helpers: cursors and search conditions (no database needed).
+Run from backend/: python -m pytest -q
+"""
+import base64
+import string
+from datetime import datetime
+import httpx
+import pytest
+from fastapi import HTTPException
+from app.api.auth import get_current_user
+from app.api.bot_users import decode_cursor, encode_cursor, search_condition
+from app.main import app
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def b64(value: str) -> str:
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+
+@pytest.mark.parametrize("last_seen_at, telegram_id", [
+    (datetime(2026, 10, 18, 2, 35, 22, 732632), 123456789),
+    (datetime(2026, 1, 1), 2**63 - 1),
+])
+def test_cursor_round_trip(last_seen_at, telegram_id):
+    cursor = encode_cursor(last_seen_at, telegram_id)
+    assert decode_cursor(cursor) == (last_seen_at, telegram_id)
+    assert set(cursor) <= set(string.ascii_letters + string.digits + "-_=")  # safe in a query string
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "x",
+    "not base64!",
+    b64("2026-10-18T02:35:22"),
+    b64("2026-10-18T02:35:22|1|2"),
+    b64("yesterday|1"),
+    b64("2026-10-18T02:35:22|one"),
+    b64("2026-10-18T02:35:22|-1"),
+    b64(f"2026-10-18T02:35:22|{2**63}"),
+    b64("2026-10-18T02:35:22+03:00|1"),
+    base64.urlsafe_b64encode(b"\xff\xfe|1").decode(),
+])
+def test_malformed_cursor_is_a_bad_request(cursor):
+    with pytest.raises(HTTPException) as raised:
+        decode_cursor(cursor)
+    assert raised.value.status_code == 400
+
+
+@pytest.mark.anyio
+async def test_listing_rejects_malformed_cursor_before_querying():
+    app.dependency_overrides[get_current_user] = lambda: object()
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.get("/api/users/", params={"cursor": b64("yesterday|1")})
+    finally:
+        app.dependency_overrides.pop(get_current_user)
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor"}
+
+
+def ilike_patterns(condition) -> dict:
+    """Column -> (pattern, escape character) of a search condition made of ILIKEs."""
+    return {
+        clause.left.name: (clause.right.value, clause.modifiers["escape"])
+        for clause in condition.clauses
+    }
+
+
+@pytest.mark.parametrize("term, pattern", [
+    ("john", "%john%"),
+    ("@john", "%john%"),
+    ("50%", "%50\\%%"),
+    ("first_name", "%first\\_name%"),
+    ("back\\slash", "%back\\\\slash%"),
+    ("%_", "%\\%\\_%"),
+])
+def test_search_escapes_like_wildcards(term, pattern):
+    assert ilike_patterns(search_condition(term)) == {
+        "username": (pattern, "\\"),
+        "first_name": (pattern, "\\"),
+        "last_name": (pattern, "\\"),
+    }
+
+
+def test_numeric_search_looks_up_telegram_id():
+    condition = search_condition("123456789")
+    assert condition.left.name == "telegram_id"
+    assert condition.right.value == 123456789
+
+
+@pytest.mark.parametrize("term", [str(2**63), "١٢٣", "12a"])
+def test_search_for_numbers_outside_bigint_or_ascii_is_a_substring_match(term):
+    assert ilike_patterns(search_condition(term))["username"] == (f"%{term}%", "\\")
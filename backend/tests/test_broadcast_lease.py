@@ -0,0 +1,97 @@
+# backend/tests/test_broadcast_lease.py
+"""
+Broadcast leases against the configured (migrated) Postgres; skipped when it is unreachable.
+Run from backend/: python -m pytest -q
+"""
+import asyncio
+from datetime import datetime
+import pytest
+from sqlalchemy import delete, select, update
+from app.config import settings
+from app.database import AsyncSessionLocal, engine
+from app.models.broadcast import Broadcast
+from app.services.broadcast_service import BroadcastService
+
+pytestmark = pytest.mark.anyio
+
+TITLE = "test_broadcast_lease"
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+async def cleanup():
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Broadcast).where(Broadcast.title == TITLE))
+        await db.commit()
+
+
+@pytest.fixture
+async def broadcast_id(monkeypatch):
+    monkeypatch.setattr(settings, "BROADCAST_MODE", "local")
+    try:
+        await cleanup()
+    except Exception as e:
+        await engine.dispose()
+        pytest.skip(f"database unavailable: {e}")
+    async with AsyncSessionLocal() as db:
+        broadcast = Broadcast(title=TITLE, text="hi", status="sending")
+        db.add(broadcast)
+        await db.commit()
+    yield broadcast.id
+    await cleanup()
+    await engine.dispose()
+
+
+def process(runs: list, finish: asyncio.Event) -> BroadcastService:
+    """A BroadcastService as in one API process, whose broadcasts run until `finish` is set."""
+    service = BroadcastService()
+
+    async def run(broadcast_id: int):
+        runs.append((service.owner, broadcast_id))
+        await finish.wait()
+
+    service._run_broadcast = run
+    return service
+
+
+async def lease(broadcast_id: int):
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(
+            select(Broadcast.owner, Broadcast.lease_until).where(Broadcast.id == broadcast_id)
+        )).one()
+
+
+async def test_concurrent_resumes_start_broadcast_once(broadcast_id):
+    runs, finish = [], asyncio.Event()
+    first, second = process(runs, finish), process(runs, finish)
+
+    resumed = await asyncio.gather(first.resume_broadcasts(), second.resume_broadcasts())
+    await asyncio.sleep(0)
+
+    assert sorted(resumed, key=len) == [[], [broadcast_id]]
+    assert len(runs) == 1
+    owner = runs[0][0]
+    assert (await lease(broadcast_id)).owner == owner
+
+    finish.set()
+    await asyncio.gather(*first._tasks, *second._tasks)
+    assert tuple(await lease(broadcast_id)) == (None, None)
+
+
+async def test_expired_lease_is_taken_over(broadcast_id):
+    runs, finish = [], asyncio.Event()
+    stalled, live = process(runs, finish), process(runs, finish)
+    assert await stalled.start_broadcast(broadcast_id)
+    assert await live.resume_broadcasts() == []
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(Broadcast).where(Broadcast.id == broadcast_id).values(lease_until=datetime(2000, 1, 1)))
+        await db.commit()
+    assert await live.resume_broadcasts() == [broadcast_id]
+
+    finish.set()
+    await asyncio.gather(*stalled._tasks, *live._tasks)
+    assert [owner for owner, _ in runs] == [stalled.owner, live.owner]
@@ -0,0 +1,96 @@
+# backend/tests/test_broadcast_send.py
+"""
+One broadcast send: error handling and uploaded media (no database or Telegram needed).
+Run from backend/: python -m pytest -q
+"""
+import asyncio
+from types import SimpleNamespace
+import pytest
+from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter
+from aiogram.methods import SendMessage
+from aiogram.types import BufferedInputFile
+from app.config import settings
+from app.services.broadcast_service import BroadcastService, Recipient, _BotMedia, _BroadcastJob
+from app.services.rate_limiter import TokenBucket
+
+pytestmark = pytest.mark.anyio
+
+METHOD = SendMessage(chat_id=0, text="hi")
+RECIPIENT = Recipient(id=7, telegram_id=1007)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def flood():
+    return TelegramRetryAfter(METHOD, "Too Many Requests", retry_after=0)
+
+
+async def send(*outcomes) -> tuple:
+    """Send to RECIPIENT while the Bot API answers with `outcomes` in turn (None: delivered)."""
+    service = BroadcastService()
+    calls = []
+
+    async def send_message(bot, chat_id, job):
+        outcome = outcomes[len(calls)]
+        calls.append(chat_id)
+        if outcome is not None:
+            raise outcome
+
+    service._send_message = send_message
+    blocked = []
+    job = SimpleNamespace(cancelled=False)
+    result = await service._send_to_user(job, SimpleNamespace(id=1), TokenBucket(1000), RECIPIENT, blocked)
+    return result, blocked, len(calls)
+
+
+async def test_delivered_after_flood_limit():
+    assert await send(flood(), None) == (True, [], 2)
+
+
+async def test_blocked_on_retry_is_marked_blocked():
+    assert await send(flood(), TelegramForbiddenError(METHOD, "Forbidden: bot was blocked by the user")) == (False, [7], 2)
+
+
+async def test_error_on_retry_is_logged(caplog):
+    assert await send(flood(), RuntimeError("connection reset")) == (False, [], 2)
+    assert "connection reset" in caplog.text
+
+
+async def test_second_flood_limit_fails_without_third_attempt(caplog):
+    assert await send(flood(), flood()) == (False, [], 2)
+    assert "flood limit exceeded again" in caplog.text
+
+
+class UploadingBot:
+    """Answers every send after a delay with a message without media (no file_id to reuse)."""
+
+    def __init__(self):
+        self.id = 1
+        self.sends = []
+        self.in_flight = self.max_in_flight = 0
+
+    async def __call__(self, method):
+        self.sends.append(method)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return SimpleNamespace(photo=None, animation=None, video=None, document=None)
+
+
+async def test_media_without_file_id_is_uploaded_in_parallel(monkeypatch, caplog):
+    monkeypatch.setattr(settings, "BROADCAST_MODE", "local")
+    broadcast = SimpleNamespace(id=1, text="hi", media_type="photo", media_file_id=None, media_hash="abc")
+    job = _BroadcastJob(broadcast, None, BufferedInputFile(b"image", filename="a.jpg"))
+    media, bot = _BotMedia(job, bot_id=1, file_id=None), UploadingBot()
+
+    await media.send(bot, 1)
+    await asyncio.gather(*(media.send(bot, chat_id) for chat_id in range(2, 12)))
+
+    assert bot.sends[0].chat_id == 1
+    assert all(isinstance(method.photo, BufferedInputFile) for method in bot.sends)
+    assert bot.max_in_flight == 10  # not serialized behind the upload lock
+    assert caplog.text.count("No file_id") == 1
@@ -0,0 +1,142 @@
+# backend/tests/test_rate_limiter.py
+"""
+Broadcast rate limiters: TokenBucket on a simulated clock, the GCRA script of RedisRateLimiter
+against the configured Redis (skipped when it is unreachable).
+Run from backend/: python -m pytest -q
+"""
+import asyncio
+import uuid
+from types import SimpleNamespace
+import pytest
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from app.config import settings
+from app.services import rate_limiter
+from app.services.rate_limiter import RedisRateLimiter, TokenBucket
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+class Clock:
+    """Monotonic time that only moves when the limiter sleeps."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float):
+        # Like a real timer it always moves time on (a float sum near 1000 ignores tiny steps)
+        self.now += max(seconds, 1e-6)
+        await asyncio.sleep(0)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limiter, "time", SimpleNamespace(monotonic=clock.monotonic))
+    monkeypatch.setattr(rate_limiter, "asyncio", SimpleNamespace(sleep=clock.sleep, Lock=asyncio.Lock))
+    return clock
+
+
+async def acquire_times(bucket: TokenBucket, clock: Clock, count: int) -> list:
+    """Clock offsets (from the start) at which `count` concurrent waiters get their token."""
+    started = clock.now
+    times = []
+
+    async def waiter():
+        await bucket.acquire()
+        times.append(round(clock.now - started, 3))
+
+    await asyncio.gather(*(waiter() for _ in range(count)))
+    return times
+
+
+async def test_bucket_spaces_tokens_by_rate(clock):
+    assert await acquire_times(TokenBucket(rate=10), clock, 4) == [0, 0.1, 0.2, 0.3]
+
+
+async def test_bucket_allows_burst_up_to_capacity(clock):
+    bucket = TokenBucket(rate=10, capacity=3)
+    assert await acquire_times(bucket, clock, 5) == [0, 0, 0, 0.1, 0.2]
+
+
+async def test_bucket_refills_while_idle_but_not_above_capacity(clock):
+    bucket = TokenBucket(rate=10, capacity=3)
+    await acquire_times(bucket, clock, 3)
+    clock.now += 0.2  # two tokens back
+    assert await acquire_times(bucket, clock, 3) == [0, 0, 0.1]
+
+    clock.now += 60
+    assert await acquire_times(bucket, clock, 4) == [0, 0, 0, 0.1]
+
+
+async def test_pause_blocks_every_waiter(clock):
+    bucket = TokenBucket(rate=10, capacity=3)
+    await bucket.pause(5)
+    # The bucket is empty after a pause: no burst follows a 429
+    assert await acquire_times(bucket, clock, 3) == [5.1, 5.2, 5.3]
+
+
+async def test_pause_extends_but_never_shortens(clock):
+    bucket = TokenBucket(rate=10)
+    await bucket.pause(5)
+    await bucket.pause(1)
+    assert await acquire_times(bucket, clock, 1) == [5.1]
+
+
+@pytest.fixture
+async def redis():
+    client = Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    try:
+        await client.ping()
+    except (RedisError, OSError) as e:
+        await client.aclose()
+        pytest.skip(f"Redis unavailable: {e}")
+    yield client
+    await client.aclose()
+
+
+@pytest.fixture
+async def limiter(redis):
+    key = f"test:ratelimit:{uuid.uuid4().hex}"
+    yield RedisRateLimiter(redis, key, rate=10)
+    await redis.delete(key, f"{key}:pause")
+
+
+async def decision(limiter: RedisRateLimiter) -> int:
+    """The GCRA script's answer: 0 to send now, otherwise milliseconds to wait."""
+    return int(await limiter._script(keys=[limiter.key, f"{limiter.key}:pause"], args=[limiter.interval_ms]))
+
+
+async def test_gcra_allows_one_send_per_interval(limiter):
+    assert await decision(limiter) == 0
+    assert 0 < await decision(limiter) <= limiter.interval_ms
+    await asyncio.sleep(limiter.interval_ms / 1000)
+    assert await decision(limiter) == 0
+
+
+async def test_gcra_is_shared_by_limiters_of_one_key(limiter, redis):
+    other = RedisRateLimiter(redis, limiter.key, rate=10)
+    assert await decision(limiter) == 0
+    assert await decision(other) > 0
+
+
+async def test_gcra_denies_while_paused(limiter):
+    await limiter.pause(2)
+    wait_ms = await decision(limiter)
+    assert 1000 < wait_ms <= 2000
+
+
+async def test_acquire_waits_for_the_interval(limiter):
+    loop = asyncio.get_running_loop()
+    await limiter.acquire()
+    started = loop.time()
+    await limiter.acquire()
+    assert loop.time() - started >= (limiter.interval_ms - 5) / 1000
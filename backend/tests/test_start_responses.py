@@ -0,0 +1,123 @@
+# backend/tests/test_start_responses.py
+"""
+/start responses: StartResponseCache on a fake template table, and the handler's fallback
+(no database or Telegram needed).
+Run from backend/: python -m pytest -q
+"""
+import asyncio
+from types import SimpleNamespace
+import pytest
+from app.bot import handlers, responses
+from app.bot.responses import StartResponseCache
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def template(id: int, language_code: str, text: str, buttons=None):
+    return SimpleNamespace(id=id, bot_id=1, language_code=language_code, text=text, buttons=buttons or [])
+
+
+class Templates:
+    """Stands in for AsyncSessionLocal: every session reads `rows`, after `gate` opens if it is set."""
+
+    def __init__(self, *rows):
+        self.rows = list(rows)
+        self.reads = 0
+        self.gate = None
+
+    def __call__(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def scalars(self, statement):
+        self.reads += 1
+        rows = list(self.rows)
+        if self.gate:
+            await self.gate.wait()
+        return SimpleNamespace(all=lambda: rows)
+
+
+@pytest.fixture
+def templates(monkeypatch) -> Templates:
+    templates = Templates()
+    monkeypatch.setattr(responses, "AsyncSessionLocal", templates)
+    return templates
+
+
+async def test_language_resolution(templates):
+    templates.rows = [
+        template(1, "EN", "hello", [{"text": "Site", "url": "https://example.com"}]),
+        template(2, "ru", "привет"),
+    ]
+    cache = StartResponseCache()
+    english = await cache.get(1, "en")
+    assert english.text == "hello"
+    assert english.reply_markup.inline_keyboard[0][0].url == "https://example.com"
+    assert (await cache.get(1, "de")).text == "привет"
+    assert (await cache.get(1, "ru")).reply_markup is None
+    assert templates.reads == 1
+
+
+async def test_fallback_is_first_template_without_ru(templates):
+    templates.rows = [template(1, "de", "hallo"), template(2, "en", "hello")]
+    assert (await StartResponseCache().get(1, "fr")).text == "hallo"
+
+
+async def test_invalidate_drops_cached_responses(templates):
+    templates.rows = [template(1, "en", "old")]
+    cache = StartResponseCache()
+    assert (await cache.get(1, "en")).text == "old"
+
+    templates.rows = [template(1, "en", "new")]
+    assert (await cache.get(1, "en")).text == "old"
+    cache.invalidate(1)
+    assert (await cache.get(1, "en")).text == "new"
+    assert templates.reads == 2
+
+
+async def test_warm_racing_an_edit_is_not_stored(templates):
+    templates.rows = [template(1, "en", "old")]
+    templates.gate = asyncio.Event()
+    cache = StartResponseCache()
+    warming = asyncio.create_task(cache.get(1, "en"))
+    await asyncio.sleep(0)  # templates read, not yet returned
+
+    templates.rows = [template(1, "en", "new")]
+    cache.invalidate(1)
+    templates.gate.set()
+    assert (await warming).text == "old"  # answered, but not cached
+
+    assert (await cache.get(1, "en")).text == "new"
+    assert templates.reads == 2
+
+
+class Message:
+    def __init__(self, language_code):
+        self.from_user = SimpleNamespace(language_code=language_code)
+        self.answers = []
+
+    async def answer(self, text, reply_markup=None):
+        self.answers.append(text)
+
+
+async def test_start_without_templates_answers_welcome(monkeypatch, templates):
+    monkeypatch.setattr(handlers, "response_cache", StartResponseCache())
+    message = Message(None)
+    await handlers.cmd_start(message, bot_id=1)
+    assert message.answers == ["Welcome!"]
+
+    templates.rows = [template(1, "en", "hello")]
+    handlers.response_cache.invalidate(1)
+    message = Message("EN")
+    await handlers.cmd_start(message, bot_id=1)
+    assert message.answers == ["hello"]
@@ -0,0 +1,118 @@
+# backend/tests/test_tracking.py
+"""
+Tracking buffer against the configured (migrated) Postgres; skipped when it is unreachable.
+Run from backend/: python -m pytest -q
+"""
+import pytest
+import httpx
+from aiogram.types import User
+from sqlalchemy import delete, select
+from app.api.auth import get_current_user
+from app.bot.tracking import TrackingBuffer, tracking_buffer
+from app.database import AsyncSessionLocal, engine
+from app.main import app
+from app.models.bot import Bot
+from app.models.bot_user import BotUser
+from app.services.user_summary import forget_bot
+
+pytestmark = pytest.mark.anyio
+
+BOT_IDS = [910_000_001, 910_000_002]
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+async def cleanup():
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(BotUser).where(BotUser.source_bot_id.in_(BOT_IDS)))
+        for bot_id in BOT_IDS:
+            await forget_bot(db, bot_id)
+        await db.execute(delete(Bot).where(Bot.id.in_(BOT_IDS)))
+        await db.commit()
+
+
+@pytest.fixture
+async def bots():
+    try:
+        await cleanup()
+    except Exception as e:
+        await engine.dispose()
+        pytest.skip(f"database unavailable: {e}")
+    async with AsyncSessionLocal() as db:
+        for bot_id in BOT_IDS:
+            db.add(Bot(id=bot_id, token=f"{bot_id}:test", name=f"Test {bot_id}", bot_username=f"test_{bot_id}"))
+        await db.commit()
+    yield BOT_IDS
+    await cleanup()
+    await engine.dispose()
+
+
+def track(buffer: TrackingBuffer, bot_id: int, users: range):
+    for telegram_id in users:
+        buffer.add(User(id=telegram_id, is_bot=False, first_name=f"User {telegram_id}"), bot_id)
+
+
+async def tracked_users(bot_id: int) -> set:
+    async with AsyncSessionLocal() as db:
+        return set(await db.scalars(select(BotUser.telegram_id).where(BotUser.source_bot_id == bot_id)))
+
+
+async def test_rows_of_deleted_bot_do_not_block_flushes(bots):
+    deleted, alive = bots
+    buffer = TrackingBuffer(flush_size=1000, flush_interval=1.0)
+    track(buffer, deleted, range(1, 6))
+    track(buffer, alive, range(1, 6))
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Bot).where(Bot.id == deleted))
+        await db.commit()
+
+    await buffer.flush()  # fails on the foreign key and drops the deleted bot's rows
+    await buffer.flush()
+
+    assert buffer.stats()["pending"] == 0
+    assert await tracked_users(alive) == set(range(1, 6))
+
+
+async def test_delete_bot_purges_buffered_rows(bots):
+    deleted, alive = bots
+    track(tracking_buffer, deleted, range(1, 6))
+    track(tracking_buffer, alive, range(1, 6))
+    failed_flushes = tracking_buffer.failed_flushes
+
+    app.dependency_overrides[get_current_user] = lambda: object()
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            assert (await client.delete(f"/api/bots/{deleted}")).status_code == 200
+    finally:
+        app.dependency_overrides.pop(get_current_user)
+
+    await tracking_buffer.flush()
+    assert tracking_buffer.failed_flushes == failed_flushes
+    assert tracking_buffer.stats()["pending"] == 0
+    assert await tracked_users(alive) == set(range(1, 6))
+    assert await tracked_users(deleted) == set()
+
+
+async def test_pending_rows_are_capped():
+    buffer = TrackingBuffer(flush_size=1000, flush_interval=1.0, max_pending=3)
+    track(buffer, 1, range(1, 6))
+    track(buffer, 1, range(1, 3))  # users already pending are still updated
+
+    assert buffer.stats()["pending"] == 3
+    assert buffer.stats()["dropped_rows"] == 2
+    assert buffer.total_events == 7
+
+
+async def test_requeued_rows_are_capped():
+    buffer = TrackingBuffer(flush_size=1000, flush_interval=1.0, max_pending=3)
+    track(buffer, 1, range(1, 4))
+    batch, buffer._pending = buffer._pending, {}  # a flush that is about to fail
+    track(buffer, 1, range(3, 5))  # seen meanwhile
+
+    buffer._requeue(batch)
+
+    assert set(buffer._pending) == {(3, 1), (4, 1), (1, 1)}
+    assert buffer.dropped_rows == 1
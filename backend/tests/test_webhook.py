@@ -0,0 +1,72 @@
+# backend/tests/test_webhook.py
+"""
+Webhook endpoint answers for bad secrets, bodies and bots (no database or Telegram needed).
+Run from backend/: python -m pytest -q
+"""
+from types import SimpleNamespace
+import httpx
+import pytest
+from fastapi import FastAPI
+from app.api import webhook
+from app.services.bot_manager import bot_manager
+
+pytestmark = pytest.mark.anyio
+
+BOT_ID = 1
+UPDATE = {"update_id": 10, "message": {"message_id": 1, "date": 0, "chat": {"id": 5, "type": "private"}, "text": "/start"}}
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def client(monkeypatch):
+    """A client of the webhook router; bot BOT_ID runs, scheduled updates land in client.updates."""
+    updates = []
+    monkeypatch.setattr(bot_manager, "active_bots", {BOT_ID: (None, SimpleNamespace(id=BOT_ID, token="1:TOKEN"))})
+    monkeypatch.setattr(bot_manager, "_schedule_update", lambda bot_id, bot, update: updates.append((bot_id, update)))
+
+    app = FastAPI()
+    app.include_router(webhook.router, prefix="/api")
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        client.updates = updates
+        yield client
+
+
+def url(bot_id: int = BOT_ID, secret: str | None = None) -> str:
+    return f"/api/webhook/{bot_id}/{secret or bot_manager.webhook_secret(BOT_ID, '1:TOKEN')}"
+
+
+def secret_header(secret: str | None = None) -> dict:
+    return {"X-Telegram-Bot-Api-Secret-Token": secret or bot_manager.webhook_secret(BOT_ID, "1:TOKEN")}
+
+
+async def test_update_is_scheduled(client):
+    response = await client.post(url(), json=UPDATE, headers=secret_header())
+    assert response.status_code == 200
+    assert [(bot_id, update.update_id) for bot_id, update in client.updates] == [(BOT_ID, 10)]
+
+
+async def test_header_not_matching_path_is_forbidden(client):
+    response = await client.post(url(), json=UPDATE, headers=secret_header("0" * 32))
+    assert response.status_code == 403
+    assert client.updates == []
+
+
+async def test_wrong_secret_is_not_found(client):
+    response = await client.post(url(secret="0" * 32), json=UPDATE, headers=secret_header("0" * 32))
+    assert response.status_code == 404
+    assert client.updates == []
+
+
+async def test_unknown_bot_is_not_found(client):
+    assert (await client.post(url(bot_id=2), json=UPDATE, headers=secret_header())).status_code == 404
+
+
+@pytest.mark.parametrize("body", [b"{not json", b'{"update_id": "ten"}', b"[]"])
+async def test_malformed_body_is_bad_request(client, body):
+    response = await client.post(url(), content=body, headers={**secret_header(), "Content-Type": "application/json"})
+    assert response.status_code == 400
+    assert client.updates == []
@@ -1,11 +1,20 @@
 // frontend/src/api/stats.ts
 import { api } from './client';
 
+export interface BotStat {
+    bot_id: number;
+    name: string;
+    total_users: number;
+    new_today: number;
+    new_week: number;
+}
+
 export interface StatsOverview {
     total_users: number;
     new_today: number;
     new_week: number;
     active_bots: number;
+    bots: BotStat[];
 }
 
 export interface DailyStat {
@@ -18,8 +27,8 @@ export const statsApi = {
         const response = await api.get<StatsOverview>('/stats/overview');
         return response.data;
     },
-    getDaily: async (days = 30): Promise<DailyStat[]> => {
-        const response = await api.get<DailyStat[]>('/stats/daily', { params: { days } });
+    getDaily: async (days = 30, botId?: number): Promise<DailyStat[]> => {
+        const response = await api.get<DailyStat[]>('/stats/daily', { params: { days, bot_id: botId } });
         return response.data;
     },
 };
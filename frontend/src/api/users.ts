@@ -18,10 +18,12 @@ export interface BotUser {
 export interface PaginatedUsers {
     users: BotUser[];
     total: number;
+    total_estimated: boolean;
+    next_cursor: string | null;
 }
 
 export const usersApi = {
-    getAll: async (params: { page: number; limit: number; search?: string; bot_id?: number; }): Promise<PaginatedUsers> => {
+    getAll: async (params: { page: number; limit: number; search?: string; bot_id?: number; cursor?: string; }): Promise<PaginatedUsers> => {
         const response = await api.get<PaginatedUsers>('/users/', { params });
         return response.data;
     },
@@ -1,6 +1,6 @@
 // frontend/src/pages/StatsPage.tsx
 import React, { useEffect, useState } from 'react';
-import { Row, Col, Card, Statistic, Typography, Select, message } from 'antd';
+import { Row, Col, Card, Statistic, Typography, Select, Table, message } from 'antd';
 import { UserOutlined, ClockCircleOutlined, RiseOutlined } from '@ant-design/icons';
 import StatsChart from '../components/StatsChart';
 import TopBotsChart from '../components/TopBotsChart';
@@ -101,6 +101,20 @@ const StatsPage: React.FC = () => {
                     </div>
                 </Col>
             </Row>
+
+            <Card bordered={false} className="glass-card" style={{ marginTop: 24 }} title="По ботам">
+                <Table
+                    rowKey="bot_id"
+                    dataSource={overview?.bots || []}
+                    pagination={false}
+                    columns={[
+                        { title: 'Бот', dataIndex: 'name', key: 'name' },
+                        { title: 'Всего пользователей', dataIndex: 'total_users', key: 'total_users', sorter: (a, b) => a.total_users - b.total_users },
+                        { title: 'Новых сегодня', dataIndex: 'new_today', key: 'new_today', sorter: (a, b) => a.new_today - b.new_today },
+                        { title: 'За неделю', dataIndex: 'new_week', key: 'new_week', sorter: (a, b) => a.new_week - b.new_week },
+                    ]}
+                />
+            </Card>
         </div>
     );
 };
@@ -24,6 +24,8 @@ const UsersPage: React.FC = () => {
         current: 1,
         pageSize: 10,
     });
+    // Keyset cursors of pages reached by paging forward (page -> cursor), valid for one set of filters
+    const cursors = React.useRef<{ filters: string; pages: Record<number, string> }>({ filters: '', pages: {} });
 
     const fetchBots = async () => {
         try {
@@ -36,13 +38,21 @@ const UsersPage: React.FC = () => {
 
     const fetchUsers = React.useCallback(async () => {
         setLoading(true);
+        const filters = JSON.stringify([searchText, selectedBotId, pagination.pageSize]);
+        if (cursors.current.filters !== filters) {
+            cursors.current = { filters, pages: {} };
+        }
         try {
             const data = await usersApi.getAll({
                 page: pagination.current,
                 limit: pagination.pageSize,
                 search: searchText || undefined,
-                bot_id: selectedBotId
+                bot_id: selectedBotId,
+                cursor: cursors.current.pages[pagination.current]
             });
+            if (data.next_cursor) {
+                cursors.current.pages[pagination.current + 1] = data.next_cursor;
+            }
             setUsers(data.users);
             setTotal(data.total);
         } catch (error) {
@@ -91,7 +101,7 @@ const UsersPage: React.FC = () => {
                 <Row gutter={[16, 16]} align="middle">
                     <Col xs={24} sm={8} md={6}>
                         <Input
-                            placeholder="Поиск по username/имени"
+                            placeholder="Поиск по ID, username или имени"
                             prefix={<SearchOutlined style={{ color: 'rgba(255,255,255,0.4)' }} />}
                             value={searchText}
                             onChange={e => setSearchText(e.target.value)}